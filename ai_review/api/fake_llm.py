@@ -0,0 +1,297 @@
+"""
+A local OpenAI-compatible chat completions server for offline load tests.
+
+Point the API or CLI at it with LLM_PROVIDER=openai and
+OPENAI_BASE_URL=http://localhost:8900/v1. Latency, error rates, 429s and
+streaming pace are configurable from the command line:
+
+    python -m ai_review.api.fake_llm --latency lognormal:-0.5,0.6 --rate-limit-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+USER_MESSAGE = re.compile(r"^File: (?P<path>.*?)\n\n```[^\n]*\n(?P<code>.*)\n```$", re.DOTALL)
+# Characters per streamed delta; roughly one token each
+STREAM_CHUNK_CHARS = 4
+
+
+class LatencyDistribution:
+    """
+    Response latency in seconds, parsed from a spec like "fixed:0.5",
+    "uniform:0.2,1.5", "normal:1.0,0.3" or "lognormal:-0.5,0.6" (the mean
+    and standard deviation of the log of the latency).
+    """
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+
+    def __init__(self, kind: str, params: Tuple[float, ...]):
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency distribution: {kind} with {len(params)} parameters")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, params = spec.partition(":")
+        try:
+            values = tuple(float(value) for value in params.split(",") if value.strip())
+        except ValueError:
+            raise ValueError(f"Invalid latency distribution: {spec}")
+        return cls(kind.strip().lower(), values)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        else:
+            value = rng.lognormvariate(*self.params)
+        return max(value, 0.0)
+
+
+class FakeLLMConfig(BaseModel):
+    """Behaviour of the fake server."""
+    # Time to the full response, or to the first chunk when streaming
+    latency: str = "lognormal:-0.5,0.6"
+    # Pace of streamed output after the first chunk; 0 streams as fast as possible
+    tokens_per_second: float = Field(default=200.0, ge=0)
+    # Share of requests failing with a 500 after the latency
+    error_rate: float = Field(default=0.0, ge=0, le=1)
+    # Share of requests rejected at once with a 429
+    rate_limit_rate: float = Field(default=0.0, ge=0, le=1)
+    # Requests beyond this many in flight get a 429; 0 means no limit
+    max_concurrency: int = Field(default=0, ge=0)
+    retry_after: float = Field(default=1.0, ge=0)
+    seed: Optional[int] = None
+
+
+class FakeLLMStats:
+    """Request counters, served at GET /stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def start(self, limit: int) -> bool:
+        """Count a new request; False if it exceeds the concurrency limit."""
+        with self._lock:
+            self.requests += 1
+            if limit and self.in_flight >= limit:
+                self.rate_limited += 1
+                return False
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return True
+
+    def finish(self, outcome: str) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if outcome == "error":
+                self.errors += 1
+            elif outcome == "rate_limited":
+                self.rate_limited += 1
+            else:
+                self.completed += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "completed": self.completed,
+                "rate_limited": self.rate_limited,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+def fake_review(code: str, file_path: str) -> Dict[str, Any]:
+    """A deterministic review in the format the analysis prompt asks for."""
+    suggestions = []
+    for number, line in enumerate(code.splitlines(), start=1):
+        stripped = line.strip()
+        if "TODO" in line or "FIXME" in line:
+            suggestions.append(_fake_suggestion(number, file_path, "Resolve or track this TODO", "documentation", "low"))
+        if stripped.startswith("print(") or stripped.startswith("console.log("):
+            suggestions.append(_fake_suggestion(number, file_path, "Use a logger instead of printing", "lint", "low"))
+        if re.search(r"\beval\(|\bexec\(", line):
+            suggestions.append(_fake_suggestion(number, file_path, "Avoid evaluating dynamic code", "security", "high"))
+        if len(line) > 120:
+            suggestions.append(_fake_suggestion(number, file_path, "Line is too long", "style", "low"))
+    return {
+        "suggestions": suggestions,
+        "summary": f"Fake review of {len(code.splitlines())} lines with {len(suggestions)} findings."
+    }
+
+
+def _fake_suggestion(line: int, file_path: str, message: str, category: str, severity: str) -> Dict[str, Any]:
+    return {
+        "line_start": line,
+        "line_end": line,
+        "file_path": file_path,
+        "message": message,
+        "category": category,
+        "severity": severity,
+        "suggested_fix": None
+    }
+
+
+def _error(status_code: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"message": message, "type": error_type, "param": None, "code": error_type}},
+        headers=headers
+    )
+
+
+def _completion_chunk(completion_id: str, created: int, model: str, delta: Dict[str, str], finish: Optional[str]) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def _review_for(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Review the code in the last user message, in the format llm._build_messages sends."""
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    match = USER_MESSAGE.match(user)
+    if match is None:
+        return fake_review(user, "unknown")
+    return fake_review(match.group("code"), match.group("path"))
+
+
+def create_app(config: Optional[FakeLLMConfig] = None) -> FastAPI:
+    """Build the fake server application."""
+    config = config or FakeLLMConfig()
+    latency = LatencyDistribution.parse(config.latency)
+    rng = random.Random(config.seed)
+    stats = FakeLLMStats()
+
+    app = FastAPI(title="Fake LLM", description="OpenAI-compatible fake for offline load tests")
+    app.state.config = config
+    app.state.stats = stats
+
+    def rate_limited() -> JSONResponse:
+        return _error(
+            429, "Rate limit reached (injected)", "rate_limit_exceeded",
+            headers={"retry-after": f"{config.retry_after:g}"}
+        )
+
+    async def stream(content: str, completion_id: str, created: int, model: str) -> AsyncIterator[str]:
+        try:
+            yield _completion_chunk(completion_id, created, model, {"role": "assistant", "content": ""}, None)
+            for start in range(0, len(content), STREAM_CHUNK_CHARS):
+                if start and config.tokens_per_second:
+                    await asyncio.sleep(1 / config.tokens_per_second)
+                delta = {"content": content[start:start + STREAM_CHUNK_CHARS]}
+                yield _completion_chunk(completion_id, created, model, delta, None)
+            yield _completion_chunk(completion_id, created, model, {}, "stop")
+            yield "data: [DONE]\n\n"
+        finally:
+            stats.finish("completed")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        """Answer a chat completion with a fake review of the submitted code."""
+        body = await request.json()
+        if not stats.start(config.max_concurrency):
+            return rate_limited()
+        if rng.random() < config.rate_limit_rate:
+            stats.finish("rate_limited")
+            return rate_limited()
+        try:
+            await asyncio.sleep(latency.sample(rng))
+        except BaseException:
+            stats.finish("error")
+            raise
+        if rng.random() < config.error_rate:
+            stats.finish("error")
+            return _error(500, "Internal server error (injected)", "server_error")
+
+        messages = body.get("messages") or []
+        model = body.get("model") or "fake"
+        content = json.dumps(_review_for(messages))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        if body.get("stream"):
+            return StreamingResponse(stream(content, completion_id, created, model), media_type="text/event-stream")
+
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        completion_tokens = len(content) // 4
+        stats.finish("completed")
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    @app.get("/stats")
+    def get_stats():
+        """Request counters since the server started."""
+        return stats.snapshot()
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default=FakeLLMConfig().latency,
+                        help="fixed:S, uniform:MIN,MAX, normal:MEAN,STD or lognormal:MU,SIGMA (seconds)")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = FakeLLMConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_concurrency=args.max_concurrency,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+
+    import uvicorn
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
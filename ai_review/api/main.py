@@ -1,13 +1,49 @@
 import os
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ai_review.db.database import get_db, init_db
-from ai_review.models.review import ReviewRequest, ReviewResponse
-from ai_review.services.review import create_review, get_review, list_reviews, rerun_review as service_rerun_review
+from ai_review.api.metrics import MetricsMiddleware
+from ai_review.core.config import settings as app_settings
+from ai_review.db.database import (
+    AsyncWriteSessionLocal,
+    SessionLocal,
+    WriteSessionLocal,
+    get_async_db,
+    get_async_write_db,
+    get_pool_status,
+    init_db,
+)
+from ai_review.models.review import (
+    BatchReviewRequest,
+    BatchReviewResponse,
+    IncrementalReviewRequest,
+    ReviewJobResponse,
+    ReviewRequest,
+    ReviewResponse,
+    TimingSummaryResponse,
+)
+from ai_review.services.analyzers import shutdown_pool as shutdown_local_analyzers
+from ai_review.services.cache import analysis_cache
+from ai_review.services.jobs import ReviewWorkerPool, enqueue_review_async, wait_for_review_async
+from ai_review.services.llm import llm_limiter
+from ai_review.services.review import (
+    BaseMismatchError,
+    create_incremental_review_async,
+    create_review_async,
+    create_reviews_batch_async,
+    get_review_json_async,
+    get_timing_summary_async,
+    list_reviews_async,
+    next_cursor,
+    rerun_review_async as service_rerun_review,
+    stream_review_async,
+)
+from ai_review.utils.metrics import CONTENT_TYPE, REGISTRY
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -23,12 +59,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The review list's cursor; browsers hide response headers not listed here
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Outermost, so the timings include the other middleware
+app.add_middleware(MetricsMiddleware)
+
+# Background workers for queued reviews
+worker_pool = ReviewWorkerPool(
+    SessionLocal,
+    workers=app_settings.REVIEW_WORKERS,
+    poll_interval=app_settings.REVIEW_JOB_POLL_INTERVAL,
+    write_session_factory=WriteSessionLocal
+)
+
+
 # Initialize database on startup
 @app.on_event("startup")
 def startup_event():
     init_db()
+    worker_pool.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    worker_pool.stop(timeout=5)
+    shutdown_local_analyzers()
+
+
+def _with_timings(review: ReviewResponse, include_timings: bool) -> ReviewResponse:
+    """Drop the stage timings from a response unless they were asked for."""
+    if not include_timings:
+        review.timings = None
+    return review
 
 
 @app.get("/health")
@@ -37,29 +101,114 @@ def health_check():
     return {"status": "ok"}
 
 
-@app.post("/review", response_model=ReviewResponse)
-def review_code(payload: ReviewRequest, db: Session = Depends(get_db)):
-    """Submit code for review and analysis."""
-    return create_review(payload, db)
+@app.post(
+    "/review",
+    response_model=ReviewResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": ReviewJobResponse}}
+)
+async def review_code(
+    payload: ReviewRequest,
+    background: bool = False,
+    include_timings: bool = False,
+    db: AsyncSession = Depends(get_async_write_db)
+):
+    """
+    Submit code for review and analysis.
+    
+    With background=true the review is queued and 202 is returned right
+    away with the review id; poll GET /reviews/{id} for the result.
+    With include_timings=true the response carries the per-stage timings.
+    """
+    if background:
+        job = await enqueue_review_async(payload, db)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job.model_dump())
+    return _with_timings(await create_review_async(payload, db), include_timings)
+
+
+@app.post("/review/stream")
+async def review_code_stream(payload: ReviewRequest, include_timings: bool = False):
+    """Submit code for review and stream suggestions as server-sent events."""
+    return StreamingResponse(
+        stream_review_async(payload, AsyncWriteSessionLocal, include_timings=include_timings),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/review/incremental", response_model=ReviewResponse)
+async def review_code_incremental(
+    payload: IncrementalReviewRequest,
+    include_timings: bool = False,
+    db: AsyncSession = Depends(get_async_write_db)
+):
+    """Re-review only the hunks that changed since a base review."""
+    try:
+        return _with_timings(await create_incremental_review_async(payload, db), include_timings)
+    except BaseMismatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@app.post("/reviews/batch", response_model=BatchReviewResponse)
+async def review_code_batch(
+    payload: BatchReviewRequest,
+    include_timings: bool = False,
+    db: AsyncSession = Depends(get_async_write_db)
+):
+    """Submit many files for review in a single request."""
+    try:
+        batch = await create_reviews_batch_async(payload, db)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    for result in batch.results:
+        _with_timings(result, include_timings)
+    return batch
 
 
 @app.get("/reviews/{review_id}", response_model=ReviewResponse)
-def get_review_by_id(review_id: str, db: Session = Depends(get_db)):
-    """Get a specific review by ID."""
-    review = get_review(review_id, db)
-    if not review:
+async def get_review_by_id(
+    review_id: str,
+    wait: float = Query(default=0, ge=0, le=60),
+    include_timings: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a specific review by ID.
+    
+    Pass wait=<seconds> to block until a queued review completes or fails,
+    and include_timings=true for its per-stage timings.
+    """
+    if wait:
+        await wait_for_review_async(review_id, db, wait)
+    payload = await get_review_json_async(review_id, db, include_timings=include_timings)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Review with ID {review_id} not found"
         )
-    return review
+    # Already serialized from trusted rows; response_model only documents the schema
+    return Response(content=payload, media_type="application/json")
 
 
 @app.post("/reviews/{review_id}/rerun", response_model=ReviewResponse)
-def rerun_review(review_id: str, db: Session = Depends(get_db)):
+async def rerun_review(
+    review_id: str,
+    include_timings: bool = False,
+    db: AsyncSession = Depends(get_async_write_db)
+):
     """Re-run a review with the same code."""
     try:
-        return service_rerun_review(review_id, db)
+        return _with_timings(await service_rerun_review(review_id, db), include_timings)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -73,19 +222,82 @@ def rerun_review(review_id: str, db: Session = Depends(get_db)):
 
 
 @app.get("/reviews", response_model=List[Dict[str, Any]])
-def get_reviews(
+async def get_reviews(
     skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db)
+    limit: int = Query(default=100, ge=1, le=500), 
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all reviews with pagination."""
+    """
+    List all reviews with pagination.
+    
+    Prefer cursor pagination over skip: pass the X-Next-Cursor header of the
+    previous page as after=<created_at,id> to fetch the next one.
+    """
     try:
-        return list_reviews(skip, limit, db)
+        reviews = await list_reviews_async(skip, limit, db, after=after)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to list reviews: {str(e)}"
         )
+    
+    cursor = next_cursor(reviews, limit)
+    # A returned response skips response_model validation, and the injected one's headers
+    headers = {"X-Next-Cursor": cursor} if cursor else None
+    return ORJSONResponse(reviews, headers=headers)
+
+
+@app.get("/timings", response_model=TimingSummaryResponse)
+async def get_timing_summary(
+    since: Optional[datetime] = None,
+    language: Optional[str] = None,
+    limit: int = Query(default=1000, ge=1, le=100000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Aggregate per-stage timings over recent reviews.
+    
+    Reports count, mean, p50, p95, p99 and max seconds for each stage over
+    the latest limit reviews, optionally only those created since a time or
+    in one language.
+    """
+    return await get_timing_summary_async(db, since=since, language=language, limit=limit)
+
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Get hit/miss counters for the analysis result cache."""
+    return analysis_cache.stats()
+
+
+@app.get("/llm/limiter")
+def get_llm_limiter_stats():
+    """Get the adaptive LLM concurrency limit and queue state."""
+    return llm_limiter.stats()
+
+
+@app.get("/db/pool")
+def get_db_pool_stats():
+    """Get connection pool saturation and checkout wait times."""
+    return get_pool_status()
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Expose request, LLM, database and queue metrics for Prometheus."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+def clear_cache():
+    """Invalidate every cached analysis result."""
+    analysis_cache.clear()
 
 
 if __name__ == "__main__":
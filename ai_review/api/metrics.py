@@ -0,0 +1,105 @@
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from ai_review.db.database import SessionLocal, get_pool_status
+from ai_review.services.cache import analysis_cache, review_cache
+from ai_review.services.jobs import job_counts
+from ai_review.services.llm import analysis_flights, llm_limiter
+from ai_review.utils.metrics import Counter, Gauge, Histogram
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served.")
+
+
+def _pool_gauge(key: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    def collect() -> Dict[Tuple[str, ...], float]:
+        return {(name,): status[key] for name, status in get_pool_status().items() if key in status}
+    return collect
+
+
+def _job_counts() -> Dict[Tuple[str, ...], float]:
+    with SessionLocal() as db:
+        counts = job_counts(db)
+    return {(status,): counts.get(status, 0) for status in ("pending", "running")}
+
+
+# Read from their owners when /metrics is scraped, never on the request path
+Counter(
+    "analysis_cache_hits_total", "Analysis cache lookups served from the cache.",
+    function=lambda: analysis_cache.stats()["hits"]
+)
+Counter(
+    "analysis_cache_misses_total", "Analysis cache lookups that missed.",
+    function=lambda: analysis_cache.stats()["misses"]
+)
+Gauge(
+    "analysis_cache_hit_ratio", "Share of analysis cache lookups served from the cache since startup.",
+    function=lambda: analysis_cache.stats()["hit_ratio"]
+)
+Counter(
+    "review_cache_hits_total", "Review reads served from the review cache.",
+    function=lambda: review_cache.stats()["hits"]
+)
+Counter(
+    "review_cache_misses_total", "Review reads that went to the database.",
+    function=lambda: review_cache.stats()["misses"]
+)
+Counter(
+    "review_cache_errors_total", "Review cache backend errors.",
+    function=lambda: review_cache.stats()["errors"]
+)
+Gauge("analyses_in_flight", "Distinct analyses currently running in this process.", function=analysis_flights.in_flight)
+Gauge(
+    "llm_requests_in_flight", "LLM requests holding a limiter slot.",
+    function=lambda: llm_limiter.stats()["in_flight"]
+)
+Gauge(
+    "llm_requests_queued", "LLM requests waiting for a limiter slot.",
+    function=lambda: llm_limiter.stats()["queued"]
+)
+Gauge(
+    "llm_concurrency_limit", "Current adaptive LLM concurrency limit.",
+    function=lambda: llm_limiter.stats()["concurrency_limit"]
+)
+Gauge("review_jobs", "Queued review jobs by status.", ["status"], function=_job_counts)
+Gauge("db_pool_checked_out", "Connections checked out of each pool.", ["pool"], function=_pool_gauge("checked_out"))
+Gauge("db_pool_saturation", "Share of each pool's capacity in use.", ["pool"], function=_pool_gauge("saturation"))
+
+
+class MetricsMiddleware:
+    """
+    Time every HTTP request into HTTP_REQUEST_SECONDS.
+
+    Requests are labelled with the route template (e.g. /reviews/{review_id})
+    rather than the raw path, so the number of series stays bounded. Pure
+    ASGI, so streamed responses pass through untouched and are timed to
+    their last byte.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # The router records the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status))
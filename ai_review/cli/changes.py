@@ -0,0 +1,140 @@
+"""
+Changed files and lines from the local git repository.
+
+git_changed_files() lists the files added, copied, modified or renamed
+either since the merge base of a ref and HEAD (working tree changes
+included) or in the index, together with the new-file line ranges that
+changed. The CLI submits only those files and drops suggestions outside
+those ranges, so a branch's review scales with the branch.
+"""
+import codecs
+import os
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+from ai_review.services.diff import changed_line_ranges, parse_unified_diff
+
+
+@dataclass
+class ChangedFile:
+    """A changed file and its changed new-file line ranges."""
+    path: Path
+    repo_path: str
+    repo_root: str
+    ranges: List[Tuple[int, int]] = field(default_factory=list)
+    staged: bool = False
+
+    def read(self) -> str:
+        """The version under review: the staged one with --staged, else the working tree's."""
+        if self.staged:
+            return _git(self.repo_root, "show", f":{self.repo_path}")
+        return self.path.read_text(encoding="utf-8", errors="replace")
+
+    def excerpt(self, context: int) -> str:
+        """
+        The file with every line further than context lines from a change blanked.
+
+        Blank lines keep the line numbers of the kept ones, and the API
+        collapses blank runs before prompting, so only the changes and their
+        context reach the model.
+        """
+        code = self.read()
+        lines = code.splitlines()
+        keep = [False] * len(lines)
+        for start, end in self.ranges:
+            for line in range(max(start - context, 1), min(end + context, len(lines)) + 1):
+                keep[line - 1] = True
+        excerpt = "\n".join(text if kept else "" for text, kept in zip(lines, keep))
+        return excerpt + "\n" if code.endswith("\n") else excerpt
+
+
+def git_changed_files(target_path: Path, since: Optional[str] = None, staged: bool = False) -> List[ChangedFile]:
+    """
+    Files under target_path changed since the merge base of since and HEAD, or staged.
+
+    With both, the staged changes since the merge base. Files whose changes
+    only remove lines, and binary files, have no changed ranges and are left
+    out. Raises ValueError if git fails, e.g. outside a repository.
+    """
+    directory = target_path if target_path.is_dir() else target_path.parent
+    repo_root = _git(str(directory), "rev-parse", "--show-toplevel").strip()
+
+    args = ["diff", "--no-color", "--no-ext-diff", "--unified=0", "--diff-filter=ACMR", "--find-renames"]
+    if staged:
+        args.append("--cached")
+    if since:
+        args.append(_git(repo_root, "merge-base", since, "HEAD").strip())
+    args += ["--", os.path.abspath(target_path)]
+
+    changes = []
+    for repo_path, diff in _split_diff(_git(repo_root, *args)):
+        ranges = changed_line_ranges(parse_unified_diff(diff))
+        if not ranges:
+            continue
+        changes.append(ChangedFile(
+            path=_display_path(os.path.join(repo_root, repo_path)),
+            repo_path=repo_path,
+            repo_root=repo_root,
+            ranges=ranges,
+            staged=staged,
+        ))
+    return changes
+
+
+def only_changed_lines(result: Dict[str, Any], ranges: List[Tuple[int, int]]) -> Dict[str, Any]:
+    """A copy of a review result without the suggestions outside the changed ranges."""
+    suggestions = [
+        sugg for sugg in result.get("suggestions", [])
+        if any(sugg["line_start"] <= end and sugg["line_end"] >= start for start, end in ranges)
+    ]
+    return {**result, "suggestions": suggestions}
+
+
+def _split_diff(diff: str) -> List[Tuple[str, str]]:
+    """Split a multi-file diff into (new path, single-file diff) pairs."""
+    files: List[Tuple[str, List[str]]] = []
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            files.append(("", [line]))
+            continue
+        if not files:
+            continue
+        if line.startswith("+++ ") and not files[-1][0]:
+            files[-1] = (_unquote(line[4:]), files[-1][1])
+        files[-1][1].append(line)
+    return [(path, "\n".join(lines)) for path, lines in files if path]
+
+
+def _unquote(path: str) -> str:
+    """Strip git's quoting and the "b/" prefix from a diff header path."""
+    # Names with spaces get a trailing tab
+    path = path.rstrip("\t")
+    if path.startswith('"') and path.endswith('"'):
+        # C-style escapes, with non-ASCII bytes as octal; escape_decode returns bytes
+        unescaped = cast(bytes, codecs.escape_decode(path[1:-1].encode("utf-8"))[0])
+        path = unescaped.decode("utf-8", errors="replace")
+    if path == "/dev/null":
+        return ""
+    return path[2:] if path.startswith("b/") else path
+
+
+def _display_path(path: str) -> Path:
+    try:
+        return Path(os.path.relpath(path))
+    except ValueError:
+        # On another drive than the working directory
+        return Path(path)
+
+
+def _git(cwd: str, *args: str) -> str:
+    try:
+        completed = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, encoding="utf-8", errors="replace"
+        )
+    except OSError as e:
+        raise ValueError(f"Could not run git: {e}")
+    if completed.returncode != 0:
+        raise ValueError(completed.stderr.strip() or f"git {args[0]} failed")
+    return completed.stdout
@@ -0,0 +1,279 @@
+"""
+File discovery for the CLI.
+
+iter_files() walks a directory with os.scandir and yields the files worth
+reviewing as it finds them, so the caller can start submitting before the
+walk is over. Ignored directories are pruned before they are entered, so
+node_modules, virtualenvs and .git cost one directory entry each.
+
+What is skipped:
+    - anything matched by the --ignore patterns or by a .gitignore or
+      .aiignore file in the walked directories or, inside a git repository,
+      in the directories between the repository root and the target
+    - files without an extension and files with a known binary extension
+    - files larger than max_size bytes
+    - files whose first bytes contain a NUL byte, like git's own binary check
+
+Patterns use .gitignore syntax: "!" negates, a trailing "/" matches only
+directories, a pattern containing "/" is anchored to the directory of the
+file that defines it (the target for --ignore patterns), and "**" matches
+across directories. As in git, a file inside an ignored directory cannot be
+re-included.
+"""
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+IGNORE_FILES = (".gitignore", ".aiignore")
+
+BINARY_SUFFIXES = frozenset({
+    ".pyc", ".pyo", ".so", ".dll", ".dylib", ".exe", ".o", ".a", ".class", ".jar",
+    ".zip", ".gz", ".tar", ".png", ".jpg", ".jpeg", ".gif", ".ico", ".pdf", ".woff", ".woff2",
+})
+
+SNIFF_BYTES = 8000
+
+
+class IgnoreRule(NamedTuple):
+    """One pattern line, relative to the directory it was defined in."""
+
+    base: str
+    regex: "re.Pattern[str]"
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+
+def iter_files(
+    target_path: Path,
+    recursive: bool,
+    ignore: Sequence[str] = (),
+    max_size: Optional[int] = None
+) -> Iterator[Path]:
+    """
+    Yield the files to review under target_path, in sorted order per directory.
+
+    A file target is yielded as is. max_size of None or 0 means no limit.
+    """
+    if target_path.is_file():
+        yield target_path
+        return
+
+    root = os.path.abspath(target_path)
+    rules = _ancestor_rules(root) + parse_ignore_patterns(ignore, root)
+    # Depth first; a directory's files come before its subdirectories
+    stack: List[Tuple[str, Path, List[IgnoreRule]]] = [(root, target_path, rules)]
+    while stack:
+        directory, display, rules = stack.pop()
+        rules = rules + _load_ignore_files(directory)
+        try:
+            with os.scandir(directory) as scanner:
+                entries = sorted(scanner, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            try:
+                # Symlinked directories are not followed, so the walk cannot loop
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if is_ignored(entry.path, is_dir, rules):
+                continue
+            if is_dir:
+                if recursive:
+                    subdirectories.append((entry.path, display / entry.name, rules))
+            elif _is_reviewable(entry.path, entry.stat, max_size):
+                yield display / entry.name
+
+        stack.extend(reversed(subdirectories))
+
+
+def discover_files(
+    target_path: Path,
+    recursive: bool,
+    ignore: Sequence[str] = (),
+    max_size: Optional[int] = None
+) -> List[Path]:
+    """Find all the files to review under target_path."""
+    return list(iter_files(target_path, recursive, ignore, max_size))
+
+
+def filter_files(
+    paths: Iterable[Path],
+    root: Path,
+    ignore: Sequence[str] = (),
+    max_size: Optional[int] = None
+) -> Iterator[Path]:
+    """
+    Yield the paths under root that iter_files(root, recursive=True) would yield.
+
+    For an explicit list of files, such as the ones changed in git, without
+    walking the rest of the tree.
+    """
+    root_directory = os.path.abspath(root)
+    base_rules = _ancestor_rules(root_directory) + parse_ignore_patterns(ignore, root_directory)
+    directory_rules: Dict[str, Optional[List[IgnoreRule]]] = {}
+
+    def rules_within(directory: str) -> Optional[List[IgnoreRule]]:
+        """Rules that apply to directory's entries, or None if directory is ignored."""
+        if directory not in directory_rules:
+            if directory == root_directory:
+                rules: Optional[List[IgnoreRule]] = base_rules + _load_ignore_files(directory)
+            else:
+                parent_rules = rules_within(os.path.dirname(directory))
+                if parent_rules is None or is_ignored(directory, True, parent_rules):
+                    rules = None
+                else:
+                    rules = parent_rules + _load_ignore_files(directory)
+            directory_rules[directory] = rules
+        return directory_rules[directory]
+
+    for path in paths:
+        absolute = os.path.abspath(path)
+        if not absolute.startswith(root_directory + os.sep) or not os.path.isfile(absolute):
+            continue
+        rules = rules_within(os.path.dirname(absolute))
+        if rules is None or is_ignored(absolute, False, rules):
+            continue
+        if _is_reviewable(absolute, lambda: os.stat(absolute), max_size):
+            yield path
+
+
+def parse_ignore_patterns(lines: Sequence[str], base: str) -> List[IgnoreRule]:
+    """Compile .gitignore-style pattern lines defined in the directory base."""
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n\r")
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            # "\#" and "\!" are literal
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        rules.append(IgnoreRule(base, _compile(line.lstrip("/")), negate, dir_only, anchored))
+    return rules
+
+
+def is_ignored(path: str, is_dir: bool, rules: Sequence[IgnoreRule]) -> bool:
+    """Whether the last rule matching path, if any, ignores it."""
+    name = os.path.basename(path)
+    for rule in reversed(rules):
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.anchored:
+            if not path.startswith(rule.base + os.sep):
+                continue
+            candidate = path[len(rule.base) + 1:].replace(os.sep, "/")
+        else:
+            candidate = name
+        if rule.regex.fullmatch(candidate):
+            return not rule.negate
+    return False
+
+
+def is_binary(path: str) -> bool:
+    """Sniff the start of the file for a NUL byte."""
+    try:
+        with open(path, "rb") as file:
+            return b"\0" in file.read(SNIFF_BYTES)
+    except OSError:
+        return True
+
+
+def _is_reviewable(path: str, stat: Callable[[], os.stat_result], max_size: Optional[int]) -> bool:
+    suffix = os.path.splitext(path)[1].lower()
+    if not suffix or suffix in BINARY_SUFFIXES:
+        return False
+    if max_size:
+        try:
+            if stat().st_size > max_size:
+                return False
+        except OSError:
+            return False
+    return not is_binary(path)
+
+
+def _load_ignore_files(directory: str) -> List[IgnoreRule]:
+    rules = []
+    for name in IGNORE_FILES:
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as file:
+                rules.extend(parse_ignore_patterns(file.readlines(), directory))
+        except OSError:
+            continue
+    return rules
+
+
+def _ancestor_rules(root: str) -> List[IgnoreRule]:
+    """Ignore files between the enclosing git repository's root and root itself."""
+    ancestors = []
+    directory = os.path.dirname(root)
+    while True:
+        ancestors.append(directory)
+        if os.path.exists(os.path.join(directory, ".git")):
+            break
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            # Not in a repository: only the target's own ignore files apply
+            return []
+        directory = parent
+
+    rules = []
+    for directory in reversed(ancestors):
+        rules.extend(_load_ignore_files(directory))
+    return rules
+
+
+def _compile(pattern: str) -> "re.Pattern[str]":
+    """Translate a .gitignore glob into a regular expression."""
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            regex += "(?:.*/)?"
+            index += 3
+            continue
+        if pattern.startswith("/**", index) and index + 3 == len(pattern):
+            regex += "/.*"
+            index += 3
+            continue
+        if pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[":
+            end = pattern.find("]", index + 2)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                body = pattern[index + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex += "[" + body.replace("\\", "\\\\") + "]"
+                index = end
+        elif char == "\\" and index + 1 < len(pattern):
+            index += 1
+            regex += re.escape(pattern[index])
+        else:
+            regex += re.escape(char)
+        index += 1
+    return re.compile(regex, re.DOTALL)
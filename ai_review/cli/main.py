@@ -1,7 +1,10 @@
 import os
 import sys
 import json
-from typing import Optional, List, Dict, Any
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from functools import partial
+from itertools import chain
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple
 from pathlib import Path
 
 import typer
@@ -9,9 +12,13 @@ from rich.console import Console
 from rich.table import Table
 from rich.syntax import Syntax
 from rich.panel import Panel
+from rich.progress import Progress, BarColumn, MofNCompleteColumn, TextColumn, TimeElapsedColumn
 from rich import print as rprint
 import httpx
 
+from ai_review.cli.changes import ChangedFile, git_changed_files, only_changed_lines
+from ai_review.cli.discovery import filter_files, iter_files
+from ai_review.cli.manifest import DEFAULT_CACHE_DIR, ReviewManifest
 from ai_review.models.review import SeverityLevel
 
 # Initialize Typer CLI app
@@ -41,7 +48,33 @@ def review(
         False, help="Recursively scan directories"
     ),
     ignore: List[str] = typer.Option(
-        ["venv", "node_modules", ".git"], help="Directories to ignore"
+        ["venv", "node_modules", ".git"],
+        help="Patterns to ignore, in .gitignore syntax, on top of .gitignore and .aiignore files"
+    ),
+    max_file_size: int = typer.Option(
+        1_000_000, min=0, help="Skip files larger than this many bytes (0 for no limit)"
+    ),
+    concurrency: int = typer.Option(
+        1, min=1, help="Number of files to submit in parallel"
+    ),
+    timeout: float = typer.Option(
+        60.0, help="Per-file request timeout in seconds"
+    ),
+    cache: bool = typer.Option(
+        True, help="Reuse the results of files unchanged since the last run"
+    ),
+    cache_dir: Path = typer.Option(
+        Path(DEFAULT_CACHE_DIR), help="Directory of the local results manifest"
+    ),
+    since: Optional[str] = typer.Option(
+        None, help="Only review files changed since the merge base of this git ref and HEAD"
+    ),
+    staged: bool = typer.Option(
+        False, help="Only review the changes staged in git"
+    ),
+    diff_context: Optional[int] = typer.Option(
+        None, min=0,
+        help="With --since or --staged, submit only the changed lines and this many lines around them"
     ),
 ):
     """Review code for issues and suggestions."""
@@ -55,35 +88,55 @@ def review(
         console.print(f"[bold red]Error:[/] Path '{path}' does not exist")
         raise typer.Exit(code=1)
     
-    # Process files
-    if target_path.is_file():
-        files = [target_path]
+    changes: List[ChangedFile] = []
+    files: Iterable[Path]
+    load_code: Optional[Callable[[Path], str]] = None
+    if since or staged:
+        # Only the files changed in git, filtered like a directory walk
+        try:
+            changed = {change.path: change for change in git_changed_files(target_path, since, staged)}
+        except ValueError as e:
+            console.print(f"[bold red]Git error:[/] {str(e)}")
+            raise typer.Exit(code=1)
+        root = target_path if target_path.is_dir() else target_path.parent
+        changes = [changed[file_path] for file_path in filter_files(changed, root, ignore, max_file_size)]
+        if not changes:
+            console.print("[yellow]No changed files to review[/]")
+            raise typer.Exit(code=0)
+        files = [change.path for change in changes]
+        by_path = {change.path: change for change in changes}
+        if diff_context is not None:
+            load_code = partial(_load_excerpt, by_path, diff_context)
+        elif staged:
+            load_code = partial(_load_changed_file, by_path)
     else:
-        # Directory mode
-        files = []
-        if recursive:
-            for file_path in target_path.rglob("*"):
-                if _should_process_file(file_path, ignore):
-                    files.append(file_path)
-        else:
-            for file_path in target_path.iterdir():
-                if file_path.is_file() and _should_process_file(file_path, ignore):
-                    files.append(file_path)
-    
-    if not files:
-        console.print("[yellow]No files to review[/]")
-        raise typer.Exit(code=0)
-    
-    # Review each file
-    results = []
-    with console.status(f"[bold green]Reviewing {len(files)} files..."):
-        for file_path in files:
-            try:
-                result = _review_file(file_path, api_url, severity)
-                if result:
-                    results.append(result)
-            except Exception as e:
-                console.print(f"[bold red]Error reviewing {file_path}:[/] {str(e)}")
+        # Discover files lazily, so reviews start while the walk goes on
+        walk = iter_files(target_path, recursive, ignore, max_file_size)
+        first = next(walk, None)
+        if first is None:
+            console.print("[yellow]No files to review[/]")
+            raise typer.Exit(code=0)
+        files = chain([first], walk)
+    
+    # The manifest knows working tree files only, and whole-file results only
+    use_manifest = cache and load_code is None
+    manifest = ReviewManifest.load(cache_dir, f"{api_url} {severity.value}") if use_manifest else None
+    
+    # Review each file, keeping results in discovery order
+    reviewed = _review_files(
+        files, api_url, severity, concurrency, timeout, manifest, load_code, fragment=diff_context is not None
+    )
+    if changes:
+        # Drop what the change did not touch
+        reviewed = [
+            only_changed_lines(result, change.ranges) if result else None
+            for change, result in zip(changes, reviewed)
+        ]
+    results = [result for result in reviewed if result]
+    if manifest:
+        manifest.save()
+        if manifest.reused and format != "json":
+            console.print(f"[dim]Reused {manifest.reused} unchanged file result(s) from {cache_dir}[/]")
     
     # Display results
     if format == "json":
@@ -94,42 +147,123 @@ def review(
         _print_text_report(results)
 
 
-def _should_process_file(file_path: Path, ignore: List[str]) -> bool:
-    """Check if file should be processed based on ignore patterns."""
+def _load_excerpt(changes: Dict[Path, ChangedFile], context: int, file_path: Path) -> str:
+    return changes[file_path].excerpt(context)
+
+
+def _load_changed_file(changes: Dict[Path, ChangedFile], file_path: Path) -> str:
+    return changes[file_path].read()
+
+
+def _review_files(
+    files: Iterable[Path],
+    api_url: str,
+    min_severity: SeverityLevel,
+    concurrency: int = 1,
+    timeout: float = 60.0,
+    manifest: Optional[ReviewManifest] = None,
+    load_code: Optional[Callable[[Path], str]] = None,
+    fragment: bool = False
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Review files in parallel over one pooled HTTP client.
+    
+    files may be a generator: each file is submitted as soon as it is
+    produced, and production pauses while a few reviews per worker are
+    already waiting. Results are returned in the order of files, regardless
+    of the order in which the reviews complete.
     
-    # Skip directories
-    if file_path.is_dir():
-        return False
+    With a manifest, files unchanged since their last review are not
+    submitted; their stored results are returned instead, and the results
+    of completed reviews are recorded.
     
-    # Skip binary files and files without extensions
-    if not file_path.suffix or file_path.suffix in [".pyc", ".so", ".dll", ".exe"]:
-        return False
+    load_code, if given, returns the code to submit for a file instead of
+    its content on disk; fragment tells the API that code is an excerpt.
+    """
+    results: List[Optional[Dict[str, Any]]] = []
+    max_pending = concurrency * 4
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
     
-    # Check ignore patterns
-    for pattern in ignore:
-        if pattern in str(file_path):
-            return False
+    progress = Progress(
+        TextColumn("[bold green]Reviewing"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console,
+        transient=True,
+    )
+    with progress, httpx.Client(limits=limits, timeout=timeout) as client, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        task = progress.add_task("review", total=None)
+        pending: Dict[Future, Tuple[int, Path, Optional[os.stat_result]]] = {}
+        
+        def collect(done: Iterable[Future]) -> None:
+            for future in done:
+                index, file_path, before = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    console.print(f"[bold red]Error reviewing {file_path}:[/] {str(e)}")
+                result = results[index]
+                if manifest and result and result.get("status", "completed") == "completed":
+                    manifest.record(file_path, before, result)
+                progress.advance(task)
+        
+        for index, file_path in enumerate(files):
+            progress.update(task, total=index + 1)
+            cached = manifest.lookup(file_path) if manifest else None
+            if cached is not None:
+                results.append(cached)
+                progress.advance(task)
+                continue
+            if len(pending) >= max_pending:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            results.append(None)
+            before = manifest.snapshot(file_path) if manifest else None
+            options: Dict[str, Any] = {}
+            if load_code:
+                options["code_loader"] = load_code
+            if fragment:
+                options["fragment"] = True
+            future = executor.submit(_review_file, file_path, api_url, min_severity, client, **options)
+            pending[future] = (index, file_path, before)
+        collect(as_completed(list(pending)))
     
-    return True
+    return results
 
 
-def _review_file(file_path: Path, api_url: str, min_severity: SeverityLevel) -> Optional[Dict[str, Any]]:
+def _review_file(
+    file_path: Path,
+    api_url: str,
+    min_severity: SeverityLevel,
+    client: Optional[httpx.Client] = None,
+    timeout: float = 60.0,
+    code_loader: Optional[Callable[[Path], str]] = None,
+    fragment: bool = False
+) -> Optional[Dict[str, Any]]:
     """Send file for review and return results."""
     
     try:
         # Read file content
-        code = file_path.read_text(encoding="utf-8", errors="replace")
+        if code_loader:
+            code = code_loader(file_path)
+        else:
+            code = file_path.read_text(encoding="utf-8", errors="replace")
         
-        # Call API
-        response = httpx.post(
-            f"{api_url}/review",
-            json={
-                "code": code,
-                "file_path": str(file_path),
-                "settings": {"min_severity": min_severity}
-            },
-            timeout=60.0
-        )
+        # Call API, reusing the pooled client's connections when given one
+        settings: Dict[str, Any] = {"min_severity": min_severity}
+        if fragment:
+            # Only the changed lines: the API skips its whole-file checks
+            settings["fragment"] = True
+        payload = {
+            "code": code,
+            "file_path": str(file_path),
+            "settings": settings
+        }
+        if client:
+            response = client.post(f"{api_url}/review", json=payload)
+        else:
+            response = httpx.post(f"{api_url}/review", json=payload, timeout=timeout)
         
         # Handle error
         if response.status_code != 200:
@@ -138,6 +272,9 @@ def _review_file(file_path: Path, api_url: str, min_severity: SeverityLevel) ->
         
         return response.json()
     
+    except httpx.TimeoutException:
+        console.print(f"[bold red]Timed out reviewing {file_path}[/]")
+        return None
     except Exception as e:
         console.print(f"[bold red]Error:[/] {str(e)}")
         return None
@@ -0,0 +1,142 @@
+"""
+Local manifest of the results of previous CLI runs.
+
+The manifest maps each reviewed file to its mtime, size, content hash,
+review id and the API's response, and lives in .ai-review-cache/ in the
+working directory. A later run reuses the stored response for a file
+that has not changed, so repeated local and CI runs only submit what
+changed.
+
+A file is unchanged if its mtime and size match. A file whose size
+matches but whose mtime does not (a fresh checkout, a touch) is hashed,
+and it is still unchanged if the hash matches. Entries are kept per
+settings fingerprint, so a run with a different API or minimum severity
+does not reuse them.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = ".ai-review-cache"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+class ReviewManifest:
+    """Previous review results keyed by file, reused while the file is unchanged."""
+
+    def __init__(self, cache_dir: Path, settings: str):
+        self.cache_dir = Path(cache_dir)
+        self.settings = settings
+        # Paths are stored relative to the directory holding the cache, so a
+        # restored CI cache still matches in a checkout at a different path
+        self.root = os.path.abspath(self.cache_dir.parent)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.reused = 0
+        self._dirty = False
+
+    @classmethod
+    def load(cls, cache_dir: Path, settings: str) -> "ReviewManifest":
+        """Read the manifest from cache_dir; a missing or unreadable one is empty."""
+        manifest = cls(cache_dir, settings)
+        try:
+            with open(manifest.cache_dir / MANIFEST_FILE, encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") == MANIFEST_VERSION:
+                manifest.entries = data["entries"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return manifest
+
+    def lookup(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """The stored result for file_path if the file is unchanged since it was reviewed."""
+        entry = self.entries.get(self._key(file_path))
+        if not entry or entry.get("settings") != self.settings:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if stat.st_size != entry["size"]:
+            return None
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            if _hash_file(file_path) != entry["sha256"]:
+                return None
+            # Same content; remember the new mtime so the next run needs no hash
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._dirty = True
+        self.reused += 1
+        return entry["result"]
+
+    def snapshot(self, file_path: Path) -> Optional[os.stat_result]:
+        """Stat file_path before it is submitted, for record()."""
+        try:
+            return os.stat(file_path)
+        except OSError:
+            return None
+
+    def record(self, file_path: Path, before: Optional[os.stat_result], result: Dict[str, Any]) -> None:
+        """
+        Store the result of reviewing file_path.
+
+        before is the file's snapshot() from before it was submitted. Nothing
+        is stored if the file changed since then, because the result may
+        describe the old content.
+        """
+        if before is None:
+            return
+        try:
+            digest = _hash_file(file_path)
+            after = os.stat(file_path)
+        except OSError:
+            return
+        if (after.st_mtime_ns, after.st_size) != (before.st_mtime_ns, before.st_size):
+            return
+        self.entries[self._key(file_path)] = {
+            "settings": self.settings,
+            "mtime_ns": after.st_mtime_ns,
+            "size": after.st_size,
+            "sha256": digest,
+            "review_id": result.get("review_id"),
+            "result": result,
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the manifest if it changed, dropping entries for files that no longer exist."""
+        stale = [key for key in self.entries if not os.path.exists(os.path.join(self.root, key))]
+        for key in stale:
+            del self.entries[key]
+        if not (self._dirty or stale):
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        gitignore = self.cache_dir / ".gitignore"
+        if not gitignore.exists():
+            gitignore.write_text("# Created by ai-review\n*\n")
+        # Write then rename, so an interrupted run never leaves half a manifest
+        path = self.cache_dir / MANIFEST_FILE
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(
+            {"version": MANIFEST_VERSION, "entries": self.entries}, default=str
+        ))
+        os.replace(temporary, path)
+        self._dirty = False
+
+    def _key(self, file_path: Path) -> str:
+        path = os.path.abspath(file_path)
+        try:
+            return Path(os.path.relpath(path, self.root)).as_posix()
+        except ValueError:
+            # On another drive than the cache
+            return Path(path).as_posix()
+
+
+def _hash_file(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -1,18 +1,169 @@
 import os
-from typing import Generator
+import time
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, Generator
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 
-from ai_review.db.models import Base
+from ai_review.core.config import settings as app_settings
+from ai_review.db.pool import MeteredAsyncQueuePool, MeteredQueuePool, pool_status
+from ai_review.utils.metrics import Histogram
 
-# استفاده مستقیم از SQLite بجای PostgreSQL
-DATABASE_URL = "sqlite:///./ai_review.db"
+DATABASE_URL = app_settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
+# Statements are far faster than requests, so the buckets start lower
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Time spent executing SQL statements.", ["statement"],
+    buckets=DB_BUCKETS
+)
+DB_COMMIT_SECONDS = Histogram(
+    "db_commit_duration_seconds", "Time spent in session commits, including the final flush.",
+    buckets=DB_BUCKETS
+)
+STATEMENT_KINDS = ("select", "insert", "update", "delete")
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+def is_sqlite(url: str) -> bool:
+    """Return True for SQLite URLs, sync or async."""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return is_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+
+def engine_options(url: str, is_async: bool = False, writer: bool = False) -> Dict[str, Any]:
+    """
+    Build create_engine keyword arguments for a database URL from settings.
+
+    Pools are sized explicitly, pre-pinged and recycled. A SQLite writer gets
+    a single connection: SQLite allows one writer at a time, so writes queue
+    for the pool (where the wait is measured) rather than failing with
+    "database is locked" after busy_timeout.
+    """
+    if _is_memory_sqlite(url):
+        # Every connection to :memory: is a separate database; share one
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+
+    options: Dict[str, Any] = {
+        "poolclass": MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        "pool_size": app_settings.DB_POOL_SIZE,
+        "max_overflow": app_settings.DB_MAX_OVERFLOW,
+        "pool_timeout": app_settings.DB_POOL_TIMEOUT,
+        "pool_recycle": app_settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": app_settings.DB_POOL_PRE_PING,
+    }
+    if is_sqlite(url):
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": app_settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+        if writer:
+            options.update(pool_size=1, max_overflow=0)
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a write is in progress
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={app_settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(app_settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started"].pop()
+    kind = statement.lstrip()[:6].lower()
+    DB_QUERY_SECONDS.observe(time.perf_counter() - started, kind if kind in STATEMENT_KINDS else "other")
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def _instrument(db_engine: Engine) -> None:
+    """Time every statement run on db_engine."""
+    event.listen(db_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(db_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(db_engine, "handle_error", _handle_error)
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session: Session) -> None:
+    session.info["commit_started"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
+
+def create_db_engine(url: str, writer: bool = False) -> Engine:
+    """Create a sync engine configured from settings."""
+    db_engine = create_engine(url, **engine_options(url, writer=writer))
+    if is_sqlite(url) and not _is_memory_sqlite(url):
+        event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+    _instrument(db_engine)
+    return db_engine
+
+
+def create_async_db_engine(url: str, writer: bool = False) -> AsyncEngine:
+    """Create an async engine configured from settings."""
+    async_url = to_async_url(url)
+    db_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True, writer=writer))
+    if is_sqlite(async_url) and not _is_memory_sqlite(async_url):
+        event.listen(db_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    _instrument(db_engine.sync_engine)
+    return db_engine
+
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Sessions that write. On SQLite these share one dedicated connection per
+# engine; elsewhere they are the regular pools.
+if is_sqlite(DATABASE_URL) and not _is_memory_sqlite(DATABASE_URL):
+    write_engine = create_db_engine(DATABASE_URL, writer=True)
+    async_write_engine = create_async_db_engine(DATABASE_URL, writer=True)
+else:
+    write_engine = engine
+    async_write_engine = async_engine
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+AsyncWriteSessionLocal = async_sessionmaker(
+    bind=async_write_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def get_db() -> Generator[Session, None, None]:
     """Get database session."""
@@ -23,6 +174,48 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_write_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session for requests that write."""
+    async with AsyncWriteSessionLocal() as db:
+        yield db
+
+
+def get_pool_status() -> Dict[str, Dict[str, Any]]:
+    """Report size, saturation and checkout wait times for every pool."""
+    engines = {"sync": engine, "async": async_engine.sync_engine}
+    if write_engine is not engine:
+        engines["sync_writer"] = write_engine
+        engines["async_writer"] = async_write_engine.sync_engine
+    return {name: pool_status(db_engine.pool) for name, db_engine in engines.items()}
+
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# Schema created by Base.metadata.create_all before migrations were introduced
+BASELINE_REVISION = "0001"
+
+
+def get_alembic_config() -> Config:
+    """Build an Alembic config pointing at the packaged migrations."""
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.attributes["configure_logger"] = False
+    return config
+
+
 def init_db() -> None:
-    """Initialize database tables."""
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    """Create or upgrade database tables to the latest migration."""
+    config = get_alembic_config()
+    with write_engine.begin() as connection:
+        config.attributes["connection"] = connection
+        inspector = inspect(connection)
+        if inspector.has_table("reviews") and not inspector.has_table("alembic_version"):
+            # Database predates migrations; record it as the baseline schema
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head") 
\ No newline at end of file
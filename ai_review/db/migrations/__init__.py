@@ -0,0 +1 @@
+"""Alembic migrations for the AI Code Review database."""
@@ -0,0 +1,68 @@
+"""Initial schema: users, reviews and suggestions
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REVIEW_CATEGORIES = ("LINT", "SECURITY", "PERFORMANCE", "STYLE", "REFACTOR", "DOCUMENTATION", "TEST")
+SEVERITY_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+    )
+    op.create_table(
+        "reviews",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("language", sa.String(), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("execution_time", sa.Float(), nullable=False),
+        sa.Column("settings", sa.JSON(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "suggestions",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("line_start", sa.Integer(), nullable=False),
+        sa.Column("line_end", sa.Integer(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("category", sa.Enum(*REVIEW_CATEGORIES, name="reviewcategory"), nullable=False),
+        sa.Column("severity", sa.Enum(*SEVERITY_LEVELS, name="severitylevel"), nullable=False),
+        sa.Column("suggested_fix", sa.Text(), nullable=True),
+        sa.Column("review_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["review_id"], ["reviews.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("suggestions")
+    op.drop_table("reviews")
+    op.drop_table("users")
+    sa.Enum(name="severitylevel").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="reviewcategory").drop(op.get_bind(), checkfirst=True)
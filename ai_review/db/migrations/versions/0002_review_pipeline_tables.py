@@ -0,0 +1,76 @@
+"""Analysis cache, review jobs and review batch/incremental columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analysis_cache",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("key"),
+    )
+
+    with op.batch_alter_table("reviews") as batch_op:
+        batch_op.add_column(sa.Column("batch_id", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("base_review_id", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("suggestion_count", sa.Integer(), server_default="0", nullable=False))
+        batch_op.create_index("ix_reviews_batch_id", ["batch_id"])
+        batch_op.create_foreign_key("fk_reviews_base_review_id", "reviews", ["base_review_id"], ["id"])
+
+    # Backfill the denormalized counter for existing reviews
+    op.execute(
+        "UPDATE reviews SET suggestion_count = "
+        "(SELECT COUNT(*) FROM suggestions WHERE suggestions.review_id = reviews.id)"
+    )
+
+    op.create_table(
+        "review_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("review_id", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("worker_id", sa.String(), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["review_id"], ["reviews.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("review_id"),
+    )
+    op.create_index("ix_review_jobs_status", "review_jobs", ["status"])
+    op.create_index("ix_review_jobs_created_at", "review_jobs", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_review_jobs_created_at", table_name="review_jobs")
+    op.drop_index("ix_review_jobs_status", table_name="review_jobs")
+    op.drop_table("review_jobs")
+
+    with op.batch_alter_table("reviews") as batch_op:
+        batch_op.drop_constraint("fk_reviews_base_review_id", type_="foreignkey")
+        batch_op.drop_index("ix_reviews_batch_id")
+        batch_op.drop_column("suggestion_count")
+        batch_op.drop_column("base_review_id")
+        batch_op.drop_column("batch_id")
+
+    op.drop_table("analysis_cache")
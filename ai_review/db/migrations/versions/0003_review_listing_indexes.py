@@ -0,0 +1,26 @@
+"""Indexes for keyset review listing and suggestion lookup
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_reviews_created_at_id", "reviews", ["created_at", "id"])
+    op.create_index("ix_suggestions_review_id", "suggestions", ["review_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_suggestions_review_id", table_name="suggestions")
+    op.drop_index("ix_reviews_created_at_id", table_name="reviews")
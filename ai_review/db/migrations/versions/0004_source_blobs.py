@@ -0,0 +1,43 @@
+"""Content-addressed source blob store referenced from reviews
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "source_blobs",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("compressed_size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+
+    with op.batch_alter_table("reviews") as batch_op:
+        batch_op.add_column(sa.Column("source_sha256", sa.String(length=64), nullable=True))
+        batch_op.create_index("ix_reviews_source_sha256", ["source_sha256"])
+        batch_op.create_foreign_key("fk_reviews_source_sha256", "source_blobs", ["source_sha256"], ["sha256"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("reviews") as batch_op:
+        batch_op.drop_constraint("fk_reviews_source_sha256", type_="foreignkey")
+        batch_op.drop_index("ix_reviews_source_sha256")
+        batch_op.drop_column("source_sha256")
+
+    op.drop_table("source_blobs")
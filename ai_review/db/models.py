@@ -1,54 +1,115 @@
 from datetime import datetime
 import uuid
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, JSON, Float, Enum
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, JSON, Float, Enum, Index, LargeBinary
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from ai_review.models.review import SeverityLevel, ReviewCategory
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    pass
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    email = Column(String, unique=True, nullable=False)
-    name = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    reviews = relationship("Review", back_populates="user")
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    email: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    reviews: Mapped[List["Review"]] = relationship("Review", back_populates="user")
 
 
 class Review(Base):
     __tablename__ = "reviews"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    file_path = Column(String, nullable=False)
-    language = Column(String, nullable=True)
-    summary = Column(Text, nullable=False)
-    execution_time = Column(Float, nullable=False)
-    settings = Column(JSON, nullable=True)
-    status = Column(String, nullable=False, default="completed")
-    created_at = Column(DateTime, default=datetime.utcnow)
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    file_path: Mapped[str] = mapped_column(String, nullable=False)
+    language: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    execution_time: Mapped[float] = mapped_column(Float, nullable=False)
+    settings: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="completed")
+    # Always set on insert; the column predates NOT NULL constraints on it
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=True, default=datetime.utcnow)
+    batch_id: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    base_review_id: Mapped[Optional[str]] = mapped_column(String, ForeignKey("reviews.id"), nullable=True)
+    suggestion_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    source_sha256: Mapped[Optional[str]] = mapped_column(
+        String(64), ForeignKey("source_blobs.sha256"), nullable=True, index=True
+    )
+    # Seconds spent in each stage of the review; see ai_review.services.timings
+    timings: Mapped[Optional[Dict[str, float]]] = mapped_column(JSON, nullable=True)
     
-    user_id = Column(String, ForeignKey("users.id"), nullable=True)
-    user = relationship("User", back_populates="reviews")
-    suggestions = relationship("Suggestion", back_populates="review", cascade="all, delete-orphan")
+    user_id: Mapped[Optional[str]] = mapped_column(String, ForeignKey("users.id"), nullable=True)
+    user: Mapped[Optional["User"]] = relationship("User", back_populates="reviews")
+    suggestions: Mapped[List["Suggestion"]] = relationship(
+        "Suggestion", back_populates="review", cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at DESC, id DESC)
+        Index("ix_reviews_created_at_id", "created_at", "id"),
+    )
 
 
 class Suggestion(Base):
     __tablename__ = "suggestions"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    line_start = Column(Integer, nullable=False)
-    line_end = Column(Integer, nullable=False)
-    file_path = Column(String, nullable=False)
-    message = Column(Text, nullable=False)
-    category = Column(Enum(ReviewCategory), nullable=False)
-    severity = Column(Enum(SeverityLevel), nullable=False)
-    suggested_fix = Column(Text, nullable=True)
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    line_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    line_end: Mapped[int] = mapped_column(Integer, nullable=False)
+    file_path: Mapped[str] = mapped_column(String, nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    category: Mapped[ReviewCategory] = mapped_column(Enum(ReviewCategory), nullable=False)
+    severity: Mapped[SeverityLevel] = mapped_column(Enum(SeverityLevel), nullable=False)
+    suggested_fix: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
-    review_id = Column(String, ForeignKey("reviews.id"), nullable=False)
-    review = relationship("Review", back_populates="suggestions") 
\ No newline at end of file
+    review_id: Mapped[str] = mapped_column(String, ForeignKey("reviews.id"), nullable=False, index=True)
+    review: Mapped["Review"] = relationship("Review", back_populates="suggestions") 
+
+class SourceBlob(Base):
+    __tablename__ = "source_blobs"
+
+    # Content-addressed: identical source submitted many times is stored once
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    compressed_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    result: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class AnalysisLease(Base):
+    __tablename__ = "analysis_leases"
+
+    # Held by the process analyzing a cache key so other processes wait for its result
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    owner: Mapped[str] = mapped_column(String, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ReviewJob(Base):
+    __tablename__ = "review_jobs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    review_id: Mapped[str] = mapped_column(String, ForeignKey("reviews.id"), nullable=False, unique=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending", index=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    worker_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
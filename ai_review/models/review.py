@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class SeverityLevel(str, Enum):
@@ -39,6 +39,32 @@ class ReviewRequest(BaseModel):
     file_path: str
     language: Optional[str] = None
     settings: Optional[Dict[str, Any]] = Field(default_factory=dict)
+    use_cache: bool = True
+    refresh_cache: bool = False
+
+
+class ReviewJobResponse(BaseModel):
+    """Response for a review accepted for background processing."""
+    review_id: str
+    status: str
+
+
+class IncrementalReviewRequest(BaseModel):
+    """Request payload for re-reviewing only what changed since a base review."""
+    base_review_id: str
+    diff: Optional[str] = None
+    code: Optional[str] = None
+    file_path: Optional[str] = None
+    settings: Optional[Dict[str, Any]] = None
+    context_lines: int = Field(default=3, ge=0)
+    use_cache: bool = True
+
+    @model_validator(mode="after")
+    def check_diff_or_code(self) -> "IncrementalReviewRequest":
+        """Exactly one of diff or code must be provided."""
+        if (self.diff is None) == (self.code is None):
+            raise ValueError("Provide exactly one of 'diff' or 'code'")
+        return self
 
 
 class ReviewResponse(BaseModel):
@@ -48,6 +74,42 @@ class ReviewResponse(BaseModel):
     summary: str
     execution_time: float
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    base_review_id: Optional[str] = None
+    status: str = "completed"
+    # Prompt tokens removed by compaction; only set on the request that ran the analysis
+    prompt_tokens_saved: Optional[int] = None
+    # Seconds per stage (see ai_review.services.timings); only returned with include_timings=true
+    timings: Optional[Dict[str, float]] = None
+
+
+class StageTimingStats(BaseModel):
+    """Distribution of the seconds spent in one stage across reviews."""
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class TimingSummaryResponse(BaseModel):
+    """Per-stage timings aggregated over recent reviews."""
+    reviews: int
+    since: Optional[datetime] = None
+    language: Optional[str] = None
+    stages: Dict[str, StageTimingStats]
+
+
+class BatchReviewRequest(BaseModel):
+    """Request payload for reviewing many files at once."""
+    reviews: List[ReviewRequest] = Field(..., min_length=1)
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
+
+
+class BatchReviewResponse(BaseModel):
+    """Response with per-file results for a batch review."""
+    batch_id: str
+    results: List[ReviewResponse]
 
 
 class ReviewSession(BaseModel):
@@ -0,0 +1,210 @@
+import asyncio
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from ai_review.core.config import settings as app_settings
+from ai_review.models.review import ReviewCategory, ReviewSuggestion, SeverityLevel
+from ai_review.services.chunking import SEVERITY_ORDER
+from ai_review.services.prompts import DEFAULT_FOCUS_AREAS
+from ai_review.utils.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# Focus areas no local check covers; a file is only kept from the LLM when
+# none of them was requested
+LLM_ONLY_AREAS = frozenset({ReviewCategory.SECURITY, ReviewCategory.PERFORMANCE})
+
+@dataclass
+class LocalFindings:
+    """What one analyzer found in a file."""
+    suggestions: List[ReviewSuggestion] = field(default_factory=list)
+    # The file has nothing worth an LLM review, e.g. only imports and constants
+    trivial: bool = False
+    # The file could not be parsed; the LLM should still see it
+    failed: bool = False
+
+
+class LocalAnalyzer(ABC):
+    """
+    Base class for analyzers that run locally, before the LLM.
+
+    Subclasses set the languages they handle and the checks they run, as a
+    description of each check mapped to the category of its findings. The
+    LLM is told not to repeat those checks but keeps its focus areas, since
+    a few checks never cover a whole category. Analyzers run in worker
+    processes, so they must be registered at import time of a module the
+    workers import.
+    """
+    name: str = ""
+    languages: FrozenSet[str] = frozenset()
+    checks: Mapping[str, ReviewCategory] = {}
+
+    @abstractmethod
+    def analyze(self, code: str, file_path: str) -> LocalFindings:
+        """Run the checks on one file."""
+
+
+_analyzers: List[LocalAnalyzer] = []
+
+
+def register_analyzer(analyzer: LocalAnalyzer) -> LocalAnalyzer:
+    """Add an analyzer to the local stage."""
+    _analyzers.append(analyzer)
+    return analyzer
+
+
+def analyzers_for(language: str) -> List[LocalAnalyzer]:
+    """Return the registered analyzers that handle language."""
+    return [analyzer for analyzer in _analyzers if language in analyzer.languages]
+
+
+@dataclass
+class LocalAnalysis:
+    """Combined result of the local stage for one file."""
+    suggestions: List[ReviewSuggestion] = field(default_factory=list)
+    covered_checks: Tuple[str, ...] = ()
+    skip_llm: bool = False
+    reason: Optional[str] = None
+
+    def llm_settings(self, settings: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Tell the LLM which checks already ran locally."""
+        settings = dict(settings or {})
+        if self.covered_checks:
+            settings["local_checks"] = list(self.covered_checks)
+        return settings
+
+
+def analyze_locally(
+    code: str,
+    file_path: str,
+    language: str,
+    settings: Optional[Dict[str, Any]] = None
+) -> LocalAnalysis:
+    """
+    Run the local analyzers for language on code, in the current process.
+
+    Suggestions are limited to the requested focus areas and minimum
+    severity. The LLM can be skipped when the file is tiny or an analyzer
+    finds it trivial, but only if no focus area in LLM_ONLY_AREAS was
+    requested.
+    """
+    analyzers = analyzers_for(language)
+    if not analyzers:
+        return LocalAnalysis()
+
+    settings = settings or {}
+    focus_areas = set(settings.get("focus_areas", DEFAULT_FOCUS_AREAS))
+    min_severity = SEVERITY_ORDER.index(SeverityLevel(settings.get("min_severity", "low")))
+
+    suggestions: List[ReviewSuggestion] = []
+    covered: List[str] = []
+    trivial = True
+    failed = False
+    for analyzer in analyzers:
+        try:
+            findings = analyzer.analyze(code, file_path)
+        except Exception as e:
+            logger.warning(f"Local analyzer {analyzer.name} failed on {file_path}: {e}")
+            trivial = False
+            continue
+        covered.extend(check for check, category in analyzer.checks.items() if category in focus_areas)
+        trivial = trivial and findings.trivial
+        failed = failed or findings.failed
+        suggestions.extend(
+            sugg for sugg in findings.suggestions
+            if sugg.category in focus_areas and SEVERITY_ORDER.index(sugg.severity) >= min_severity
+        )
+
+    analysis = LocalAnalysis(suggestions=suggestions, covered_checks=tuple(covered))
+    significant_lines = sum(1 for line in code.splitlines() if line.strip() and not line.strip().startswith("#"))
+    if failed or focus_areas & LLM_ONLY_AREAS:
+        return analysis
+    if significant_lines < app_settings.LOCAL_ANALYSIS_TINY_FILE_LINES:
+        analysis.skip_llm, analysis.reason = True, "tiny file"
+    elif trivial:
+        analysis.skip_llm, analysis.reason = True, "no reviewable logic"
+    return analysis
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if app_settings.LOCAL_ANALYSIS_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API process runs threads that a forked child could deadlock on
+            _pool = ProcessPoolExecutor(
+                max_workers=app_settings.LOCAL_ANALYSIS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def run_local_analysis(
+    code: str,
+    file_path: str,
+    language: str,
+    settings: Optional[Dict[str, Any]] = None
+) -> LocalAnalysis:
+    """
+    Run the local stage in the analyzer process pool.
+
+    Parsing is CPU-bound, so it is kept off the threads serving requests.
+    Any failure or a timeout yields an empty analysis and the review falls
+    back to the LLM alone.
+    """
+    if not analyzers_for(language):
+        return LocalAnalysis()
+    pool = _get_pool()
+    try:
+        if pool is None:
+            return analyze_locally(code, file_path, language, settings)
+        future = pool.submit(analyze_locally, code, file_path, language, settings)
+        return future.result(timeout=app_settings.LOCAL_ANALYSIS_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Local analysis of {file_path} failed: {e}")
+        return LocalAnalysis()
+
+
+async def run_local_analysis_async(
+    code: str,
+    file_path: str,
+    language: str,
+    settings: Optional[Dict[str, Any]] = None
+) -> LocalAnalysis:
+    """Async variant of run_local_analysis."""
+    if not analyzers_for(language):
+        return LocalAnalysis()
+    pool = _get_pool()
+    try:
+        if pool is None:
+            return analyze_locally(code, file_path, language, settings)
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(pool, analyze_locally, code, file_path, language, settings),
+            timeout=app_settings.LOCAL_ANALYSIS_TIMEOUT
+        )
+    except Exception as e:
+        logger.warning(f"Local analysis of {file_path} failed: {e}")
+        return LocalAnalysis()
+
+
+def shutdown_pool() -> None:
+    """Stop the analyzer worker processes."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# Built-in analyzers register themselves on import
+from ai_review.services.analyzers import python  # noqa: E402,F401
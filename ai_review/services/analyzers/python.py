@@ -0,0 +1,216 @@
+import ast
+import sys
+from typing import FrozenSet, List, Optional, Set, Union
+
+from ai_review.models.review import ReviewCategory, ReviewSuggestion, SeverityLevel
+from ai_review.services.analyzers import LocalAnalyzer, LocalFindings, register_analyzer
+
+# Python 3.10+ ships the list; older interpreters skip the import order check
+STDLIB_MODULES: FrozenSet[str] = getattr(sys, "stdlib_module_names", frozenset())
+
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
+# Statements that carry no logic worth sending to the LLM
+TRIVIAL_STATEMENTS = (ast.Import, ast.ImportFrom, ast.Assign, ast.AnnAssign, ast.Expr, ast.Pass)
+
+
+class PythonAnalyzer(LocalAnalyzer):
+    """
+    ast-based checks for Python source.
+
+    Covers unused and wildcard imports, bare excepts, mutable default
+    arguments, import grouping, missing type hints and missing docstrings on
+    public top-level definitions.
+    """
+    name = "python-ast"
+    languages = frozenset({"python"})
+    checks = {
+        "unused imports": ReviewCategory.LINT,
+        "wildcard imports": ReviewCategory.LINT,
+        "bare except clauses": ReviewCategory.LINT,
+        "mutable default arguments": ReviewCategory.LINT,
+        "import grouping": ReviewCategory.STYLE,
+        "missing type hints on public functions": ReviewCategory.STYLE,
+        "missing docstrings on public functions and classes": ReviewCategory.DOCUMENTATION,
+    }
+
+    def analyze(self, code: str, file_path: str) -> LocalFindings:
+        try:
+            tree = ast.parse(code, filename=file_path)
+        except SyntaxError as e:
+            line = e.lineno or 1
+            return LocalFindings(
+                suggestions=[_suggestion(
+                    file_path, line, line, f"Syntax error: {e.msg}",
+                    ReviewCategory.LINT, SeverityLevel.HIGH
+                )],
+                failed=True
+            )
+
+        suggestions: List[ReviewSuggestion] = []
+        suggestions.extend(self._check_imports(tree, file_path))
+        suggestions.extend(self._check_import_order(tree, file_path))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ExceptHandler) and node.type is None:
+                suggestions.append(_suggestion(
+                    file_path, node.lineno, node.lineno,
+                    "Bare except also catches SystemExit and KeyboardInterrupt",
+                    ReviewCategory.LINT, SeverityLevel.MEDIUM,
+                    "except Exception:"
+                ))
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                suggestions.extend(self._check_defaults(node, file_path))
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_"):
+                suggestions.extend(self._check_annotations(node, file_path))
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) \
+                    and not node.name.startswith("_") and ast.get_docstring(node) is None:
+                kind = "Class" if isinstance(node, ast.ClassDef) else "Function"
+                suggestions.append(_suggestion(
+                    file_path, node.lineno, node.lineno,
+                    f"{kind} '{node.name}' has no docstring",
+                    ReviewCategory.DOCUMENTATION, SeverityLevel.LOW
+                ))
+
+        suggestions.sort(key=lambda sugg: (sugg.line_start, sugg.line_end))
+        return LocalFindings(suggestions=suggestions, trivial=_is_trivial(tree))
+
+    def _check_imports(self, tree: ast.Module, file_path: str) -> List[ReviewSuggestion]:
+        suggestions = []
+        exported = _dunder_all(tree)
+        # An attribute chain like os.path.join is rooted at the Name "os"
+        used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+        # Package __init__ modules import names to re-export them
+        check_unused = not file_path.endswith("__init__.py")
+
+        for node in tree.body:
+            if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+                continue
+            if not isinstance(node, (ast.Import, ast.ImportFrom)):
+                continue
+            for alias in node.names:
+                if alias.name == "*" and isinstance(node, ast.ImportFrom):
+                    suggestions.append(_suggestion(
+                        file_path, node.lineno, node.lineno,
+                        f"Wildcard import from '{node.module}' hides where names come from",
+                        ReviewCategory.LINT, SeverityLevel.MEDIUM
+                    ))
+                    continue
+                bound = alias.asname or alias.name.split(".")[0]
+                if check_unused and bound not in used and bound not in exported:
+                    suggestions.append(_suggestion(
+                        file_path, node.lineno, getattr(node, "end_lineno", None) or node.lineno,
+                        f"'{alias.name}' is imported but never used",
+                        ReviewCategory.LINT, SeverityLevel.LOW
+                    ))
+        return suggestions
+
+    def _check_import_order(self, tree: ast.Module, file_path: str) -> List[ReviewSuggestion]:
+        if not STDLIB_MODULES:
+            return []
+        last_group = 0
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                module = node.names[0].name
+            elif isinstance(node, ast.ImportFrom):
+                if node.module == "__future__":
+                    continue
+                module = "." if node.level else node.module or ""
+            else:
+                continue
+            group = _import_group(module)
+            if group < last_group:
+                return [_suggestion(
+                    file_path, node.lineno, node.lineno,
+                    "Imports are not grouped as standard library, third party, then local",
+                    ReviewCategory.STYLE, SeverityLevel.LOW
+                )]
+            last_group = group
+        return []
+
+    def _check_defaults(self, node: FunctionNode, file_path: str) -> List[ReviewSuggestion]:
+        suggestions = []
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            mutable = isinstance(default, (ast.List, ast.Dict, ast.Set)) or (
+                isinstance(default, ast.Call) and isinstance(default.func, ast.Name)
+                and default.func.id in ("list", "dict", "set")
+            )
+            if mutable:
+                suggestions.append(_suggestion(
+                    file_path, default.lineno, default.lineno,
+                    f"Mutable default argument in '{node.name}' is shared between calls",
+                    ReviewCategory.LINT, SeverityLevel.MEDIUM,
+                    "Default to None and create the value inside the function"
+                ))
+        return suggestions
+
+    def _check_annotations(self, node: FunctionNode, file_path: str) -> List[ReviewSuggestion]:
+        args = node.args.posonlyargs + node.args.args + node.args.kwonlyargs
+        missing = [arg.arg for arg in args if arg.annotation is None and arg.arg not in ("self", "cls")]
+        if not missing and node.returns is not None:
+            return []
+        parts = []
+        if missing:
+            parts.append(f"parameters {', '.join(missing)}")
+        if node.returns is None:
+            parts.append("return value")
+        return [_suggestion(
+            file_path, node.lineno, node.lineno,
+            f"Public function '{node.name}' is missing type hints for {' and '.join(parts)}",
+            ReviewCategory.STYLE, SeverityLevel.LOW
+        )]
+
+
+def _suggestion(
+    file_path: str,
+    line_start: int,
+    line_end: int,
+    message: str,
+    category: ReviewCategory,
+    severity: SeverityLevel,
+    suggested_fix: Optional[str] = None
+) -> ReviewSuggestion:
+    return ReviewSuggestion(
+        line_start=line_start,
+        line_end=line_end,
+        file_path=file_path,
+        message=message,
+        category=category,
+        severity=severity,
+        suggested_fix=suggested_fix
+    )
+
+
+def _dunder_all(tree: ast.Module) -> Set[str]:
+    """Return the names listed in a literal __all__, if the module has one."""
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "__all__" for target in node.targets
+        ) and isinstance(node.value, (ast.List, ast.Tuple)):
+            return {elt.value for elt in node.value.elts if isinstance(elt, ast.Constant)}
+    return set()
+
+
+def _import_group(module: str) -> int:
+    """0 for the standard library, 1 for third party, 2 for relative imports."""
+    if module.startswith("."):
+        return 2
+    return 0 if module.split(".")[0] in STDLIB_MODULES else 1
+
+
+def _is_trivial(tree: ast.Module) -> bool:
+    """True if the module only imports, assigns constants and holds docstrings."""
+    for node in tree.body:
+        if not isinstance(node, TRIVIAL_STATEMENTS):
+            return False
+        value = getattr(node, "value", None)
+        if isinstance(node, ast.Expr) and not isinstance(value, ast.Constant):
+            return False
+        if value is not None and any(
+            isinstance(child, (ast.Call, ast.Lambda, ast.comprehension)) for child in ast.walk(value)
+        ):
+            return False
+    return True
+
+
+register_analyzer(PythonAnalyzer())
@@ -0,0 +1,80 @@
+import hashlib
+import zlib
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ai_review.db.models import SourceBlob
+
+COMPRESSION_LEVEL = 6
+
+
+def hash_source(code: str) -> str:
+    """Return the SHA-256 content address of a source file."""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def build_blob_row(code: str) -> Dict[str, Any]:
+    """Compress a source file into a SourceBlob row."""
+    raw = code.encode("utf-8")
+    data = zlib.compress(raw, COMPRESSION_LEVEL)
+    return {
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "data": data,
+        "size": len(raw),
+        "compressed_size": len(data),
+    }
+
+
+def decompress_source(data: bytes) -> str:
+    """Decode a stored blob back into source text."""
+    return zlib.decompress(data).decode("utf-8")
+
+
+def store_sources(db: Session, codes: Iterable[str]) -> List[str]:
+    """
+    Store source files and return their content addresses, in order.
+
+    Only content not already stored is compressed and inserted, so
+    resubmitting a known file costs one indexed lookup.
+    """
+    codes = list(codes)
+    hashes = [hash_source(code) for code in codes]
+    existing = set(db.scalars(select(SourceBlob.sha256).where(SourceBlob.sha256.in_(set(hashes)))))
+    rows = _missing_rows(codes, hashes, existing)
+    if rows:
+        db.execute(_insert_ignoring_duplicates(db), rows)
+    return hashes
+
+
+async def store_sources_async(db: AsyncSession, codes: Iterable[str]) -> List[str]:
+    """Async variant of store_sources."""
+    codes = list(codes)
+    hashes = [hash_source(code) for code in codes]
+    existing = set(await db.scalars(select(SourceBlob.sha256).where(SourceBlob.sha256.in_(set(hashes)))))
+    rows = _missing_rows(codes, hashes, existing)
+    if rows:
+        await db.execute(_insert_ignoring_duplicates(db), rows)
+    return hashes
+
+
+def _missing_rows(codes: List[str], hashes: List[str], existing: set) -> List[Dict[str, Any]]:
+    rows = {}
+    for code, sha256 in zip(codes, hashes):
+        if sha256 not in existing and sha256 not in rows:
+            rows[sha256] = build_blob_row(code)
+    return list(rows.values())
+
+
+def _insert_ignoring_duplicates(db):
+    # A concurrent request may store the same content between our lookup and insert
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(SourceBlob)
+    return dialect_insert(SourceBlob).on_conflict_do_nothing(index_elements=["sha256"])
@@ -0,0 +1,488 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy.orm import Session
+
+from ai_review.core.config import settings as app_settings
+from ai_review.db.database import SessionLocal
+from ai_review.db.models import AnalysisCacheEntry
+from ai_review.models.review import ReviewSuggestion
+from ai_review.services.prompts import DEFAULT_FOCUS_AREAS
+from ai_review.utils.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_MIN_SEVERITY = "low"
+
+# Passed as set()'s version to store unconditionally
+ANY_VERSION = object()
+
+# Store ARGV[1] under KEYS[1] only while the version under KEYS[2] is ARGV[2]
+SET_IF_VERSION_SCRIPT = """
+if (redis.call('get', KEYS[2]) or '') ~= ARGV[2] then
+    return 0
+end
+if ARGV[3] == '' then
+    redis.call('set', KEYS[1], ARGV[1])
+else
+    redis.call('set', KEYS[1], ARGV[1], 'ex', ARGV[3])
+end
+return 1
+"""
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with size and TTL based eviction."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under key, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key, evicting the least recently used entries."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Remove key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def normalize_settings(settings: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Normalize review settings so that equivalent settings hash identically.
+
+    Defaults are filled in, list values are de-duplicated and sorted and
+    string values are lowercased.
+    """
+    settings = dict(settings or {})
+    settings.setdefault("focus_areas", DEFAULT_FOCUS_AREAS)
+    settings.setdefault("min_severity", DEFAULT_MIN_SEVERITY)
+
+    normalized = {}
+    for key, value in settings.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.lower()
+        elif isinstance(value, (list, tuple, set)):
+            value = sorted({str(item).lower() for item in value})
+        normalized[key] = value
+    return normalized
+
+
+def make_cache_key(
+    code: str,
+    language: Optional[str],
+    settings: Optional[Dict[str, Any]],
+    model: str,
+    prompt_version: str
+) -> str:
+    """Build a content-addressed cache key for an analysis request."""
+    payload = json.dumps(
+        {
+            "code": code,
+            "language": (language or "unknown").lower(),
+            "settings": normalize_settings(settings),
+            "model": model,
+            "prompt_version": prompt_version,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Two-tier cache for analysis results.
+
+    The first tier is an in-process LRU; the second tier is the
+    ``analysis_cache`` table in the application database, so entries
+    survive restarts and are shared between worker processes. Expired rows
+    are purged from the table on writes, at most once per purge_interval
+    seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        enabled: bool = True,
+        purge_interval: float = 3600.0
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+        self.purge_interval = purge_interval
+        # The first write purges, so rows left by earlier runs go too
+        self._next_purge = 0.0
+        self._memory = LRUCache(max_entries=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "memory_hits": 0, "persistent_hits": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached analysis result, memory tier first."""
+        payload = self._memory.get(key)
+        if payload is not None:
+            self._count("hits", "memory_hits")
+            return _deserialize(payload)
+
+        payload = self._get_persistent(key)
+        if payload is not None:
+            self._memory.set(key, payload)
+            self._count("hits", "persistent_hits")
+            return _deserialize(payload)
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Store an analysis result in both tiers."""
+        payload = _serialize(result)
+        self._memory.set(key, payload)
+        self._set_persistent(key, payload)
+        self._maybe_purge()
+
+    def invalidate(self, key: str) -> None:
+        """Drop a single entry from both tiers."""
+        self._memory.delete(key)
+        if not self.session_factory:
+            return
+        try:
+            with self.session_factory() as db:
+                db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.key == key).delete()
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to invalidate persistent cache entry: {e}")
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        self._memory.clear()
+        if not self.session_factory:
+            return
+        try:
+            with self.session_factory() as db:
+                db.query(AnalysisCacheEntry).delete()
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to clear persistent cache: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier and return how many were removed."""
+        if not self.session_factory:
+            return 0
+        with self.session_factory() as db:
+            removed = (
+                db.query(AnalysisCacheEntry)
+                .filter(AnalysisCacheEntry.expires_at <= datetime.utcnow())
+                .delete()
+            )
+            db.commit()
+        return removed
+
+    def _maybe_purge(self) -> None:
+        """Run purge_expired if purge_interval has passed since the last run."""
+        if not self.session_factory:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self.purge_interval
+        try:
+            removed = self.purge_expired()
+        except Exception as e:
+            logger.warning(f"Failed to purge expired cache entries: {e}")
+            return
+        if removed:
+            logger.info(f"Purged {removed} expired analysis cache entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the cache."""
+        with self._lock:
+            counters: Dict[str, Any] = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_ratio"] = counters["hits"] / lookups if lookups else 0.0
+        counters["memory_entries"] = len(self._memory)
+        counters["enabled"] = self.enabled
+        return counters
+
+    def _count(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._counters[name] += 1
+
+    def _get_persistent(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.session_factory:
+            return None
+        try:
+            with self.session_factory() as db:
+                entry = db.get(AnalysisCacheEntry, key)
+                if entry is None:
+                    return None
+                if entry.expires_at is not None and entry.expires_at <= datetime.utcnow():
+                    db.delete(entry)
+                    db.commit()
+                    return None
+                return entry.result
+        except Exception as e:
+            logger.warning(f"Persistent cache lookup failed: {e}")
+            return None
+
+    def _set_persistent(self, key: str, payload: Dict[str, Any]) -> None:
+        if not self.session_factory:
+            return
+        expires_at = None
+        if self.ttl_seconds:
+            expires_at = datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+        try:
+            with self.session_factory() as db:
+                db.merge(AnalysisCacheEntry(key=key, result=payload, expires_at=expires_at))
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Persistent cache write failed: {e}")
+
+
+def _serialize(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "suggestions": [sugg.model_dump(mode="json") for sugg in result["suggestions"]],
+        "summary": result["summary"],
+    }
+
+
+def _deserialize(payload: Dict[str, Any]) -> Dict[str, Any]:
+    suggestions: List[ReviewSuggestion] = [
+        ReviewSuggestion(**sugg) for sugg in payload["suggestions"]
+    ]
+    return {"suggestions": suggestions, "summary": payload["summary"]}
+
+
+analysis_cache = AnalysisCache(
+    max_entries=app_settings.ANALYSIS_CACHE_MAX_ENTRIES,
+    ttl_seconds=app_settings.ANALYSIS_CACHE_TTL_SECONDS,
+    session_factory=SessionLocal if app_settings.ANALYSIS_CACHE_PERSIST else None,
+    enabled=app_settings.ANALYSIS_CACHE_ENABLED,
+)
+
+
+class ReviewCache:
+    """
+    Read-through cache of serialized review responses.
+
+    Entries are the JSON bytes served by GET /reviews/{id}, keyed by review
+    id and response variant. They live in Redis when a client is given, so
+    every API process shares them and sees invalidations, and in a bounded
+    in-process LRU otherwise. Entries also expire after ttl_seconds, which
+    bounds how stale a process-local entry can get after a rerun elsewhere.
+
+    A failing Redis is treated as a miss and skipped for retry_seconds
+    rather than slowing every read down.
+
+    Each invalidation also changes the review's version. A reader takes
+    version() before it reads the database and passes it to set(), which
+    stores nothing if the review was invalidated in between; otherwise a
+    read that started before a rerun's commit could cache the old response.
+    """
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[int] = None,
+        enabled: bool = True,
+        retry_seconds: float = 30.0,
+        prefix: str = "ai_review:review:"
+    ):
+        self.enabled = enabled
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.prefix = prefix
+        self._memory = LRUCache(max_entries=max_entries, ttl=ttl_seconds) if client is None else None
+        # In-process versions, for the memory backend. They expire after a TTL too;
+        # only a read slower than that could cache stale data
+        self._versions = LRUCache(max_entries=max_entries, ttl=ttl_seconds)
+        self._next_version = itertools.count(1)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "errors": 0}
+        self._redis_down_until = 0.0
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self.client is not None else "memory"
+
+    def get(self, review_id: str, variant: str = "") -> Optional[bytes]:
+        """Return the cached payload for a review, or None."""
+        if not self.enabled:
+            return None
+        key = self._key(review_id, variant)
+        if self._memory is not None:
+            payload = self._memory.get(key)
+        else:
+            payload = self._redis(lambda client: client.get(key))
+        self._count("hits" if payload is not None else "misses")
+        return payload
+
+    def version(self, review_id: str) -> Optional[str]:
+        """The review's current version, to pass to set() after reading the review."""
+        if not self.enabled:
+            return None
+        if self._memory is not None:
+            return self._versions.get(review_id)
+        version = self._redis(lambda client: client.get(self._version_key(review_id)))
+        return version.decode() if version is not None else None
+
+    def set(self, review_id: str, payload: bytes, variant: str = "", version: Any = ANY_VERSION) -> None:
+        """Cache the payload for a review, unless it was invalidated since version()."""
+        if not self.enabled:
+            return
+        key = self._key(review_id, variant)
+        if self._memory is not None:
+            with self._lock:
+                if version is ANY_VERSION or self._versions.get(review_id) == version:
+                    self._memory.set(key, payload)
+        elif version is ANY_VERSION:
+            self._redis(lambda client: client.set(key, payload, ex=self.ttl_seconds or None))
+        else:
+            self._redis(lambda client: client.register_script(SET_IF_VERSION_SCRIPT)(
+                keys=[key, self._version_key(review_id)], args=[payload, version or "", self.ttl_seconds or ""]
+            ))
+
+    def invalidate(self, review_id: str, variants: Tuple[str, ...] = ("",)) -> None:
+        """Drop every cached variant of a review and change its version."""
+        keys = [self._key(review_id, variant) for variant in variants]
+        if self._memory is not None:
+            with self._lock:
+                self._versions.set(review_id, str(next(self._next_version)))
+                for key in keys:
+                    self._memory.delete(key)
+        else:
+            # Retried even while Redis is marked down; a missed delete would serve stale data
+            self._redis(lambda client: self._invalidate_redis(client, review_id, keys), force=True)
+
+    async def get_async(self, review_id: str, variant: str = "") -> Optional[bytes]:
+        """Async variant of get; Redis round trips run in the default thread pool."""
+        if self._memory is not None or not self.enabled:
+            return self.get(review_id, variant)
+        return await asyncio.to_thread(self.get, review_id, variant)
+
+    async def version_async(self, review_id: str) -> Optional[str]:
+        """Async variant of version."""
+        if self._memory is not None or not self.enabled:
+            return self.version(review_id)
+        return await asyncio.to_thread(self.version, review_id)
+
+    async def set_async(self, review_id: str, payload: bytes, variant: str = "", version: Any = ANY_VERSION) -> None:
+        """Async variant of set."""
+        if self._memory is not None or not self.enabled:
+            self.set(review_id, payload, variant, version)
+        else:
+            await asyncio.to_thread(self.set, review_id, payload, variant, version)
+
+    async def invalidate_async(self, review_id: str, variants: Tuple[str, ...] = ("",)) -> None:
+        """Async variant of invalidate."""
+        if self._memory is not None:
+            self.invalidate(review_id, variants)
+        else:
+            await asyncio.to_thread(self.invalidate, review_id, variants)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the cache."""
+        with self._lock:
+            counters: Dict[str, Any] = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_ratio"] = counters["hits"] / lookups if lookups else 0.0
+        counters["backend"] = self.backend
+        counters["enabled"] = self.enabled
+        if self._memory is not None:
+            counters["memory_entries"] = len(self._memory)
+        return counters
+
+    def _key(self, review_id: str, variant: str) -> str:
+        return f"{self.prefix}{review_id}:{variant}" if variant else f"{self.prefix}{review_id}"
+
+    def _version_key(self, review_id: str) -> str:
+        return f"{self.prefix}{review_id}#version"
+
+    def _invalidate_redis(self, client: Any, review_id: str, keys: List[str]) -> None:
+        pipeline = client.pipeline()
+        pipeline.incr(self._version_key(review_id))
+        if self.ttl_seconds:
+            pipeline.expire(self._version_key(review_id), self.ttl_seconds)
+        pipeline.delete(*keys)
+        pipeline.execute()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _redis(self, command: Callable[[Any], Any], force: bool = False) -> Any:
+        if self.client is None or (not force and time.monotonic() < self._redis_down_until):
+            return None
+        try:
+            return command(self.client)
+        except redis.RedisError as e:
+            self._count("errors")
+            if time.monotonic() >= self._redis_down_until:
+                logger.warning(f"Review cache Redis unavailable, retrying in {self.retry_seconds:.0f}s: {e}")
+            self._redis_down_until = time.monotonic() + self.retry_seconds
+            return None
+
+
+def create_review_cache(config: Any) -> ReviewCache:
+    """Build the review cache: Redis when REDIS_URL is set, an in-process LRU otherwise."""
+    client = None
+    if config.REDIS_URL:
+        client = redis.Redis.from_url(
+            config.REDIS_URL,
+            socket_timeout=config.REVIEW_CACHE_REDIS_TIMEOUT_SECONDS,
+            socket_connect_timeout=config.REVIEW_CACHE_REDIS_TIMEOUT_SECONDS
+        )
+    return ReviewCache(
+        client=client,
+        max_entries=config.REVIEW_CACHE_MAX_ENTRIES,
+        ttl_seconds=config.REVIEW_CACHE_TTL_SECONDS,
+        enabled=config.REVIEW_CACHE_ENABLED
+    )
+
+
+review_cache = create_review_cache(app_settings)
@@ -0,0 +1,148 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from ai_review.models.review import ReviewSuggestion, SeverityLevel
+from ai_review.services.tokens import count_tokens
+
+# Lines that start a new top-level definition in the languages we review
+BOUNDARY_PATTERN = re.compile(
+    r"^(?:@|(?:async\s+)?def\s|class\s|function\s|func\s|fn\s|impl\b|struct\s|interface\s|"
+    r"type\s|enum\s|module\s|export\s|public\s|private\s|protected\s|static\s)"
+)
+
+SEVERITY_ORDER = [SeverityLevel.LOW, SeverityLevel.MEDIUM, SeverityLevel.HIGH, SeverityLevel.CRITICAL]
+
+
+@dataclass
+class CodeChunk:
+    """A contiguous slice of a file, starting at a 1-based line number."""
+    start_line: int
+    code: str
+
+    @property
+    def end_line(self) -> int:
+        return self.start_line + max(len(self.code.splitlines()) - 1, 0)
+
+
+def split_code(code: str, max_tokens: int, count: Callable[[str], int] = count_tokens) -> List[CodeChunk]:
+    """
+    Split code into chunks of at most max_tokens tokens.
+
+    Chunks are cut at top-level function/class boundaries where possible;
+    a single definition larger than the budget is cut at line granularity.
+    """
+    lines = code.splitlines(keepends=True)
+    if count(code) <= max_tokens:
+        return [CodeChunk(start_line=1, code=code)]
+
+    # Group lines into top-level blocks, keeping decorators with their definition
+    blocks: List[List[str]] = []
+    for line in lines:
+        starts_block = BOUNDARY_PATTERN.match(line) and not (blocks and blocks[-1][-1].startswith("@"))
+        if not blocks or starts_block:
+            blocks.append([line])
+        else:
+            blocks[-1].append(line)
+
+    chunks: List[CodeChunk] = []
+    current: List[str] = []
+    current_tokens = 0
+    current_start = 1
+    line_no = 1
+
+    def flush() -> None:
+        nonlocal current, current_tokens, current_start
+        if current:
+            chunks.append(CodeChunk(start_line=current_start, code="".join(current)))
+        current, current_tokens, current_start = [], 0, line_no
+
+    for block in blocks:
+        block_tokens = count("".join(block))
+        if current and current_tokens + block_tokens > max_tokens:
+            flush()
+        if block_tokens > max_tokens:
+            # Oversized definition: fall back to cutting between lines
+            for line in block:
+                line_tokens = count(line)
+                if current and current_tokens + line_tokens > max_tokens:
+                    flush()
+                current.append(line)
+                current_tokens += line_tokens
+                line_no += 1
+            continue
+        current.extend(block)
+        current_tokens += block_tokens
+        line_no += len(block)
+    flush()
+
+    return chunks
+
+
+def remap_suggestions(suggestions: List[ReviewSuggestion], chunk: CodeChunk) -> List[ReviewSuggestion]:
+    """Shift chunk-relative line numbers back to file coordinates."""
+    offset = chunk.start_line - 1
+    last_line = max(chunk.end_line, chunk.start_line)
+    remapped = []
+    for sugg in suggestions:
+        line_start = min(max(sugg.line_start + offset, chunk.start_line), last_line)
+        line_end = min(max(sugg.line_end + offset, line_start), last_line)
+        remapped.append(sugg.model_copy(update={"line_start": line_start, "line_end": line_end}))
+    return remapped
+
+
+def merge_suggestions(suggestions: List[ReviewSuggestion]) -> List[ReviewSuggestion]:
+    """
+    De-duplicate suggestions reported by more than one chunk.
+
+    Suggestions with the same category and message whose line ranges overlap
+    or touch are merged into one covering both ranges at the higher severity.
+    """
+    merged: List[ReviewSuggestion] = []
+    for sugg in sorted(suggestions, key=lambda s: (s.line_start, s.line_end)):
+        for index, existing in enumerate(merged):
+            if (
+                existing.category == sugg.category
+                and _normalize_message(existing.message) == _normalize_message(sugg.message)
+                and sugg.line_start <= existing.line_end + 1
+                and existing.line_start <= sugg.line_end + 1
+            ):
+                merged[index] = existing.model_copy(update={
+                    "line_start": min(existing.line_start, sugg.line_start),
+                    "line_end": max(existing.line_end, sugg.line_end),
+                    "severity": max(existing.severity, sugg.severity, key=SEVERITY_ORDER.index),
+                    "suggested_fix": existing.suggested_fix or sugg.suggested_fix,
+                })
+                break
+        else:
+            merged.append(sugg)
+    return merged
+
+
+def combine_results(chunks: List[CodeChunk], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-chunk analysis results into a single file-level result."""
+    suggestions: List[ReviewSuggestion] = []
+    summaries = []
+    failed = 0
+    for chunk, result in zip(chunks, results):
+        if result.get("error"):
+            failed += 1
+            continue
+        suggestions.extend(remap_suggestions(result["suggestions"], chunk))
+        if result.get("summary"):
+            summaries.append(f"Lines {chunk.start_line}-{chunk.end_line}: {result['summary']}")
+
+    if failed == len(chunks):
+        return results[0]
+
+    summary = f"Reviewed in {len(chunks)} chunks."
+    if failed:
+        summary += f" {failed} chunk(s) could not be analyzed."
+    return {
+        "suggestions": merge_suggestions(suggestions),
+        "summary": " ".join([summary] + summaries),
+    }
+
+
+def _normalize_message(message: str) -> str:
+    return " ".join(message.lower().split())
@@ -0,0 +1,182 @@
+import difflib
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from ai_review.models.review import ReviewSuggestion
+from ai_review.services.chunking import CodeChunk
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+@dataclass
+class Hunk:
+    """A unified diff hunk; lines are (tag, text) pairs with tag in ' ', '-', '+'."""
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    lines: List[Tuple[str, str]] = field(default_factory=list)
+
+    def excerpt(self) -> CodeChunk:
+        """Return the new-side lines of the hunk, context included."""
+        new_lines = [text for tag, text in self.lines if tag != "-"]
+        return CodeChunk(
+            start_line=_first_line(self.new_start, self.new_count),
+            code="\n".join(new_lines) + "\n" if new_lines else ""
+        )
+
+
+def parse_unified_diff(diff: str) -> List[Hunk]:
+    """
+    Parse the hunks of a single-file unified diff.
+
+    Lines are read until the counts in the hunk header are used up, so
+    content lines starting with "--" or "++" are not taken for file headers.
+    """
+    hunks: List[Hunk] = []
+    old_left = new_left = 0
+    for line in diff.splitlines():
+        if old_left <= 0 and new_left <= 0:
+            # Between hunks: headers and other noise until the next "@@"
+            match = HUNK_HEADER.match(line)
+            if match:
+                old_start, old_count, new_start, new_count = match.groups()
+                hunks.append(Hunk(
+                    old_start=int(old_start),
+                    old_count=int(old_count) if old_count is not None else 1,
+                    new_start=int(new_start),
+                    new_count=int(new_count) if new_count is not None else 1,
+                ))
+                old_left, new_left = hunks[-1].old_count, hunks[-1].new_count
+            continue
+        if line.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        # Some tools strip the space of empty context lines
+        tag, text = (line[0], line[1:]) if line else (" ", "")
+        if tag not in (" ", "-", "+"):
+            continue
+        hunks[-1].lines.append((tag, text))
+        if tag != "+":
+            old_left -= 1
+        if tag != "-":
+            new_left -= 1
+    return hunks
+
+
+def diff_hunks(old_code: str, new_code: str, context: int = 3) -> List[Hunk]:
+    """Compute unified diff hunks between two versions of a file."""
+    old_lines = old_code.splitlines()
+    new_lines = new_code.splitlines()
+    matcher = difflib.SequenceMatcher(a=old_lines, b=new_lines, autojunk=False)
+
+    hunks = []
+    for group in matcher.get_grouped_opcodes(context):
+        first, last = group[0], group[-1]
+        old_count = last[2] - first[1]
+        new_count = last[4] - first[3]
+        hunk = Hunk(
+            old_start=first[1] + 1 if old_count else first[1],
+            old_count=old_count,
+            new_start=first[3] + 1 if new_count else first[3],
+            new_count=new_count,
+        )
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                hunk.lines.extend((" ", text) for text in old_lines[i1:i2])
+                continue
+            hunk.lines.extend(("-", text) for text in old_lines[i1:i2])
+            hunk.lines.extend(("+", text) for text in new_lines[j1:j2])
+        hunks.append(hunk)
+    return hunks
+
+
+def apply_hunks(old_code: str, hunks: List[Hunk]) -> Optional[str]:
+    """
+    Apply hunks to old_code and return the new version.
+
+    Returns None when a context or removed line does not match old_code,
+    i.e. the diff was taken against a different base.
+    """
+    old_lines = old_code.splitlines()
+    new_lines: List[str] = []
+    index = 0
+    for hunk in hunks:
+        start = _first_line(hunk.old_start, hunk.old_count) - 1
+        if start < index or start > len(old_lines):
+            return None
+        new_lines.extend(old_lines[index:start])
+        index = start
+        for tag, text in hunk.lines:
+            if tag == "+":
+                new_lines.append(text)
+                continue
+            if index >= len(old_lines) or old_lines[index] != text:
+                return None
+            if tag == " ":
+                new_lines.append(text)
+            index += 1
+    new_lines.extend(old_lines[index:])
+    trailing_newline = "\n" if old_code.endswith("\n") or not old_code else ""
+    return "\n".join(new_lines) + trailing_newline if new_lines else ""
+
+
+def changed_line_ranges(hunks: List[Hunk]) -> List[Tuple[int, int]]:
+    """Return new-file line ranges that were added or modified."""
+    ranges: List[Tuple[int, int]] = []
+    for hunk in hunks:
+        new_line = _first_line(hunk.new_start, hunk.new_count)
+        for tag, _ in hunk.lines:
+            if tag == "+":
+                if ranges and ranges[-1][1] == new_line - 1:
+                    ranges[-1] = (ranges[-1][0], new_line)
+                else:
+                    ranges.append((new_line, new_line))
+            if tag != "-":
+                new_line += 1
+    return ranges
+
+
+def carry_forward_suggestions(suggestions: List[ReviewSuggestion], hunks: List[Hunk]) -> List[ReviewSuggestion]:
+    """
+    Shift suggestions from the base version onto the new version.
+
+    Suggestions whose line range contains a removed line or an insertion are
+    dropped, since the new analysis covers those lines; the rest are moved by
+    the number of lines added and removed above them.
+    """
+    removed: List[int] = []
+    inserted_before: List[int] = []
+    for hunk in hunks:
+        old_line = _first_line(hunk.old_start, hunk.old_count)
+        for tag, _ in hunk.lines:
+            if tag == "+":
+                inserted_before.append(old_line)
+                continue
+            if tag == "-":
+                removed.append(old_line)
+            old_line += 1
+
+    def shift(line: int) -> int:
+        added = sum(1 for point in inserted_before if point <= line)
+        dropped = sum(1 for point in removed if point < line)
+        return line + added - dropped
+
+    carried = []
+    for sugg in suggestions:
+        touched = any(sugg.line_start <= line <= sugg.line_end for line in removed) or any(
+            sugg.line_start < point <= sugg.line_end for point in inserted_before
+        )
+        if touched:
+            continue
+        carried.append(sugg.model_copy(update={
+            "line_start": shift(sugg.line_start),
+            "line_end": shift(sugg.line_end),
+        }))
+    return carried
+
+
+def _first_line(start: int, count: int) -> int:
+    # Unified diffs give the line *before* an empty range, e.g. "-5,0" inserts after line 5
+    return start + 1 if count == 0 else start
@@ -0,0 +1,382 @@
+import asyncio
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ai_review.core.config import settings as app_settings
+from ai_review.db.models import Review, ReviewJob, Suggestion
+from ai_review.models.review import ReviewJobResponse, ReviewRequest
+from ai_review.services.llm import analyze_code
+from ai_review.services.blobs import store_sources_async
+from ai_review.services.review import (
+    build_review_record,
+    build_suggestion_rows,
+    get_code_for_review,
+    insert_suggestions,
+    stamp_timings,
+)
+from ai_review.services.timings import StageTimings, record_timings
+from ai_review.utils.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+async def enqueue_review_async(request: ReviewRequest, db: AsyncSession) -> ReviewJobResponse:
+    """
+    Store a pending review and queue it for a background worker.
+    """
+    review_id = str(uuid.uuid4())
+    source_sha256 = (await store_sources_async(db, [request.code]))[0]
+    db_review = build_review_record(review_id, request, {"summary": "", "execution_time": 0.0}, source_sha256)
+    db_review.status = "pending"
+    db.add(db_review)
+    # The worker reads the code back from the blob store rather than the payload
+    db.add(ReviewJob(review_id=review_id, payload=request.model_dump(mode="json", exclude={"code"})))
+    await db.commit()
+
+    return ReviewJobResponse(review_id=review_id, status="pending")
+
+
+async def wait_for_review_async(review_id: str, db: AsyncSession, timeout: float) -> Optional[Review]:
+    """
+    Wait up to timeout seconds for a review to reach a terminal status.
+    
+    Returns the review row as last seen, or None if it does not exist.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        review = await db.get(Review, review_id, populate_existing=True)
+        if review is None or review.status in TERMINAL_STATUSES or time.monotonic() >= deadline:
+            return review
+        await asyncio.sleep(min(app_settings.REVIEW_JOB_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+
+
+def claim_next_job(
+    db: Session,
+    worker_id: str,
+    write_session_factory: Optional[Callable[[], Session]] = None
+) -> Optional[ReviewJob]:
+    """
+    Atomically claim the oldest runnable job.
+
+    A job is runnable when it is pending, or running with an expired lease
+    (its worker died) and attempts left. The claim is a conditional UPDATE,
+    so two workers racing for the same row cannot both win. Candidates are
+    read with db and claimed in a session from write_session_factory (db
+    itself by default).
+    """
+    now = datetime.utcnow()
+    _fail_abandoned_jobs(db, now, write_session_factory)
+    runnable = or_(
+        ReviewJob.status == "pending",
+        (ReviewJob.status == "running")
+        & (ReviewJob.locked_until < now)
+        & (ReviewJob.attempts < app_settings.REVIEW_JOB_MAX_ATTEMPTS)
+    )
+    candidates = db.scalars(
+        select(ReviewJob.id).where(runnable).order_by(ReviewJob.created_at).limit(5)
+    ).all()
+    # End the read transaction so the claimed row is read back fresh
+    db.commit()
+
+    for job_id in candidates:
+        with _writer(db, write_session_factory) as write_db:
+            claimed = write_db.execute(
+                update(ReviewJob)
+                .where(ReviewJob.id == job_id, runnable)
+                .values(
+                    status="running",
+                    worker_id=worker_id,
+                    attempts=ReviewJob.attempts + 1,
+                    started_at=now,
+                    locked_until=now + timedelta(seconds=app_settings.REVIEW_JOB_LEASE_SECONDS)
+                )
+            )
+            write_db.commit()
+        if claimed.rowcount == 1:
+            return db.get(ReviewJob, job_id, populate_existing=True)
+    return None
+
+
+def _writer(db: Session, write_session_factory: Optional[Callable[[], Session]]) -> ContextManager[Session]:
+    """Session for a short write: one from write_session_factory, or db itself."""
+    if write_session_factory:
+        return write_session_factory()
+    return nullcontext(db)
+
+
+def _fail_abandoned_jobs(
+    db: Session,
+    now: datetime,
+    write_session_factory: Optional[Callable[[], Session]] = None
+) -> None:
+    """Fail the jobs, and their reviews, whose worker died during their last allowed attempt."""
+    abandoned = (
+        (ReviewJob.status == "running")
+        & (ReviewJob.locked_until < now)
+        & (ReviewJob.attempts >= app_settings.REVIEW_JOB_MAX_ATTEMPTS)
+    )
+    # Checked first, so an idle poll never takes the write lock
+    if db.scalar(select(ReviewJob.id).where(abandoned).limit(1)) is None:
+        return
+    db.commit()
+    error = "The review worker stopped before finishing the last attempt"
+    with _writer(db, write_session_factory) as write_db:
+        write_db.execute(
+            update(Review)
+            .where(Review.id.in_(select(ReviewJob.review_id).where(abandoned)))
+            .values(status="failed", summary=f"Error analyzing code: {error}"),
+            execution_options={"synchronize_session": False}
+        )
+        write_db.execute(
+            update(ReviewJob).where(abandoned).values(status="failed", error=error, finished_at=now, locked_until=None),
+            execution_options={"synchronize_session": False}
+        )
+        write_db.commit()
+
+
+def _update_claimed_job(db: Session, job_id: str, attempt: int, **values: Any) -> bool:
+    """
+    Update a job only while the claim made for attempt still holds.
+
+    Every claim increments attempts, so the attempt number fences out a run
+    whose lease expired and whose job another worker has claimed since.
+    """
+    updated = db.execute(
+        update(ReviewJob)
+        .where(ReviewJob.id == job_id, ReviewJob.status == "running", ReviewJob.attempts == attempt)
+        .values(**values),
+        execution_options={"synchronize_session": False}
+    )
+    if updated.rowcount != 1:
+        db.rollback()
+        logger.warning(f"Review job {job_id} was claimed again after attempt {attempt}; dropping its result")
+        return False
+    return True
+
+
+@contextmanager
+def _lease_heartbeat(session_factory: Callable[[], Session], job_id: str, attempt: int) -> Iterator[None]:
+    """
+    Keep extending a claimed job's lease while the block runs.
+
+    The lease is renewed every third of REVIEW_JOB_LEASE_SECONDS, fenced on
+    the attempt like every other update, so an analysis that outlives one
+    lease is not claimed again by another worker. Renewal stops once the
+    claim is lost.
+    """
+    stop = threading.Event()
+    lease_seconds = app_settings.REVIEW_JOB_LEASE_SECONDS
+
+    def renew() -> None:
+        while not stop.wait(lease_seconds / 3):
+            try:
+                with session_factory() as db:
+                    locked_until = datetime.utcnow() + timedelta(seconds=lease_seconds)
+                    if not _update_claimed_job(db, job_id, attempt, locked_until=locked_until):
+                        return
+                    db.commit()
+            except Exception as e:
+                logger.warning(f"Could not extend the lease of review job {job_id}: {e}")
+
+    thread = threading.Thread(target=renew, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(
+    job: ReviewJob,
+    db: Session,
+    write_session_factory: Optional[Callable[[], Session]] = None
+) -> None:
+    """
+    Analyze a claimed job and store the result on its review.
+
+    db reads the job's input and is released before the analysis starts,
+    so no connection is held during the LLM call. Status changes, lease
+    renewals and the result are written in sessions from
+    write_session_factory (db itself, or a session on its engine for the
+    renewals, by default). The result is dropped if the job was claimed
+    again in the meantime.
+    """
+    # The fencing token; read before any commit can reload the row
+    job_id, attempt, review_id = job.id, job.attempts, job.review_id
+    queued_seconds = (job.started_at - job.created_at).total_seconds() if job.created_at and job.started_at else None
+    if db.get(Review, review_id) is None:
+        error = f"Review {review_id} not found"
+        logger.error(f"Review job {job_id} failed: {error}")
+        db.commit()
+        with _writer(db, write_session_factory) as write_db:
+            if _update_claimed_job(
+                write_db, job_id, attempt,
+                status="failed", error=error, finished_at=datetime.utcnow(), locked_until=None
+            ):
+                write_db.commit()
+        return
+    db.commit()
+    with _writer(db, write_session_factory) as write_db:
+        # Conditional, so a stale run cannot move a finished review back to running
+        write_db.execute(
+            update(Review).where(Review.id == review_id, Review.status == "pending").values(status="running")
+        )
+        write_db.commit()
+
+    payload = dict(job.payload)
+    if "code" not in payload:
+        payload["code"] = get_code_for_review(review_id, db)
+    request = ReviewRequest(**payload)
+    # End the read transaction, returning the connection to the pool
+    db.commit()
+
+    heartbeat_session_factory = write_session_factory or partial(Session, db.get_bind())
+    with record_timings() as timings:
+        if queued_seconds is not None:
+            timings.add("queue", queued_seconds)
+        try:
+            with _lease_heartbeat(heartbeat_session_factory, job_id, attempt):
+                analysis_result = analyze_code(
+                    code=request.code,
+                    file_path=request.file_path,
+                    language=request.language,
+                    settings=request.settings,
+                    use_cache=request.use_cache,
+                    refresh_cache=request.refresh_cache
+                )
+            error = analysis_result["summary"] if analysis_result.get("error") else None
+        except Exception as e:
+            analysis_result = None
+            error = str(e)
+
+        with _writer(db, write_session_factory) as write_db:
+            _store_result(write_db, job_id, attempt, review_id, analysis_result, error, timings)
+
+
+def _store_result(
+    db: Session,
+    job_id: str,
+    attempt: int,
+    review_id: str,
+    analysis_result: Optional[Dict[str, Any]],
+    error: Optional[str],
+    timings: StageTimings
+) -> None:
+    """Finish a job run: requeue it after a retryable error, else store its result."""
+    if error and attempt < app_settings.REVIEW_JOB_MAX_ATTEMPTS:
+        # Leave the review pending and let another attempt pick it up
+        logger.warning(f"Review job {job_id} failed (attempt {attempt}): {error}")
+        if _update_claimed_job(db, job_id, attempt, status="pending", error=error, locked_until=None):
+            db.execute(update(Review).where(Review.id == review_id).values(status="pending"))
+            db.commit()
+        return
+
+    status = "failed" if error else "completed"
+    if not _update_claimed_job(
+        db, job_id, attempt, status=status, error=error, finished_at=datetime.utcnow(), locked_until=None
+    ):
+        return
+    review = db.get(Review, review_id)
+    if review is None:
+        # Deleted during the analysis; the job is finished all the same
+        db.commit()
+        return
+    with timings.stage("db_write"):
+        if analysis_result is not None:
+            review.summary = analysis_result["summary"]
+            review.execution_time = analysis_result["execution_time"]
+            review.suggestion_count = len(analysis_result["suggestions"])
+            # Replace rather than append, so a review never holds two attempts' suggestions
+            db.execute(delete(Suggestion).where(Suggestion.review_id == review_id))
+            insert_suggestions(db, build_suggestion_rows(review_id, analysis_result["suggestions"]))
+        else:
+            review.summary = f"Error analyzing code: {error}"
+    stamp_timings(review, timings)
+    review.status = status
+    db.commit()
+
+
+def queue_depth(db: Session) -> int:
+    """Return the number of jobs waiting for a worker."""
+    return db.scalar(select(func.count(ReviewJob.id)).where(ReviewJob.status == "pending")) or 0
+
+
+def job_counts(db: Session) -> Dict[str, int]:
+    """Return the number of jobs in each status."""
+    rows = db.execute(select(ReviewJob.status, func.count(ReviewJob.id)).group_by(ReviewJob.status))
+    return {status: count for status, count in rows}
+
+
+class ReviewWorkerPool:
+    """
+    Pool of background threads that drain the review job queue.
+
+    The queue lives in the application database, so any number of API
+    processes can enqueue and any number of pools can consume without an
+    external broker. Jobs are read with session_factory; every write, from
+    the claim to the result, uses write_session_factory, which on SQLite is
+    the single writer connection.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int = 2,
+        poll_interval: float = 0.5,
+        write_session_factory: Optional[Callable[[], Session]] = None
+    ):
+        self.session_factory = session_factory
+        self.write_session_factory = write_session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                args=(f"worker-{uuid.uuid4().hex[:8]}-{index}",),
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signal the workers to exit and wait for in-progress jobs."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def process_next(self, worker_id: str = "inline") -> bool:
+        """Claim and run one job. Returns False when the queue is empty."""
+        with self.session_factory() as db:
+            job = claim_next_job(db, worker_id, self.write_session_factory)
+            if job is None:
+                return False
+            run_job(job, db, self.write_session_factory)
+            return True
+
+    def _run(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.process_next(worker_id):
+                    continue
+            except Exception as e:
+                logger.error(f"Review worker {worker_id} crashed on a job: {e}")
+            self._stop.wait(self.poll_interval)
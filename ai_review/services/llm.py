@@ -1,139 +1,823 @@
-import os
 import time
 import json
-from typing import List, Dict, Any, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, Optional, Tuple
 
 import openai
-from openai import OpenAI
 
+from ai_review.core.config import settings as app_settings
+from ai_review.db.database import WriteSessionLocal
 from ai_review.models.review import ReviewSuggestion, SeverityLevel, ReviewCategory
+from ai_review.services.analyzers import LocalAnalysis, run_local_analysis, run_local_analysis_async
+from ai_review.services.cache import DEFAULT_FOCUS_AREAS, analysis_cache, make_cache_key
+from ai_review.services.chunking import CodeChunk, combine_results, merge_suggestions, split_code
+from ai_review.services.prompts import CompactedCode, compact_code, infer_language, system_prompt
+from ai_review.services.providers import LLMProvider, create_provider
+from ai_review.services.ratelimit import AdaptiveLimiter
+from ai_review.services.singleflight import DatabaseLease, SingleFlight
+from ai_review.services.streaming import SuggestionStreamParser
+from ai_review.services.timings import add_stage, stage
+from ai_review.services.tokens import count_tokens
+from ai_review.utils.logging import setup_logger
+from ai_review.utils.metrics import Counter, Histogram
 
-# Initialize OpenAI client if API key is available
-api_key = os.getenv("OPENAI_API_KEY")
-use_mock = api_key == "your_real_api_key_here" or not api_key
-if not use_mock:
-    client = OpenAI(api_key=api_key)
+logger = setup_logger(__name__)
+
+# Bump whenever the system prompt changes so cached results are not reused
+PROMPT_VERSION = "3"
+
+# The provider is chosen by LLM_PROVIDER; without one, analyses return mock data
+llm_provider = create_provider(app_settings)
+use_mock = llm_provider is None
+
+# Errors that signal an overloaded provider; requests failing with these are retried
+OVERLOAD_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+LLM_REQUESTS = Counter(
+    "llm_requests_total", "LLM provider requests by outcome: ok, rate_limited, overloaded or error.", ["outcome"]
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "LLM provider request latency; time to first byte when streaming.", ["outcome"]
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the LLM provider.", ["kind"])
+
+# Shared by every LLM call in the process, sync and async
+llm_limiter = AdaptiveLimiter(
+    requests_per_minute=app_settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=app_settings.LLM_TOKENS_PER_MINUTE,
+    max_concurrency=app_settings.LLM_MAX_CONCURRENCY,
+    min_concurrency=app_settings.LLM_MIN_CONCURRENCY,
+    initial_concurrency=app_settings.LLM_INITIAL_CONCURRENCY,
+    target_latency=app_settings.LLM_TARGET_LATENCY_SECONDS
+)
+
+# Identical analyses in flight at the same time share one LLM call
+analysis_flights = SingleFlight()
+analysis_lease = (
+    DatabaseLease(
+        WriteSessionLocal,
+        ttl=app_settings.ANALYSIS_LEASE_SECONDS,
+        poll_interval=app_settings.ANALYSIS_LEASE_POLL_INTERVAL
+    )
+    if app_settings.ANALYSIS_COALESCE_DISTRIBUTED and app_settings.ANALYSIS_CACHE_PERSIST
+    else None
+)
 
 def analyze_code(
     code: str, 
     file_path: str, 
     language: Optional[str] = None,
-    settings: Optional[Dict[str, Any]] = None
+    settings: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    refresh_cache: bool = False
 ) -> Dict[str, Any]:
     """
-    Analyze code using OpenAI's GPT-4 to find issues and suggest improvements.
-    If no API key is provided, return mock data for testing.
+    Analyze code with the configured LLM provider to find issues and suggest improvements.
+    If no provider is configured (see LLM_PROVIDER), return mock data for testing.
+
+    Results are cached by a hash of the code, language, settings, model and
+    prompt version. Pass use_cache=False to bypass the cache entirely, or
+    refresh_cache=True to drop any cached result and analyze again.
+    Concurrent identical requests are coalesced into a single analysis.
+    
+    Set settings["fragment"] when code is an excerpt rather than a whole
+    file, such as a diff hunk: the local analyzers parse whole modules and
+    would report the missing lines, so only the LLM reviews fragments.
     """
     start_time = time.time()
+    language = language or infer_language(file_path)
     
-    if not language:
-        # Try to infer language from file extension
-        extension = file_path.split(".")[-1].lower()
-        language_map = {
-            "py": "python",
-            "js": "javascript",
-            "ts": "typescript",
-            "jsx": "javascript",
-            "tsx": "typescript",
-            "html": "html",
-            "css": "css",
-            "java": "java",
-            "c": "c",
-            "cpp": "c++",
-            "go": "go",
-            "rs": "rust",
-            "rb": "ruby",
-            "php": "php",
-        }
-        language = language_map.get(extension, "unknown")
-    
-    # Use mock data if no API key
-    if use_mock:
-        return _mock_analyze_code(code, file_path, language, settings, start_time)
+    # Serve repeated submissions from the result cache
+    cache_key = _cache_key(code, language, settings) if use_cache else None
+    if cache_key:
+        with stage("cache_lookup"):
+            if refresh_cache:
+                analysis_cache.invalidate(cache_key)
+                cached = None
+            else:
+                cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            return _cached_result(cached, file_path, start_time)
     
-    # Configure analysis based on settings
-    settings = settings or {}
-    focus_areas = settings.get("focus_areas", ["lint", "security", "performance", "style", "refactor"])
-    min_severity = settings.get("min_severity", "low")
+    def run() -> Dict[str, Any]:
+        return _run_analysis(code, file_path, language, settings, start_time, cache_key)
     
-    system_prompt = f"""
-    You are an expert code reviewer specialized in {language}. Analyze the provided code and provide detailed review feedback.
-    Focus on these areas: {', '.join(focus_areas)}
-    
-    Your response should be in the following JSON format ONLY with no additional text:
-    {{
-        "suggestions": [
-            {{
-                "line_start": <int>,
-                "line_end": <int>,
-                "file_path": "<string>",
-                "message": "<string>",
-                "category": "<category>",
-                "severity": "<severity>",
-                "suggested_fix": "<string or null>"
-            }}
-        ],
-        "summary": "<overall summary of the code quality and main issues>"
-    }}
-    
-    Categories must be one of: lint, security, performance, style, refactor, documentation, test
-    Severity levels must be one of: low, medium, high, critical
-    Only include suggestions with severity of {min_severity} or higher.
-    
-    Be specific in your suggestions and provide concrete examples of how to fix the issues when possible.
+    if not app_settings.ANALYSIS_COALESCE_ENABLED:
+        return run()
+    joined = time.perf_counter()
+    result, shared = analysis_flights.do(_flight_key(code, language, settings), run)
+    if not shared:
+        return result
+    add_stage("coalesce_wait", time.perf_counter() - joined)
+    return _shared_result(result, file_path, start_time)
+
+
+async def analyze_code_async(
+    code: str, 
+    file_path: str, 
+    language: Optional[str] = None,
+    settings: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    refresh_cache: bool = False
+) -> Dict[str, Any]:
     """
+    Async variant of analyze_code using AsyncOpenAI.
+
+    The event loop is never blocked on the LLM round trip; persistent cache
+    lookups run in the default thread pool. Coalescing is shared with
+    analyze_code, so sync and async callers join the same analysis.
+    """
+    start_time = time.time()
+    language = language or infer_language(file_path)
+    
+    cache_key = _cache_key(code, language, settings) if use_cache else None
+    if cache_key:
+        with stage("cache_lookup"):
+            if refresh_cache:
+                await asyncio.to_thread(analysis_cache.invalidate, cache_key)
+                cached = None
+            else:
+                cached = await asyncio.to_thread(analysis_cache.get, cache_key)
+        if cached is not None:
+            return _cached_result(cached, file_path, start_time)
     
+    def run() -> Awaitable[Dict[str, Any]]:
+        return _run_analysis_async(code, file_path, language, settings, start_time, cache_key)
+    
+    if not app_settings.ANALYSIS_COALESCE_ENABLED:
+        return await run()
+    joined = time.perf_counter()
+    result, shared = await analysis_flights.do_async(_flight_key(code, language, settings), run)
+    if not shared:
+        return result
+    add_stage("coalesce_wait", time.perf_counter() - joined)
+    return _shared_result(result, file_path, start_time)
+
+
+async def stream_analyze_code(
+    code: str, 
+    file_path: str, 
+    language: Optional[str] = None,
+    settings: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    refresh_cache: bool = False
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream an analysis as the LLM produces it.
+    
+    Yields ("suggestion", ReviewSuggestion) for each suggestion as soon as it
+    is complete, followed by a single ("result", dict) with the same shape
+    analyze_code returns. Suggestions from the local analyzers come first.
+    Identical analyses are coalesced as in analyze_code_async; a request
+    that joins one in flight gets the leader's suggestions once it is done.
+    """
+    start_time = time.time()
+    language = language or infer_language(file_path)
+    
+    cache_key = _cache_key(code, language, settings) if use_cache else None
+    if cache_key and not refresh_cache:
+        with stage("cache_lookup"):
+            cached = await asyncio.to_thread(analysis_cache.get, cache_key)
+        if cached is not None:
+            result = _cached_result(cached, file_path, start_time)
+            for sugg in result["suggestions"]:
+                yield "suggestion", sugg
+            yield "result", result
+            return
+    
+    # Filled by this request's own analysis; a follower's stays empty
+    streamed: "asyncio.Queue[Optional[ReviewSuggestion]]" = asyncio.Queue()
+    
+    def run() -> Awaitable[Dict[str, Any]]:
+        return _stream_analysis(code, file_path, language, settings, start_time, cache_key, streamed.put_nowait)
+    
+    async def fly() -> Tuple[Dict[str, Any], bool]:
+        if not app_settings.ANALYSIS_COALESCE_ENABLED:
+            return await run(), False
+        return await analysis_flights.do_async(_flight_key(code, language, settings), run)
+    
+    joined = time.perf_counter()
+    flight = asyncio.ensure_future(fly())
+    flight.add_done_callback(lambda _: streamed.put_nowait(None))
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"File: {file_path}\n\n```{language}\n{code}\n```"}
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        
-        # Convert JSON to ReviewSuggestion objects
-        suggestions = []
-        for sugg in result.get("suggestions", []):
-            suggestions.append(
-                ReviewSuggestion(
-                    line_start=sugg["line_start"],
-                    line_end=sugg["line_end"],
-                    file_path=sugg.get("file_path", file_path),
-                    message=sugg["message"],
-                    category=sugg["category"],
-                    severity=sugg["severity"],
-                    suggested_fix=sugg.get("suggested_fix")
-                )
-            )
+        while True:
+            sugg = await streamed.get()
+            if sugg is None:
+                break
+            yield "suggestion", sugg
+        result, shared = flight.result()
+    finally:
+        # A closed stream stops its analysis; followers of a leader start over
+        flight.cancel()
+    if shared:
+        # Joined an identical analysis in flight: replay what its leader found
+        add_stage("coalesce_wait", time.perf_counter() - joined)
+        result = _shared_result(result, file_path, start_time)
+        for sugg in result["suggestions"]:
+            yield "suggestion", sugg
+    yield "result", result
+
+
+async def _stream_analysis(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float,
+    cache_key: Optional[str],
+    emit: Callable[[ReviewSuggestion], None]
+) -> Dict[str, Any]:
+    """
+    Streaming variant of _run_analysis_async.
+    
+    Each suggestion is passed to emit as soon as it is known, local findings
+    first, and the whole result is returned and cached at the end.
+    """
+    leased = False
+    if analysis_lease and cache_key:
+        leased = await asyncio.to_thread(analysis_lease.acquire, cache_key)
+        if not leased:
+            with stage("coalesce_wait"):
+                cached = await analysis_lease.wait_async(cache_key, partial(analysis_cache.get, cache_key))
+            if cached is not None:
+                result = _cached_result(cached, file_path, start_time)
+                for sugg in result["suggestions"]:
+                    emit(sugg)
+                return result
+    try:
+        result = await _stream_with_local_stage(code, file_path, language, settings, start_time, emit)
+        if cache_key and not result.get("error"):
+            # Shielded like the review save, so a disconnected client still fills the cache
+            await asyncio.shield(asyncio.to_thread(analysis_cache.set, cache_key, result))
+        return result
+    finally:
+        if leased and analysis_lease and cache_key:
+            await asyncio.to_thread(analysis_lease.release, cache_key)
+
+
+async def _stream_with_local_stage(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float,
+    emit: Callable[[ReviewSuggestion], None]
+) -> Dict[str, Any]:
+    """Run the local analyzers, then stream the LLM's suggestions to emit."""
+    local = None
+    if not use_mock and app_settings.LOCAL_ANALYSIS_ENABLED and not _is_fragment(settings):
+        # Local findings are ready long before the LLM's, so send them first
+        with stage("local_analysis"):
+            local = await run_local_analysis_async(code, file_path, language, settings)
+        for sugg in local.suggestions:
+            emit(sugg)
+        settings = local.llm_settings(settings)
+    
+    compacted = None if use_mock or (local and local.skip_llm) else _compact_for_prompt(code, language)
+    if local and local.skip_llm:
+        return _local_result(local, start_time)
+    if compacted is None or len(_split_for_prompt(compacted.code)) > 1:
+        # Mock results and chunked files arrive all at once
+        if compacted is None:
+            result = _mock_analyze_code(code, file_path, language, settings, start_time)
+        else:
+            result = await _analyze_compacted_async(compacted, file_path, language, settings, start_time)
+        for sugg in result["suggestions"]:
+            emit(sugg)
+    else:
+        suggestions: List[ReviewSuggestion] = []
+        parser = SuggestionStreamParser()
+        try:
+            messages = _build_messages(compacted.code, file_path, language, settings)
+            requested = time.perf_counter()
+            stream = await _create_completion_async(messages, stream=True)
+            # Waiting for the response headers was recorded with the request; add the body
+            opened = time.perf_counter()
+            first_token = None
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta and first_token is None:
+                    first_token = time.perf_counter()
+                    add_stage("llm_first_token", first_token - requested)
+                for raw in parser.feed(delta or ""):
+                    suggestion = compacted.remap([_to_suggestion(raw, file_path)])[0]
+                    suggestions.append(suggestion)
+                    emit(suggestion)
+            add_stage("llm", time.perf_counter() - opened)
+            result = {
+                "suggestions": suggestions,
+                "summary": parser.result().get("summary", ""),
+                "execution_time": time.time() - start_time,
+                "prompt_tokens_saved": compacted.tokens_saved
+            }
+        except Exception as e:
+            result = _error_result(e, start_time)
+            result["suggestions"] = suggestions
+    if local:
+        result = _merge_local(result, local)
+    return result
+
+
+def _cache_key(code: str, language: str, settings: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Return the cache key for a request, or None if caching is disabled."""
+    if not analysis_cache.enabled:
+        return None
+    model = "mock" if use_mock else app_settings.OPENAI_MODEL
+    return make_cache_key(code, language, settings, model, _prompt_version())
+
+
+def _flight_key(code: str, language: str, settings: Optional[Dict[str, Any]]) -> str:
+    """Key identifying identical analyses, whether or not caching is enabled."""
+    model = "mock" if use_mock else app_settings.OPENAI_MODEL
+    return make_cache_key(code, language, settings, model, _prompt_version())
+
+
+def _run_analysis(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float,
+    cache_key: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Analyze code and cache the result.
+    
+    With a distributed lease, only one process analyzes a given cache key at
+    a time; the others wait for its result to land in the persistent cache.
+    """
+    leased = False
+    if analysis_lease and cache_key:
+        leased = analysis_lease.acquire(cache_key)
+        if not leased:
+            with stage("coalesce_wait"):
+                cached = analysis_lease.wait(cache_key, partial(analysis_cache.get, cache_key))
+            if cached is not None:
+                return _cached_result(cached, file_path, start_time)
+    try:
+        # Use mock data if no API key
+        if use_mock:
+            result = _mock_analyze_code(code, file_path, language, settings, start_time)
+        else:
+            result = _analyze_with_local_stage(code, file_path, language, settings, start_time)
         
-        execution_time = time.time() - start_time
+        if cache_key and not result.get("error"):
+            analysis_cache.set(cache_key, result)
+        return result
+    finally:
+        if leased and analysis_lease and cache_key:
+            analysis_lease.release(cache_key)
+
+
+async def _run_analysis_async(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float,
+    cache_key: Optional[str]
+) -> Dict[str, Any]:
+    """Async variant of _run_analysis."""
+    leased = False
+    if analysis_lease and cache_key:
+        leased = await asyncio.to_thread(analysis_lease.acquire, cache_key)
+        if not leased:
+            with stage("coalesce_wait"):
+                cached = await analysis_lease.wait_async(cache_key, partial(analysis_cache.get, cache_key))
+            if cached is not None:
+                return _cached_result(cached, file_path, start_time)
+    try:
+        if use_mock:
+            result = _mock_analyze_code(code, file_path, language, settings, start_time)
+        else:
+            result = await _analyze_with_local_stage_async(code, file_path, language, settings, start_time)
         
-        return {
-            "suggestions": suggestions,
-            "summary": result.get("summary", ""),
-            "execution_time": execution_time
-        }
+        if cache_key and not result.get("error"):
+            await asyncio.to_thread(analysis_cache.set, cache_key, result)
+        return result
+    finally:
+        if leased and analysis_lease and cache_key:
+            await asyncio.to_thread(analysis_lease.release, cache_key)
+
+
+def _analyze_with_local_stage(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float
+) -> Dict[str, Any]:
+    """
+    Run the local analyzers, then the LLM on whatever they do not cover.
+    
+    The LLM is told which checks already ran, and tiny or trivially clean
+    files skip it unless security or performance review was requested.
+    """
+    if not app_settings.LOCAL_ANALYSIS_ENABLED or _is_fragment(settings):
+        return _llm_analyze_chunked(code, file_path, language, settings, start_time)
+    with stage("local_analysis"):
+        local = run_local_analysis(code, file_path, language, settings)
+    if local.skip_llm:
+        return _local_result(local, start_time)
+    result = _llm_analyze_chunked(code, file_path, language, local.llm_settings(settings), start_time)
+    return _merge_local(result, local)
+
+
+async def _analyze_with_local_stage_async(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float
+) -> Dict[str, Any]:
+    """Async variant of _analyze_with_local_stage."""
+    if not app_settings.LOCAL_ANALYSIS_ENABLED or _is_fragment(settings):
+        return await _llm_analyze_chunked_async(code, file_path, language, settings, start_time)
+    with stage("local_analysis"):
+        local = await run_local_analysis_async(code, file_path, language, settings)
+    if local.skip_llm:
+        return _local_result(local, start_time)
+    result = await _llm_analyze_chunked_async(code, file_path, language, local.llm_settings(settings), start_time)
+    return _merge_local(result, local)
+
+
+def _is_fragment(settings: Optional[Dict[str, Any]]) -> bool:
+    """Whether the code under review is an excerpt of a file."""
+    return bool((settings or {}).get("fragment"))
+
+
+def _local_result(local: LocalAnalysis, start_time: float) -> Dict[str, Any]:
+    """Result for a file reviewed by the local analyzers alone."""
+    count = len(local.suggestions)
+    return {
+        "suggestions": local.suggestions,
+        "summary": f"Reviewed locally ({local.reason}); found {count} issue{'s' if count != 1 else ''}.",
+        "execution_time": time.time() - start_time,
+        "local_only": True
+    }
+
+
+def _merge_local(result: Dict[str, Any], local: LocalAnalysis) -> Dict[str, Any]:
+    """Add the local suggestions to an LLM result."""
+    if local.suggestions:
+        result["suggestions"] = merge_suggestions(local.suggestions + result["suggestions"])
+    return result
+
+
+def _shared_result(result: Dict[str, Any], file_path: str, start_time: float) -> Dict[str, Any]:
+    """Copy a result computed for another request onto this one."""
+    return {
+        **result,
+        "suggestions": [sugg.model_copy(update={"file_path": file_path}) for sugg in result["suggestions"]],
+        "execution_time": time.time() - start_time,
+        "coalesced": True
+    }
+
+
+def _cached_result(cached: Dict[str, Any], file_path: str, start_time: float) -> Dict[str, Any]:
+    """Adapt a cached result to the current request."""
+    for sugg in cached["suggestions"]:
+        sugg.file_path = file_path
+    cached["execution_time"] = time.time() - start_time
+    cached["cached"] = True
+    return cached
+
+
+def _build_messages(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]]
+) -> List[Dict[str, str]]:
+    """Build the chat messages for an analysis request."""
+    # Configure analysis based on settings
+    settings = settings or {}
+    focus_areas = tuple(settings.get("focus_areas", DEFAULT_FOCUS_AREAS))
+    min_severity = settings.get("min_severity", "low")
+    local_checks = tuple(settings.get("local_checks", ()))
+    
+    with stage("prompt_build"):
+        return [
+            {"role": "system", "content": system_prompt(language, focus_areas, min_severity, local_checks)},
+            {"role": "user", "content": f"File: {file_path}\n\n```{language}\n{code}\n```"}
+        ]
+
+
+def _parse_response(content: str, file_path: str, start_time: float) -> Dict[str, Any]:
+    """Convert the raw LLM completion into an analysis result."""
+    with stage("parse"):
+        result = json.loads(content)
         
+        # Convert JSON to ReviewSuggestion objects
+        suggestions = [_to_suggestion(sugg, file_path) for sugg in result.get("suggestions", [])]
+    
+    return {
+        "suggestions": suggestions,
+        "summary": result.get("summary", ""),
+        "execution_time": time.time() - start_time
+    }
+
+
+def _to_suggestion(sugg: Dict[str, Any], file_path: str) -> ReviewSuggestion:
+    """Convert one suggestion object from the LLM into a ReviewSuggestion."""
+    return ReviewSuggestion(
+        line_start=sugg["line_start"],
+        line_end=sugg["line_end"],
+        file_path=sugg.get("file_path", file_path),
+        message=sugg["message"],
+        category=sugg["category"],
+        severity=sugg["severity"],
+        suggested_fix=sugg.get("suggested_fix")
+    )
+
+
+def _error_result(error: Exception, start_time: float) -> Dict[str, Any]:
+    """Log an analysis error and return an empty result."""
+    logger.error(f"Error analyzing code: {str(error)}")
+    return {
+        "suggestions": [],
+        "summary": f"Error analyzing code: {str(error)}",
+        "execution_time": time.time() - start_time,
+        "error": True
+    }
+
+
+def _split_for_prompt(code: str) -> List[CodeChunk]:
+    """Split code into chunks that fit the per-request token budget."""
+    with stage("prompt_build"):
+        return split_code(
+            code,
+            app_settings.LLM_MAX_TOKENS_PER_CHUNK,
+            count=lambda text: count_tokens(text, app_settings.OPENAI_MODEL)
+        )
+
+
+def _compact_for_prompt(code: str, language: str) -> CompactedCode:
+    """Apply the configured prompt compaction to code."""
+    if not app_settings.PROMPT_COMPACTION_ENABLED:
+        return CompactedCode(code=code)
+    with stage("prompt_build"):
+        return compact_code(
+            code,
+            count=lambda text: count_tokens(text, app_settings.OPENAI_MODEL),
+            max_blank_lines=app_settings.PROMPT_MAX_BLANK_LINES,
+            max_line_length=app_settings.PROMPT_MAX_LINE_LENGTH,
+            literal_run_min=app_settings.PROMPT_LITERAL_RUN_MIN,
+            elide_license=app_settings.PROMPT_ELIDE_LICENSE_HEADER
+        )
+
+
+def _prompt_version() -> str:
+    """
+    Prompt version plus the compaction and local analysis options, which also
+    change the prompt or the result.
+    """
+    version = PROMPT_VERSION
+    if app_settings.PROMPT_COMPACTION_ENABLED:
+        version += (
+            f":compact-{app_settings.PROMPT_MAX_BLANK_LINES}-{app_settings.PROMPT_MAX_LINE_LENGTH}-"
+            f"{app_settings.PROMPT_LITERAL_RUN_MIN}-{int(app_settings.PROMPT_ELIDE_LICENSE_HEADER)}"
+        )
+    if app_settings.LOCAL_ANALYSIS_ENABLED:
+        version += f":local-{app_settings.LOCAL_ANALYSIS_TINY_FILE_LINES}"
+    return version
+
+
+def _restore_lines(result: Dict[str, Any], compacted: CompactedCode) -> Dict[str, Any]:
+    """Map a result on compacted code back to original lines and report the savings."""
+    result["suggestions"] = compacted.remap(result["suggestions"])
+    result["prompt_tokens_saved"] = compacted.tokens_saved
+    return result
+
+
+def _llm_analyze_chunked(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float
+) -> Dict[str, Any]:
+    """
+    Analyze code, splitting oversized files into chunks analyzed in parallel.
+    
+    The code is compacted first, and suggestions are mapped back to the
+    original line numbers.
+    """
+    compacted = _compact_for_prompt(code, language)
+    chunks = _split_for_prompt(compacted.code)
+    if len(chunks) == 1:
+        result = _llm_analyze_code(compacted.code, file_path, language, settings, start_time)
+        return _restore_lines(result, compacted)
+    
+    # Each chunk runs in a copy of this context so its stage timings reach the review
+    contexts = [copy_context() for _ in chunks]
+    with ThreadPoolExecutor(max_workers=min(len(chunks), app_settings.LLM_CHUNK_CONCURRENCY)) as executor:
+        results = list(executor.map(
+            lambda context, chunk: context.run(
+                _llm_analyze_code, chunk.code, file_path, language, settings, start_time
+            ),
+            contexts,
+            chunks
+        ))
+    
+    result = combine_results(chunks, results)
+    result["execution_time"] = time.time() - start_time
+    return _restore_lines(result, compacted)
+
+
+async def _llm_analyze_chunked_async(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float
+) -> Dict[str, Any]:
+    """Async variant of _llm_analyze_chunked."""
+    compacted = _compact_for_prompt(code, language)
+    return await _analyze_compacted_async(compacted, file_path, language, settings, start_time)
+
+
+async def _analyze_compacted_async(
+    compacted: CompactedCode, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float
+) -> Dict[str, Any]:
+    """Analyze already compacted code, chunked if needed."""
+    chunks = _split_for_prompt(compacted.code)
+    if len(chunks) == 1:
+        result = await _llm_analyze_code_async(compacted.code, file_path, language, settings, start_time)
+        return _restore_lines(result, compacted)
+    
+    semaphore = asyncio.Semaphore(app_settings.LLM_CHUNK_CONCURRENCY)
+    
+    async def analyze_chunk(chunk: CodeChunk) -> Dict[str, Any]:
+        async with semaphore:
+            return await _llm_analyze_code_async(chunk.code, file_path, language, settings, start_time)
+    
+    results = await asyncio.gather(*(analyze_chunk(chunk) for chunk in chunks))
+    
+    result = combine_results(chunks, list(results))
+    result["execution_time"] = time.time() - start_time
+    return _restore_lines(result, compacted)
+
+
+def _llm_analyze_code(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float
+) -> Dict[str, Any]:
+    """Run the analysis against the configured provider."""
+    try:
+        response = _create_completion(_build_messages(code, file_path, language, settings))
+        return _parse_response(response.choices[0].message.content, file_path, start_time)
+    except Exception as e:
+        return _error_result(e, start_time)
+
+
+async def _llm_analyze_code_async(
+    code: str, 
+    file_path: str, 
+    language: str,
+    settings: Optional[Dict[str, Any]],
+    start_time: float
+) -> Dict[str, Any]:
+    """Run the analysis against the configured provider without blocking the event loop."""
+    try:
+        response = await _create_completion_async(_build_messages(code, file_path, language, settings))
+        return _parse_response(response.choices[0].message.content, file_path, start_time)
     except Exception as e:
-        # Log error and return empty result
-        print(f"Error analyzing code: {str(e)}")
-        return {
-            "suggestions": [],
-            "summary": f"Error analyzing code: {str(e)}",
-            "execution_time": time.time() - start_time
-        }
+        return _error_result(e, start_time)
+
+
+def _create_completion(messages: List[Dict[str, str]]) -> Any:
+    """
+    Send a chat completion through the shared limiter.
+    
+    Overload errors are retried once the limiter lets the request through
+    again, up to LLM_MAX_RETRIES times; other errors are raised at once.
+    """
+    provider = _require_provider()
+    tokens = _estimate_tokens(messages)
+    for _ in range(app_settings.LLM_MAX_RETRIES + 1):
+        with stage("llm_queue"):
+            permit = llm_limiter.acquire(tokens)
+        sent = time.monotonic()
+        try:
+            response = provider.create_completion(app_settings.OPENAI_MODEL, messages)
+        except OVERLOAD_ERRORS as e:
+            llm_limiter.release(permit, overloaded=True, retry_after=_retry_after(e))
+            _record_call(e, time.monotonic() - sent)
+            error = e
+            continue
+        except Exception as e:
+            llm_limiter.release(permit)
+            _record_call(e, time.monotonic() - sent)
+            raise
+        latency = time.monotonic() - sent
+        llm_limiter.release(permit, latency=latency, used_tokens=_used_tokens(response))
+        _record_call(None, latency, response)
+        return response
+    raise error
+
+
+async def _create_completion_async(messages: List[Dict[str, str]], stream: bool = False) -> Any:
+    """
+    Async variant of _create_completion.
+    
+    A streamed completion gives its slot back once the response starts, with
+    the time to first byte as its latency; its token usage is not reported.
+    """
+    provider = _require_provider()
+    tokens = _estimate_tokens(messages)
+    for _ in range(app_settings.LLM_MAX_RETRIES + 1):
+        with stage("llm_queue"):
+            permit = await llm_limiter.acquire_async(tokens)
+        sent = time.monotonic()
+        try:
+            response = await provider.create_completion_async(app_settings.OPENAI_MODEL, messages, stream=stream)
+        except OVERLOAD_ERRORS as e:
+            llm_limiter.release(permit, overloaded=True, retry_after=_retry_after(e))
+            _record_call(e, time.monotonic() - sent)
+            error = e
+            continue
+        except Exception as e:
+            llm_limiter.release(permit)
+            _record_call(e, time.monotonic() - sent)
+            raise
+        latency = time.monotonic() - sent
+        used_tokens = None if stream else _used_tokens(response)
+        llm_limiter.release(permit, latency=latency, used_tokens=used_tokens)
+        _record_call(None, latency, None if stream else response)
+        return response
+    raise error
+
+
+def _require_provider() -> LLMProvider:
+    """The configured provider; analyses without one use mock data and never get here."""
+    if llm_provider is None:
+        raise RuntimeError("No LLM provider is configured; set LLM_PROVIDER")
+    return llm_provider
+
+
+def _estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimate the tokens a request will consume, prompt and completion."""
+    with stage("prompt_build"):
+        prompt_tokens = sum(count_tokens(message["content"], app_settings.OPENAI_MODEL) + 4 for message in messages)
+    return prompt_tokens + app_settings.LLM_COMPLETION_TOKENS_ESTIMATE
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the provider's Retry-After hint from an API error, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_call(error: Optional[Exception], latency: float, response: Any = None) -> None:
+    """Record the outcome, latency and token usage of one provider request."""
+    if error is None:
+        outcome = "ok"
+    elif isinstance(error, openai.RateLimitError):
+        outcome = "rate_limited"
+    elif isinstance(error, OVERLOAD_ERRORS):
+        outcome = "overloaded"
+    else:
+        outcome = "error"
+    LLM_REQUESTS.inc(outcome)
+    LLM_REQUEST_SECONDS.observe(latency, outcome)
+    add_stage("llm", latency)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.inc("prompt", amount=getattr(usage, "prompt_tokens", 0) or 0)
+        LLM_TOKENS.inc("completion", amount=getattr(usage, "completion_tokens", 0) or 0)
+
+
+def _used_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
 
 def _mock_analyze_code(
     code: str, 
     file_path: str, 
     language: str,
     settings: Optional[Dict[str, Any]] = None,
-    start_time: float = None
+    start_time: Optional[float] = None
 ) -> Dict[str, Any]:
     """Provide mock code analysis for testing without API key."""
     if start_time is None:
@@ -0,0 +1,240 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ai_review.models.review import ReviewSuggestion
+
+LANGUAGE_MAP = {
+    "py": "python",
+    "js": "javascript",
+    "ts": "typescript",
+    "jsx": "javascript",
+    "tsx": "typescript",
+    "html": "html",
+    "css": "css",
+    "java": "java",
+    "c": "c",
+    "cpp": "c++",
+    "go": "go",
+    "rs": "rust",
+    "rb": "ruby",
+    "php": "php",
+}
+
+DEFAULT_FOCUS_AREAS = ["lint", "security", "performance", "style", "refactor"]
+
+SYSTEM_PROMPT_TEMPLATE = """\
+You are an expert code reviewer specialized in {language}. Analyze the provided code and provide detailed review feedback.
+Focus on these areas: {focus_areas}
+
+Your response should be in the following JSON format ONLY with no additional text:
+{{
+    "suggestions": [
+        {{
+            "line_start": <int>,
+            "line_end": <int>,
+            "file_path": "<string>",
+            "message": "<string>",
+            "category": "<category>",
+            "severity": "<severity>",
+            "suggested_fix": "<string or null>"
+        }}
+    ],
+    "summary": "<overall summary of the code quality and main issues>"
+}}
+
+Categories must be one of: lint, security, performance, style, refactor, documentation, test
+Severity levels must be one of: low, medium, high, critical
+Only include suggestions with severity of {min_severity} or higher.
+
+Be specific in your suggestions and provide concrete examples of how to fix the issues when possible.
+Lines like "... [12 lines elided: license header] ..." stand in for content removed to save space; do not report issues on them.
+"""
+
+LOCAL_CHECKS_NOTE = "A linter already checked this file for {checks}; do not report those issues.\n"
+
+ELISION_MARKER = "... [{count} lines elided: {reason}] ..."
+TRUNCATION_MARKER = " ... [{count} chars truncated]"
+
+COMMENT_LINE = re.compile(r"^\s*(#|//|/\*|\*|--|;)")
+LICENSE_TERMS = re.compile(r"copyright|licen[cs]e|spdx-license-identifier|all rights reserved", re.IGNORECASE)
+QUOTED_STRING = re.compile(r"\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'")
+HEX_OR_KEYWORD = re.compile(r"\b(?:0[xX][0-9a-fA-F]+|True|False|None|true|false|null|nil)\b")
+LITERAL_ROW = re.compile(r"^[\s\d.,:+\-_eE\[\]{}()]*[,:][\s\d.,:+\-_eE\[\]{}()]*$")
+
+
+def infer_language(file_path: str) -> str:
+    """Try to infer language from file extension."""
+    extension = file_path.split(".")[-1].lower()
+    return LANGUAGE_MAP.get(extension, "unknown")
+
+
+@lru_cache(maxsize=256)
+def system_prompt(
+    language: str,
+    focus_areas: Tuple[str, ...],
+    min_severity: str,
+    local_checks: Tuple[str, ...] = ()
+) -> str:
+    """Render the system prompt; rendered prompts are cached per argument set."""
+    prompt = SYSTEM_PROMPT_TEMPLATE.format(
+        language=language,
+        focus_areas=", ".join(focus_areas),
+        min_severity=min_severity
+    )
+    if local_checks:
+        prompt += LOCAL_CHECKS_NOTE.format(checks=", ".join(local_checks))
+    return prompt
+
+
+@dataclass
+class CompactedCode:
+    """
+    Code prepared for a prompt, with a map back to the original lines.
+
+    line_starts[i] and line_ends[i] are the first and last original line
+    (1-based) covered by compacted line i + 1; an elision marker covers the
+    whole range it replaced.
+    """
+    code: str
+    line_starts: List[int] = field(default_factory=list)
+    line_ends: List[int] = field(default_factory=list)
+    original_tokens: int = 0
+    compacted_tokens: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+    def remap(self, suggestions: Sequence[ReviewSuggestion]) -> List[ReviewSuggestion]:
+        """Translate suggestion line numbers from compacted to original lines."""
+        if not self.line_starts:
+            return list(suggestions)
+        last = len(self.line_starts)
+        remapped = []
+        for sugg in suggestions:
+            start = self.line_starts[min(max(sugg.line_start, 1), last) - 1]
+            end = self.line_ends[min(max(sugg.line_end, 1), last) - 1]
+            remapped.append(sugg.model_copy(update={"line_start": start, "line_end": max(start, end)}))
+        return remapped
+
+
+def compact_code(
+    code: str,
+    count: Callable[[str], int],
+    max_blank_lines: int = 1,
+    max_line_length: int = 400,
+    literal_run_min: int = 20,
+    elide_license: bool = True
+) -> CompactedCode:
+    """
+    Shrink code for a prompt without losing track of its line numbers.
+
+    Trailing whitespace is stripped, blank runs are capped at
+    max_blank_lines, lines longer than max_line_length (minified or
+    vendored blobs) are truncated, a leading license header is replaced by a
+    marker line, and so is the middle of any run of at least literal_run_min
+    lines of pure literal data.
+    """
+    lines = code.splitlines()
+    license_start = _first_code_line(lines)
+    license_end = _license_header_end(lines) if elide_license else None
+    literal_runs = _literal_runs(lines, literal_run_min) if literal_run_min > 0 else {}
+
+    out: List[str] = []
+    starts: List[int] = []
+    ends: List[int] = []
+
+    def emit(text: str, first: int, last: int) -> None:
+        out.append(text)
+        starts.append(first + 1)
+        ends.append(last + 1)
+
+    i = 0
+    while i < len(lines):
+        if license_end is not None and i == license_start:
+            emit(ELISION_MARKER.format(count=license_end - i, reason="license header"), i, license_end - 1)
+            i = license_end
+            continue
+        if i in literal_runs:
+            end = literal_runs[i]
+            # Keep the head and tail of the table so its shape stays visible
+            emit(lines[i].rstrip(), i, i)
+            emit(lines[i + 1].rstrip(), i + 1, i + 1)
+            emit(ELISION_MARKER.format(count=end - i - 3, reason="literal data"), i + 2, end - 2)
+            emit(lines[end - 1].rstrip(), end - 1, end - 1)
+            i = end
+            continue
+        line = lines[i].rstrip()
+        if not line:
+            run_end = i
+            while run_end < len(lines) and not lines[run_end].strip():
+                run_end += 1
+            kept = min(run_end - i, max_blank_lines)
+            for offset in range(kept):
+                emit("", i + offset, run_end - 1 if offset == kept - 1 else i + offset)
+            i = run_end
+            continue
+        if max_line_length and len(line) > max_line_length:
+            line = line[:max_line_length] + TRUNCATION_MARKER.format(count=len(line) - max_line_length)
+        emit(line, i, i)
+        i += 1
+
+    compacted = "\n".join(out) + ("\n" if code.endswith("\n") and out else "")
+    if compacted == code:
+        tokens = count(code)
+        return CompactedCode(code=code, original_tokens=tokens, compacted_tokens=tokens)
+    return CompactedCode(
+        code=compacted,
+        line_starts=starts,
+        line_ends=ends,
+        original_tokens=count(code),
+        compacted_tokens=count(compacted)
+    )
+
+
+def _first_code_line(lines: List[str]) -> int:
+    # Shebang and encoding declarations must stay on the first lines
+    index = 0
+    while index < len(lines) and index < 2 and (
+        lines[index].startswith("#!") or re.match(r"^#.*coding[:=]", lines[index])
+    ):
+        index += 1
+    return index
+
+
+def _license_header_end(lines: List[str]) -> Optional[int]:
+    """Return the index just past a leading license comment block, if any."""
+    start = _first_code_line(lines)
+    end = start
+    while end < len(lines) and (COMMENT_LINE.match(lines[end]) or (end > start and not lines[end].strip())):
+        end += 1
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+    header = lines[start:end]
+    if len(header) >= 3 and LICENSE_TERMS.search("\n".join(header)):
+        return end
+    return None
+
+
+def _is_literal_row(line: str) -> bool:
+    stripped = HEX_OR_KEYWORD.sub("0", QUOTED_STRING.sub("0", line))
+    return bool(stripped.strip()) and bool(LITERAL_ROW.match(stripped))
+
+
+def _literal_runs(lines: List[str], min_length: int) -> Dict[int, int]:
+    """Map the start index of each long run of literal rows to its end index."""
+    runs = {}
+    i = 0
+    while i < len(lines):
+        if not _is_literal_row(lines[i]):
+            i += 1
+            continue
+        end = i
+        while end < len(lines) and _is_literal_row(lines[end]):
+            end += 1
+        if end - i >= max(min_length, 4):
+            runs[i] = end
+        i = end
+    return runs
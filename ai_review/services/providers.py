@@ -0,0 +1,99 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, cast
+
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletionMessageParam
+
+from ai_review.utils.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# Placeholder keys that mean "no key configured"
+PLACEHOLDER_API_KEYS = ("your_real_api_key_here", "your_openai_api_key_here")
+
+
+class LLMProvider(ABC):
+    """
+    Sends chat completion requests to an LLM.
+
+    Responses, streamed chunks and errors use the shapes and exception types
+    of the openai package, so the limiter, retries and parsing in
+    ai_review.services.llm work the same for every provider.
+    """
+    name: str = ""
+
+    @abstractmethod
+    def create_completion(self, model: str, messages: List[Dict[str, str]], stream: bool = False) -> Any:
+        """Send a chat completion request; with stream=True, return an iterator of chunks."""
+
+    @abstractmethod
+    async def create_completion_async(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        stream: bool = False
+    ) -> Any:
+        """Async variant of create_completion."""
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    The OpenAI API, or any server speaking its chat completions protocol
+    when base_url is set (e.g. the fake server in ai_review.api.fake_llm).
+    """
+    name = "openai"
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, timeout: float = 60.0):
+        # Retries are driven by llm_limiter so that 429s feed back into the concurrency limit
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+        self.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+
+    def create_completion(self, model: str, messages: List[Dict[str, str]], stream: bool = False) -> Any:
+        return self.client.chat.completions.create(
+            model=model,
+            messages=cast(List[ChatCompletionMessageParam], messages),
+            temperature=0.1,
+            response_format={"type": "json_object"},
+            stream=stream
+        )
+
+    async def create_completion_async(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        stream: bool = False
+    ) -> Any:
+        return await self.async_client.chat.completions.create(
+            model=model,
+            messages=cast(List[ChatCompletionMessageParam], messages),
+            temperature=0.1,
+            response_format={"type": "json_object"},
+            stream=stream
+        )
+
+
+def create_provider(config: Any) -> Optional[LLMProvider]:
+    """
+    Build the provider selected by config.LLM_PROVIDER.
+
+    "mock" returns None, meaning analyses use built-in mock results and no
+    requests are sent. "auto" picks "openai" when an API key or a base URL
+    is configured and "mock" otherwise.
+    """
+    api_key = config.OPENAI_API_KEY
+    if api_key in PLACEHOLDER_API_KEYS:
+        api_key = None
+
+    name = config.LLM_PROVIDER
+    if name == "auto":
+        name = "openai" if api_key or config.OPENAI_BASE_URL else "mock"
+    if name == "mock":
+        return None
+
+    logger.info(f"Using LLM provider {name} at {config.OPENAI_BASE_URL or 'api.openai.com'}")
+    # Local OpenAI-compatible servers usually accept any key
+    return OpenAIProvider(
+        api_key=api_key or "unused",
+        base_url=config.OPENAI_BASE_URL,
+        timeout=config.LLM_REQUEST_TIMEOUT_SECONDS
+    )
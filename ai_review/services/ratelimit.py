@@ -0,0 +1,240 @@
+import asyncio
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from ai_review.utils.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# Longest a waiter sleeps before re-checking, so released slots are picked up promptly
+POLL_INTERVAL = 0.05
+MAX_WAIT_STEP = 1.0
+
+
+class TokenBucket:
+    """
+    A bucket refilled continuously at rate_per_minute, holding at most one
+    minute's worth of budget.
+    """
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available; 0 if it is available now."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Remove amount from the bucket; it may go negative to record overuse."""
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        """Return unused budget to the bucket."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass
+class Permit:
+    """A granted request slot and the token budget reserved for it."""
+    tokens: int
+    acquired_at: float
+
+
+class AdaptiveLimiter:
+    """
+    Limit concurrent LLM requests to what the provider can actually serve.
+
+    Requests wait for a concurrency slot and for request (RPM) and token
+    (TPM) budget, in arrival order. The concurrency limit adapts AIMD-style:
+    it grows by roughly one slot per window of successful requests and is cut
+    multiplicatively on overload (429s, timeouts, 5xx) or when latency
+    exceeds the target. Only one cut is made per window of in-flight
+    requests, so a burst of 429s from requests sent under the old limit does
+    not collapse it. After an overload every waiter is held back until the
+    provider's Retry-After, or an exponential backoff, has passed.
+
+    Safe to share between threads and event loops.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        target_latency: float = 30.0,
+        decrease_factor: float = 0.5,
+        latency_decrease_factor: float = 0.9,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.latency_decrease_factor = latency_decrease_factor
+        self.max_backoff = max_backoff
+        self.limit = float(initial_concurrency or min_concurrency)
+        self.in_flight = 0
+        self._clock = clock
+        self._requests = TokenBucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self._lock = threading.Lock()
+        self._tickets = itertools.count()
+        self._waiting: deque = deque()
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        self._backoff = 1.0
+        self._granted = 0
+        self._overloaded = 0
+        self._total_wait = 0.0
+
+    def acquire(self, tokens: int) -> Permit:
+        """Block until a request using about tokens tokens may be sent."""
+        ticket = self._enqueue()
+        started = self._clock()
+        try:
+            while True:
+                delay = self._try_acquire(ticket, tokens, started)
+                if delay == 0:
+                    return Permit(tokens=tokens, acquired_at=self._clock())
+                time.sleep(delay)
+        finally:
+            self._dequeue(ticket)
+
+    async def acquire_async(self, tokens: int) -> Permit:
+        """Async variant of acquire."""
+        ticket = self._enqueue()
+        started = self._clock()
+        try:
+            while True:
+                delay = self._try_acquire(ticket, tokens, started)
+                if delay == 0:
+                    return Permit(tokens=tokens, acquired_at=self._clock())
+                await asyncio.sleep(delay)
+        finally:
+            self._dequeue(ticket)
+
+    def release(
+        self,
+        permit: Permit,
+        latency: Optional[float] = None,
+        overloaded: bool = False,
+        retry_after: Optional[float] = None,
+        used_tokens: Optional[int] = None
+    ) -> None:
+        """
+        Return a permit and feed the outcome of its request back.
+
+        Pass the request latency on completion, overloaded=True for a 429 or
+        other overload error, and used_tokens when the provider reports
+        actual usage. A permit released with neither latency nor overloaded
+        (e.g. a non-retryable error) does not move the limit.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            now = self._clock()
+            if self._tokens is not None and used_tokens is not None:
+                # Reconcile the reservation with what the provider actually counted
+                if used_tokens < permit.tokens:
+                    self._tokens.give(permit.tokens - used_tokens)
+                else:
+                    self._tokens.take(used_tokens - permit.tokens)
+
+            if overloaded:
+                self._overloaded += 1
+                self._decrease(permit, self.decrease_factor, now)
+                wait = retry_after if retry_after is not None else self._backoff * random.uniform(0.5, 1.0)
+                self._blocked_until = max(self._blocked_until, now + wait)
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+            elif latency is not None:
+                self._backoff = 1.0
+                if latency > self.target_latency:
+                    self._decrease(permit, self.latency_decrease_factor, now)
+                else:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limit and counters."""
+        with self._lock:
+            return {
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": len(self._waiting),
+                "granted": self._granted,
+                "overloaded": self._overloaded,
+                "avg_queue_wait": round(self._total_wait / self._granted, 4) if self._granted else 0.0,
+                "request_budget": round(self._requests.tokens, 1) if self._requests else None,
+                "token_budget": round(self._tokens.tokens, 1) if self._tokens else None,
+            }
+
+    def _enqueue(self) -> int:
+        with self._lock:
+            ticket = next(self._tickets)
+            self._waiting.append(ticket)
+            return ticket
+
+    def _dequeue(self, ticket: int) -> None:
+        with self._lock:
+            try:
+                self._waiting.remove(ticket)
+            except ValueError:
+                pass
+
+    def _try_acquire(self, ticket: int, tokens: int, started: float) -> float:
+        """Grant the slot and return 0, or return how long to wait before retrying."""
+        with self._lock:
+            now = self._clock()
+            if self._waiting[0] != ticket:
+                # Strict arrival order keeps large requests from starving
+                return POLL_INTERVAL
+            if now < self._blocked_until:
+                return min(self._blocked_until - now, MAX_WAIT_STEP)
+            if self.in_flight >= max(int(self.limit), self.min_concurrency):
+                return POLL_INTERVAL
+            delay = max(
+                self._requests.wait_time(1) if self._requests else 0.0,
+                self._tokens.wait_time(tokens) if self._tokens else 0.0,
+            )
+            if delay > 0:
+                return min(delay, MAX_WAIT_STEP)
+
+            if self._requests:
+                self._requests.take(1)
+            if self._tokens:
+                self._tokens.take(tokens)
+            self.in_flight += 1
+            self._granted += 1
+            self._total_wait += now - started
+            self._waiting.popleft()
+            return 0.0
+
+    def _decrease(self, permit: Permit, factor: float, now: float) -> None:
+        # Requests sent before the last cut reflect the old limit; ignore them
+        if permit.acquired_at < self._last_decrease:
+            return
+        previous = self.limit
+        self.limit = max(float(self.min_concurrency), self.limit * factor)
+        self._last_decrease = now
+        logger.warning(f"LLM concurrency limit reduced from {previous:.1f} to {self.limit:.1f}")
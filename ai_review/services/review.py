@@ -1,11 +1,74 @@
+import asyncio
+import time
 import uuid
-from typing import Dict, Any, List, Optional
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy.orm import Session
+import orjson
+from sqlalchemy import Row, Select, delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, Session
 
-from ai_review.db.models import Review, Suggestion
-from ai_review.models.review import ReviewRequest, ReviewResponse, ReviewSuggestion
-from ai_review.services.llm import analyze_code
+from ai_review.core.config import settings as app_settings
+from ai_review.db.models import Review, SourceBlob, Suggestion
+from ai_review.models.review import (
+    BatchReviewRequest,
+    BatchReviewResponse,
+    IncrementalReviewRequest,
+    ReviewRequest,
+    ReviewResponse,
+    ReviewSuggestion,
+    StageTimingStats,
+    TimingSummaryResponse,
+)
+from ai_review.services.blobs import decompress_source, store_sources, store_sources_async
+from ai_review.services.cache import review_cache
+from ai_review.services.chunking import merge_suggestions, remap_suggestions
+from ai_review.services.diff import apply_hunks, carry_forward_suggestions, diff_hunks, parse_unified_diff
+from ai_review.services.llm import analyze_code, analyze_code_async, stream_analyze_code
+from ai_review.services.streaming import format_sse
+from ai_review.services.timings import StageTimings, record_timings, summarize_timings
+
+# Columns returned by list_reviews; suggestion rows are never loaded
+REVIEW_LIST_COLUMNS = (
+    Review.id,
+    Review.file_path,
+    Review.language,
+    Review.summary,
+    Review.created_at,
+    Review.status,
+    Review.suggestion_count,
+)
+
+# Columns serialized by get_review_json, in ReviewResponse field order
+REVIEW_JSON_COLUMNS = (
+    Review.id,
+    Review.summary,
+    Review.execution_time,
+    Review.created_at,
+    Review.base_review_id,
+    Review.status,
+    Review.timings,
+)
+SUGGESTION_JSON_COLUMNS: Tuple[InstrumentedAttribute[Any], ...] = (
+    Suggestion.line_start,
+    Suggestion.line_end,
+    Suggestion.file_path,
+    Suggestion.message,
+    Suggestion.category,
+    Suggestion.severity,
+    Suggestion.suggested_fix,
+)
+SUGGESTION_JSON_FIELDS = tuple(column.key for column in SUGGESTION_JSON_COLUMNS)
+
+# Only reviews in these statuses are cached; pending ones are about to change
+CACHEABLE_STATUSES = ("completed", "failed")
+# Cached response variants of a review, by include_timings
+REVIEW_CACHE_VARIANTS = ("", "timings")
+
+
+class BaseMismatchError(ValueError):
+    """An incremental diff that does not apply to its base review's source."""
 
 
 def create_review(request: ReviewRequest, db: Session) -> ReviewResponse:
@@ -15,48 +78,38 @@ def create_review(request: ReviewRequest, db: Session) -> ReviewResponse:
     # Generate a unique ID for this review
     review_id = str(uuid.uuid4())
     
-    # Analyze code using LLM
-    analysis_result = analyze_code(
-        code=request.code,
-        file_path=request.file_path,
-        language=request.language,
-        settings=request.settings
-    )
-    
-    # Create database record
-    db_review = Review(
-        id=review_id,
-        file_path=request.file_path,
-        language=request.language or "unknown",
-        summary=analysis_result["summary"],
-        execution_time=analysis_result["execution_time"],
-        settings=request.settings or {},
-        status="completed"
-    )
-    db.add(db_review)
-    
-    # Create suggestion records
-    for sugg in analysis_result["suggestions"]:
-        db_suggestion = Suggestion(
-            review_id=review_id,
-            line_start=sugg.line_start,
-            line_end=sugg.line_end,
-            file_path=sugg.file_path,
-            message=sugg.message,
-            category=sugg.category,
-            severity=sugg.severity,
-            suggested_fix=sugg.suggested_fix
+    with record_timings() as timings:
+        # Analyze code using LLM
+        analysis_result = analyze_code(
+            code=request.code,
+            file_path=request.file_path,
+            language=request.language,
+            settings=request.settings,
+            use_cache=request.use_cache,
+            refresh_cache=request.refresh_cache
         )
-        db.add(db_suggestion)
-    
-    db.commit()
+        
+        with timings.stage("db_write"):
+            # Create database record, storing the source once per unique content
+            source_sha256 = store_sources(db, [request.code])[0]
+            db_review = build_review_record(review_id, request, analysis_result, source_sha256)
+            db.add(db_review)
+            
+            # Create suggestion records in one bulk insert
+            insert_suggestions(db, build_suggestion_rows(review_id, analysis_result["suggestions"]))
+        
+        stamp_timings(db_review, timings)
+        with timings.stage("db_commit"):
+            db.commit()
     
     # Return API response
     return ReviewResponse(
         review_id=review_id,
         suggestions=analysis_result["suggestions"],
         summary=analysis_result["summary"],
-        execution_time=analysis_result["execution_time"]
+        execution_time=analysis_result["execution_time"],
+        prompt_tokens_saved=analysis_result.get("prompt_tokens_saved"),
+        timings=timings.as_dict()
     )
 
 
@@ -70,46 +123,83 @@ def get_review(review_id: str, db: Session) -> Optional[ReviewResponse]:
     
     db_suggestions = db.query(Suggestion).filter(Suggestion.review_id == review_id).all()
     
-    suggestions = [
-        ReviewSuggestion(
-            line_start=sugg.line_start,
-            line_end=sugg.line_end,
-            file_path=sugg.file_path,
-            message=sugg.message,
-            category=sugg.category,
-            severity=sugg.severity,
-            suggested_fix=sugg.suggested_fix
-        )
-        for sugg in db_suggestions
-    ]
+    return _review_response(db_review, db_suggestions)
+
+
+def get_review_json(review_id: str, db: Session, include_timings: bool = False) -> Optional[bytes]:
+    """
+    Retrieve a review by ID as ReviewResponse JSON.
     
-    return ReviewResponse(
-        review_id=db_review.id,
-        suggestions=suggestions,
-        summary=db_review.summary,
-        execution_time=db_review.execution_time,
-        created_at=db_review.created_at
-    )
+    The JSON is encoded straight from the selected columns; rows from our
+    own database need no pydantic validation, and no ORM or model objects
+    are built. Stage timings are included only with include_timings.
+    
+    Completed reviews only change on rerun, so they are served from the
+    review cache when possible and cached after a database read.
+    """
+    variant = _cache_variant(include_timings)
+    payload = review_cache.get(review_id, variant)
+    if payload is not None:
+        return payload
+    # Taken before the read, so a rerun committed meanwhile keeps its result from being cached
+    version = review_cache.version(review_id)
+    review = db.execute(_review_json_query(review_id)).first()
+    if review is None:
+        return None
+    suggestions = db.execute(_suggestion_json_query(review_id)).all()
+    payload = _review_json(review, suggestions, include_timings)
+    if review.status in CACHEABLE_STATUSES:
+        review_cache.set(review_id, payload, variant, version)
+    return payload
 
 
-def list_reviews(skip: int = 0, limit: int = 100, db: Session = None) -> List[Dict[str, Any]]:
+def list_reviews(
+    skip: int = 0,
+    limit: int = 100,
+    db: Optional[Session] = None,
+    after: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """
-    List all reviews with pagination.
+    List all reviews, newest first.
+    
+    Pass the cursor of the last row seen as after to fetch the next page;
+    keyset pagination keeps the cost of a page independent of its depth.
     """
-    db_reviews = db.query(Review).order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+    if db is None:
+        raise ValueError("A database session is required")
+    rows = db.execute(_list_reviews_query(skip, limit, after))
     
-    return [
-        {
-            "id": review.id,
-            "file_path": review.file_path,
-            "language": review.language,
-            "summary": review.summary,
-            "created_at": review.created_at,
-            "status": review.status,
-            "suggestion_count": len(review.suggestions)
-        }
-        for review in db_reviews
-    ]
+    return [dict(row) for row in rows.mappings()]
+
+
+def encode_cursor(review: Dict[str, Any]) -> str:
+    """Build the pagination cursor pointing just after a listed review."""
+    return f"{review['created_at'].isoformat()},{review['id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Parse a cursor produced by encode_cursor."""
+    try:
+        created_at, review_id = cursor.rsplit(",", 1)
+        return datetime.fromisoformat(created_at), review_id
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def next_cursor(reviews: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """Return the cursor for the next page, or None on the last page."""
+    if len(reviews) < limit or not reviews:
+        return None
+    return encode_cursor(reviews[-1])
+
+
+def _list_reviews_query(skip: int, limit: int, after: Optional[str]) -> Select:
+    query = select(*REVIEW_LIST_COLUMNS).order_by(Review.created_at.desc(), Review.id.desc())
+    if after:
+        query = query.where(tuple_(Review.created_at, Review.id) < decode_cursor(after))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
 
 
 def rerun_review(review_id: str, db: Session) -> ReviewResponse:
@@ -133,56 +223,614 @@ def rerun_review(review_id: str, db: Session) -> ReviewResponse:
         settings=db_review.settings
     )
     
-    # Delete previous suggestions
-    db.query(Suggestion).filter(Suggestion.review_id == review_id).delete()
+    with record_timings() as timings:
+        # Delete previous suggestions
+        db.query(Suggestion).filter(Suggestion.review_id == review_id).delete()
+        
+        # Run analysis again, replacing any cached result
+        analysis_result = analyze_code(
+            code=request.code,
+            file_path=request.file_path,
+            language=request.language,
+            settings=request.settings,
+            refresh_cache=True
+        )
+        
+        with timings.stage("db_write"):
+            # Update review record
+            db_review.summary = analysis_result["summary"]
+            db_review.execution_time = analysis_result["execution_time"]
+            db_review.suggestion_count = len(analysis_result["suggestions"])
+            
+            # Create new suggestion records
+            insert_suggestions(db, build_suggestion_rows(review_id, analysis_result["suggestions"]))
+        
+        stamp_timings(db_review, timings)
+        with timings.stage("db_commit"):
+            db.commit()
+    # After the commit; reads that started before it see a new version and do not cache
+    review_cache.invalidate(review_id, REVIEW_CACHE_VARIANTS)
     
-    # Run analysis again
-    analysis_result = analyze_code(
-        code=request.code,
-        file_path=request.file_path,
-        language=request.language,
-        settings=request.settings
+    # Return API response
+    return ReviewResponse(
+        review_id=review_id,
+        suggestions=analysis_result["suggestions"],
+        summary=analysis_result["summary"],
+        execution_time=analysis_result["execution_time"],
+        prompt_tokens_saved=analysis_result.get("prompt_tokens_saved"),
+        timings=timings.as_dict()
     )
+
+
+def get_code_for_review(review_id: str, db: Session) -> str:
+    """
+    Get the original code for a review.
     
-    # Update review record
-    db_review.summary = analysis_result["summary"]
-    db_review.execution_time = analysis_result["execution_time"]
+    Raises ValueError if the review predates source storage.
+    """
+    code = _decode_source(db.scalar(_review_source_query(review_id)))
+    if code is None:
+        raise ValueError(f"No source code stored for review {review_id}")
+    return code
+
+
+async def get_code_for_review_async(review_id: str, db: AsyncSession) -> str:
+    """
+    Async variant of get_code_for_review.
+    """
+    code = await _load_review_source_async(review_id, db)
+    if code is None:
+        raise ValueError(f"No source code stored for review {review_id}")
+    return code
+
+
+async def _load_review_source_async(review_id: str, db: AsyncSession) -> Optional[str]:
+    return _decode_source(await db.scalar(_review_source_query(review_id)))
+
+
+def _review_source_query(review_id: str) -> Select:
+    return (
+        select(SourceBlob.data)
+        .join(Review, Review.source_sha256 == SourceBlob.sha256)
+        .where(Review.id == review_id)
+    )
+
+
+def _decode_source(data: Optional[bytes]) -> Optional[str]:
+    return decompress_source(data) if data is not None else None
+
+
+async def create_review_async(request: ReviewRequest, db: AsyncSession) -> ReviewResponse:
+    """
+    Async variant of create_review that never blocks the event loop.
+    """
+    review_id = str(uuid.uuid4())
     
-    # Create new suggestion records
-    for sugg in analysis_result["suggestions"]:
-        db_suggestion = Suggestion(
-            review_id=review_id,
-            line_start=sugg.line_start,
-            line_end=sugg.line_end,
-            file_path=sugg.file_path,
-            message=sugg.message,
-            category=sugg.category,
-            severity=sugg.severity,
-            suggested_fix=sugg.suggested_fix
+    with record_timings() as timings:
+        analysis_result = await analyze_code_async(
+            code=request.code,
+            file_path=request.file_path,
+            language=request.language,
+            settings=request.settings,
+            use_cache=request.use_cache,
+            refresh_cache=request.refresh_cache
         )
-        db.add(db_suggestion)
+        
+        with timings.stage("db_write"):
+            source_sha256 = (await store_sources_async(db, [request.code]))[0]
+            db_review = build_review_record(review_id, request, analysis_result, source_sha256)
+            db.add(db_review)
+            await insert_suggestions_async(db, build_suggestion_rows(review_id, analysis_result["suggestions"]))
+        stamp_timings(db_review, timings)
+        with timings.stage("db_commit"):
+            await db.commit()
     
-    db.commit()
+    return ReviewResponse(
+        review_id=review_id,
+        suggestions=analysis_result["suggestions"],
+        summary=analysis_result["summary"],
+        execution_time=analysis_result["execution_time"],
+        prompt_tokens_saved=analysis_result.get("prompt_tokens_saved"),
+        timings=timings.as_dict()
+    )
+
+
+# Saves of streamed reviews, referenced until they finish
+_pending_saves: Set["asyncio.Task[None]"] = set()
+
+
+async def stream_review_async(
+    request: ReviewRequest,
+    session_factory: Callable[[], AsyncSession],
+    include_timings: bool = False
+) -> AsyncIterator[str]:
+    """
+    Review code and stream the results as server-sent events.
+    
+    Emits a "suggestion" event per suggestion as soon as the LLM completes
+    it, then "summary", then "done" with the id of the persisted review and
+    the final suggestions, which merging may have changed from the streamed
+    ones (plus stage timings with include_timings). The session is opened
+    here because the stream outlives the request handler, and the review is
+    saved in its own task so a client that disconnects does not cancel it.
+    """
+    review_id = str(uuid.uuid4())
+    analysis_result: Dict[str, Any] = {}
+    
+    with record_timings() as timings:
+        async for event, data in stream_analyze_code(
+            code=request.code,
+            file_path=request.file_path,
+            language=request.language,
+            settings=request.settings,
+            use_cache=request.use_cache,
+            refresh_cache=request.refresh_cache
+        ):
+            if event == "suggestion":
+                yield format_sse("suggestion", data.model_dump(mode="json"))
+            else:
+                analysis_result = data
+        
+        async def save() -> None:
+            async with session_factory() as db:
+                with timings.stage("db_write"):
+                    source_sha256 = (await store_sources_async(db, [request.code]))[0]
+                    db_review = build_review_record(review_id, request, analysis_result, source_sha256)
+                    db.add(db_review)
+                    await insert_suggestions_async(
+                        db, build_suggestion_rows(review_id, analysis_result["suggestions"])
+                    )
+                stamp_timings(db_review, timings)
+                with timings.stage("db_commit"):
+                    await db.commit()
+        
+        # Started before the next yield, where a disconnect closes the stream
+        saving = asyncio.create_task(save())
+        _pending_saves.add(saving)
+        saving.add_done_callback(_pending_saves.discard)
+        
+        if analysis_result.get("error"):
+            yield format_sse("error", {"detail": analysis_result["summary"]})
+        yield format_sse("summary", {"summary": analysis_result["summary"]})
+        await asyncio.shield(saving)
+    
+    done = {
+        "review_id": review_id,
+        "suggestions": [sugg.model_dump(mode="json") for sugg in analysis_result["suggestions"]],
+        "execution_time": analysis_result["execution_time"],
+        "prompt_tokens_saved": analysis_result.get("prompt_tokens_saved")
+    }
+    if include_timings:
+        done["timings"] = timings.as_dict()
+    yield format_sse("done", done)
+
+
+async def create_reviews_batch_async(request: BatchReviewRequest, db: AsyncSession) -> BatchReviewResponse:
+    """
+    Review many files at once.
+    
+    Files are analyzed concurrently, bounded by the request's max_concurrency
+    (capped at BATCH_MAX_CONCURRENCY), and all results are persisted in a
+    single transaction.
+    """
+    if len(request.reviews) > app_settings.BATCH_MAX_SIZE:
+        raise ValueError(f"Batch size exceeds the limit of {app_settings.BATCH_MAX_SIZE} reviews")
+    
+    batch_id = str(uuid.uuid4())
+    concurrency = min(
+        request.max_concurrency or app_settings.BATCH_MAX_CONCURRENCY,
+        app_settings.BATCH_MAX_CONCURRENCY
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def analyze(item: ReviewRequest) -> Tuple[Dict[str, Any], StageTimings]:
+        # Each file is timed on its own; the task runs in its own context
+        with record_timings() as timings:
+            with timings.stage("queue"):
+                await semaphore.acquire()
+            try:
+                return await analyze_code_async(
+                    code=item.code,
+                    file_path=item.file_path,
+                    language=item.language,
+                    settings=item.settings,
+                    use_cache=item.use_cache,
+                    refresh_cache=item.refresh_cache
+                ), timings
+            finally:
+                semaphore.release()
+    
+    analyzed = await asyncio.gather(*(analyze(item) for item in request.reviews))
+    
+    # The batch is written in one transaction, so every file shares its write and commit times
+    write_started = time.perf_counter()
+    source_hashes = await store_sources_async(db, [item.code for item in request.reviews])
+    review_ids = [str(uuid.uuid4()) for _ in request.reviews]
+    db_reviews = []
+    suggestion_rows = []
+    for review_id, item, (analysis_result, _), source_sha256 in zip(
+        review_ids, request.reviews, analyzed, source_hashes
+    ):
+        db_review = build_review_record(review_id, item, analysis_result, source_sha256)
+        db_review.batch_id = batch_id
+        db.add(db_review)
+        db_reviews.append(db_review)
+        suggestion_rows.extend(build_suggestion_rows(review_id, analysis_result["suggestions"]))
+    await insert_suggestions_async(db, suggestion_rows)
+    write_time = time.perf_counter() - write_started
+    for db_review, (_, timings) in zip(db_reviews, analyzed):
+        timings.add("db_write", write_time)
+        stamp_timings(db_review, timings)
+    commit_started = time.perf_counter()
+    await db.commit()
+    commit_time = time.perf_counter() - commit_started
+    
+    results = []
+    for review_id, (analysis_result, timings) in zip(review_ids, analyzed):
+        timings.add("db_commit", commit_time)
+        results.append(
+            ReviewResponse(
+                review_id=review_id,
+                suggestions=analysis_result["suggestions"],
+                summary=analysis_result["summary"],
+                execution_time=analysis_result["execution_time"],
+                prompt_tokens_saved=analysis_result.get("prompt_tokens_saved"),
+                timings=timings.as_dict()
+            )
+        )
+    
+    return BatchReviewResponse(batch_id=batch_id, results=results)
+
+
+async def create_incremental_review_async(
+    request: IncrementalReviewRequest, db: AsyncSession
+) -> ReviewResponse:
+    """
+    Review only the hunks that changed since a base review.
+    
+    Each changed hunk, with its surrounding context lines, is analyzed on its
+    own; suggestions from the base review on untouched lines are shifted onto
+    the new line numbers and carried forward. The result is stored as a new
+    review linked to the base.
+    
+    Raises BaseMismatchError, before anything is stored, if the diff was not
+    taken against the base review's stored source.
+    """
+    base_review = await db.get(Review, request.base_review_id)
+    if not base_review:
+        raise ValueError(f"Review with ID {request.base_review_id} not found")
+    
+    file_path = request.file_path or base_review.file_path
+    settings = request.settings if request.settings is not None else base_review.settings
+    start_time = time.time()
+    
+    with record_timings() as timings:
+        base_code = await _load_review_source_async(base_review.id, db)
+        if request.diff is not None:
+            hunks = parse_unified_diff(request.diff)
+            # Reconstruct the new version so it can be re-reviewed later
+            new_code = apply_hunks(base_code, hunks) if base_code is not None else None
+            if base_code is not None and new_code is None:
+                # Line shifts from a diff of another version would misplace every suggestion
+                raise BaseMismatchError(f"Diff does not apply to the source of review {base_review.id}")
+        else:
+            if base_code is None:
+                raise ValueError(f"No source code stored for review {base_review.id}")
+            # The request's validator guarantees code when there is no diff
+            new_code = request.code or ""
+            hunks = diff_hunks(base_code, new_code, request.context_lines)
+        
+        base_suggestions = _to_suggestions(
+            (await db.scalars(select(Suggestion).where(Suggestion.review_id == base_review.id))).all()
+        )
+        carried = carry_forward_suggestions(base_suggestions, hunks)
+        # Release the connection while the LLM runs; with a single SQLite writer
+        # holding it would stall every other write for the whole analysis
+        await db.commit()
+        
+        excerpts = [hunk.excerpt() for hunk in hunks]
+        excerpts = [excerpt for excerpt in excerpts if excerpt.code]
+        analysis_results = await asyncio.gather(*(
+            analyze_code_async(
+                code=excerpt.code,
+                file_path=file_path,
+                language=base_review.language,
+                settings={**(settings or {}), "fragment": True},
+                use_cache=request.use_cache
+            )
+            for excerpt in excerpts
+        ))
+        
+        new_suggestions = []
+        summaries = []
+        for excerpt, result in zip(excerpts, analysis_results):
+            new_suggestions.extend(remap_suggestions(result["suggestions"], excerpt))
+            summaries.append(result["summary"])
+        
+        analysis_result: Dict[str, Any] = {
+            "suggestions": merge_suggestions(new_suggestions + carried),
+            "summary": " ".join(
+                [f"Incremental review of {len(excerpts)} changed hunk(s); "
+                 f"{len(carried)} suggestion(s) carried forward from review {base_review.id}."]
+                + summaries
+            ),
+            "execution_time": time.time() - start_time,
+            "prompt_tokens_saved": sum(result.get("prompt_tokens_saved") or 0 for result in analysis_results)
+        }
+        
+        with timings.stage("db_write"):
+            review_id = str(uuid.uuid4())
+            source_sha256 = (await store_sources_async(db, [new_code]))[0] if new_code is not None else None
+            db_review = Review(
+                id=review_id,
+                file_path=file_path,
+                language=base_review.language,
+                summary=analysis_result["summary"],
+                execution_time=analysis_result["execution_time"],
+                settings=settings or {},
+                status="completed",
+                base_review_id=base_review.id,
+                suggestion_count=len(analysis_result["suggestions"]),
+                source_sha256=source_sha256
+            )
+            db.add(db_review)
+            await insert_suggestions_async(db, build_suggestion_rows(review_id, analysis_result["suggestions"]))
+        stamp_timings(db_review, timings)
+        with timings.stage("db_commit"):
+            await db.commit()
     
-    # Return API response
     return ReviewResponse(
         review_id=review_id,
         suggestions=analysis_result["suggestions"],
         summary=analysis_result["summary"],
-        execution_time=analysis_result["execution_time"]
+        execution_time=analysis_result["execution_time"],
+        prompt_tokens_saved=analysis_result.get("prompt_tokens_saved"),
+        base_review_id=base_review.id,
+        timings=timings.as_dict()
     )
 
 
-def get_code_for_review(review_id: str, db: Session) -> str:
+async def get_review_async(review_id: str, db: AsyncSession) -> Optional[ReviewResponse]:
     """
-    Get the original code for a review.
-    In a real implementation, this would retrieve from storage.
-    For demo purposes, we return a sample code.
-    """
-    # This is a placeholder. In production, you should store and retrieve the actual code.
-    return """def example():
-    # This is a sample code
-    x = 10
-    y = 20
-    return x + y
-""" 
\ No newline at end of file
+    Async variant of get_review.
+    """
+    db_review = await db.get(Review, review_id)
+    if not db_review:
+        return None
+    
+    db_suggestions = (
+        await db.scalars(select(Suggestion).where(Suggestion.review_id == review_id))
+    ).all()
+    
+    return _review_response(db_review, db_suggestions)
+
+
+async def get_review_json_async(
+    review_id: str, db: AsyncSession, include_timings: bool = False
+) -> Optional[bytes]:
+    """
+    Async variant of get_review_json.
+    """
+    variant = _cache_variant(include_timings)
+    payload = await review_cache.get_async(review_id, variant)
+    if payload is not None:
+        return payload
+    version = await review_cache.version_async(review_id)
+    review = (await db.execute(_review_json_query(review_id))).first()
+    if review is None:
+        return None
+    suggestions = (await db.execute(_suggestion_json_query(review_id))).all()
+    payload = _review_json(review, suggestions, include_timings)
+    if review.status in CACHEABLE_STATUSES:
+        await review_cache.set_async(review_id, payload, variant, version)
+    return payload
+
+
+async def list_reviews_async(
+    skip: int = 0,
+    limit: int = 100,
+    db: Optional[AsyncSession] = None,
+    after: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Async variant of list_reviews.
+    """
+    if db is None:
+        raise ValueError("A database session is required")
+    rows = await db.execute(_list_reviews_query(skip, limit, after))
+    
+    return [dict(row) for row in rows.mappings()]
+
+
+async def rerun_review_async(review_id: str, db: AsyncSession) -> ReviewResponse:
+    """
+    Async variant of rerun_review.
+    """
+    db_review = await db.get(Review, review_id)
+    if not db_review:
+        raise ValueError(f"Review with ID {review_id} not found")
+    code = await get_code_for_review_async(review_id, db)
+    await db.commit()
+    
+    with record_timings() as timings:
+        analysis_result = await analyze_code_async(
+            code=code,
+            file_path=db_review.file_path,
+            language=db_review.language,
+            settings=db_review.settings,
+            refresh_cache=True
+        )
+        
+        with timings.stage("db_write"):
+            await db.execute(delete(Suggestion).where(Suggestion.review_id == review_id))
+            db_review.summary = analysis_result["summary"]
+            db_review.execution_time = analysis_result["execution_time"]
+            db_review.suggestion_count = len(analysis_result["suggestions"])
+            await insert_suggestions_async(db, build_suggestion_rows(review_id, analysis_result["suggestions"]))
+        stamp_timings(db_review, timings)
+        with timings.stage("db_commit"):
+            await db.commit()
+    await review_cache.invalidate_async(review_id, REVIEW_CACHE_VARIANTS)
+    
+    return ReviewResponse(
+        review_id=review_id,
+        suggestions=analysis_result["suggestions"],
+        summary=analysis_result["summary"],
+        execution_time=analysis_result["execution_time"],
+        prompt_tokens_saved=analysis_result.get("prompt_tokens_saved"),
+        timings=timings.as_dict()
+    )
+
+
+async def get_timing_summary_async(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    language: Optional[str] = None,
+    limit: int = 1000
+) -> TimingSummaryResponse:
+    """
+    Aggregate the stage timings of the most recent reviews.
+    
+    Covers up to limit reviews created at or after since, optionally only
+    those in one language; reviews stored before timings were recorded are
+    skipped.
+    """
+    query = (
+        select(Review.timings)
+        .where(Review.timings.is_not(None))
+        .order_by(Review.created_at.desc())
+        .limit(limit)
+    )
+    if since is not None:
+        query = query.where(Review.created_at >= since)
+    if language is not None:
+        query = query.where(Review.language == language)
+    breakdowns = [timings for timings in (await db.scalars(query)).all() if timings]
+    
+    return TimingSummaryResponse(
+        reviews=len(breakdowns),
+        since=since,
+        language=language,
+        stages={name: StageTimingStats.model_validate(stats) for name, stats in summarize_timings(breakdowns).items()}
+    )
+
+
+def build_review_record(
+    review_id: str,
+    request: ReviewRequest,
+    analysis_result: Dict[str, Any],
+    source_sha256: Optional[str] = None
+) -> Review:
+    """Build the Review row for an analysis result."""
+    return Review(
+        id=review_id,
+        file_path=request.file_path,
+        language=request.language or "unknown",
+        summary=analysis_result["summary"],
+        execution_time=analysis_result["execution_time"],
+        settings=request.settings or {},
+        status="completed",
+        suggestion_count=len(analysis_result.get("suggestions", [])),
+        source_sha256=source_sha256
+    )
+
+
+def stamp_timings(db_review: Review, timings: StageTimings) -> None:
+    """
+    Store the breakdown recorded so far on a review row, with its total.
+    
+    Call just before the commit; the commit's own duration is only added to
+    the response, since the row cannot record it.
+    """
+    timings.finish()
+    db_review.timings = timings.as_dict()
+
+
+def build_suggestion_rows(review_id: str, suggestions: List[ReviewSuggestion]) -> List[Dict[str, Any]]:
+    """Build Suggestion rows for a bulk insert."""
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "review_id": review_id,
+            "line_start": sugg.line_start,
+            "line_end": sugg.line_end,
+            "file_path": sugg.file_path,
+            "message": sugg.message,
+            "category": sugg.category,
+            "severity": sugg.severity,
+            "suggested_fix": sugg.suggested_fix
+        }
+        for sugg in suggestions
+    ]
+
+
+def insert_suggestions(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Insert suggestion rows with a single executemany round trip."""
+    if rows:
+        # The parent review must exist before its suggestions reference it
+        db.flush()
+        db.execute(insert(Suggestion), rows)
+
+
+async def insert_suggestions_async(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Async variant of insert_suggestions."""
+    if rows:
+        await db.flush()
+        await db.execute(insert(Suggestion), rows)
+
+
+def _to_suggestions(db_suggestions: Sequence[Suggestion]) -> List[ReviewSuggestion]:
+    """Convert Suggestion rows into API models."""
+    return [
+        ReviewSuggestion(
+            line_start=sugg.line_start,
+            line_end=sugg.line_end,
+            file_path=sugg.file_path,
+            message=sugg.message,
+            category=sugg.category,
+            severity=sugg.severity,
+            suggested_fix=sugg.suggested_fix
+        )
+        for sugg in db_suggestions
+    ]
+
+
+def _cache_variant(include_timings: bool) -> str:
+    return "timings" if include_timings else ""
+
+
+def _review_json_query(review_id: str) -> Select:
+    return select(*REVIEW_JSON_COLUMNS).where(Review.id == review_id)
+
+
+def _suggestion_json_query(review_id: str) -> Select:
+    return select(*SUGGESTION_JSON_COLUMNS).where(Suggestion.review_id == review_id)
+
+
+def _review_json(review: Row, suggestions: Sequence[Row], include_timings: bool) -> bytes:
+    """Encode a review and its suggestion rows exactly as ReviewResponse would."""
+    return orjson.dumps({
+        "review_id": review.id,
+        "suggestions": [dict(zip(SUGGESTION_JSON_FIELDS, row)) for row in suggestions],
+        "summary": review.summary,
+        "execution_time": review.execution_time,
+        "created_at": review.created_at,
+        "base_review_id": review.base_review_id,
+        "status": review.status,
+        "prompt_tokens_saved": None,
+        "timings": review.timings if include_timings else None,
+    })
+
+
+def _review_response(db_review: Review, db_suggestions: Sequence[Suggestion]) -> ReviewResponse:
+    """Build the API response for a stored review."""
+    return ReviewResponse(
+        review_id=db_review.id,
+        suggestions=_to_suggestions(db_suggestions),
+        summary=db_review.summary,
+        execution_time=db_review.execution_time,
+        created_at=db_review.created_at,
+        base_review_id=db_review.base_review_id,
+        status=db_review.status,
+        timings=db_review.timings
+    )
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ai_review.db.models import AnalysisLease
+
+
+class _LeaderCancelled(Exception):
+    """Set on a flight whose leader was cancelled; its followers start a new flight."""
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the work; callers arriving while it is
+    in flight wait for and share its result (or exception). Sync callers in
+    any thread and async callers in any event loop share the same flights.
+
+    Cancelling a follower only stops that follower's wait. Cancelling the
+    leader does not fail its followers: one of them runs the work again as
+    the new leader.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn, or join the flight for key. Returns (result, shared)."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result(), True
+            except _LeaderCancelled:
+                continue
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._leave(key)
+        return future.result(), False
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async variant of do."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                # Shielded: a cancelled follower must not cancel the shared future
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except _LeaderCancelled:
+                continue
+        try:
+            future.set_result(await fn())
+        except asyncio.CancelledError:
+            # Leave first, so the followers woken below start a fresh flight
+            self._leave(key)
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._leave(key)
+        return future.result(), False
+
+    def in_flight(self) -> int:
+        """Return the number of keys currently being computed."""
+        with self._lock:
+            return len(self._flights)
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._flights[key] = future
+            return future, True
+
+    def _leave(self, key: str) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+
+
+class DatabaseLease:
+    """
+    Cross-process mutual exclusion on a key, backed by the analysis_leases table.
+
+    A lease expires after ttl seconds so a crashed holder cannot block the
+    key forever. Processes that fail to acquire a lease poll until the
+    holder publishes its result or gives the lease up.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl: float = 300,
+        poll_interval: float = 0.5
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.owner = uuid.uuid4().hex
+
+    def acquire(self, key: str) -> bool:
+        """Try to take the lease for key without waiting."""
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            # Take over leases whose holder died
+            db.execute(delete(AnalysisLease).where(AnalysisLease.key == key, AnalysisLease.expires_at < now))
+            db.add(AnalysisLease(key=key, owner=self.owner, expires_at=now + timedelta(seconds=self.ttl)))
+            try:
+                db.commit()
+                return True
+            except IntegrityError:
+                db.rollback()
+                return False
+
+    def release(self, key: str) -> None:
+        """Give up the lease for key if this process holds it."""
+        with self.session_factory() as db:
+            db.execute(delete(AnalysisLease).where(AnalysisLease.key == key, AnalysisLease.owner == self.owner))
+            db.commit()
+
+    def is_held(self, key: str) -> bool:
+        """Return True while some process holds an unexpired lease for key."""
+        with self.session_factory() as db:
+            expires_at = db.scalar(select(AnalysisLease.expires_at).where(AnalysisLease.key == key))
+        return expires_at is not None and expires_at >= datetime.utcnow()
+
+    def wait(self, key: str, ready: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Wait for the holder of key to finish.
+
+        Returns the first non-None value of ready(), or None once the lease
+        is released or expires without one.
+        """
+        deadline = time.monotonic() + self.ttl
+        while True:
+            value = ready()
+            if value is not None:
+                return value
+            if not self.is_held(key) or time.monotonic() >= deadline:
+                return ready()
+            time.sleep(self.poll_interval)
+
+    async def wait_async(self, key: str, ready: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """Async variant of wait; ready is called in a worker thread."""
+        deadline = time.monotonic() + self.ttl
+        while True:
+            value = await asyncio.to_thread(ready)
+            if value is not None:
+                return value
+            if not await asyncio.to_thread(self.is_held, key) or time.monotonic() >= deadline:
+                return await asyncio.to_thread(ready)
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,81 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+SUGGESTIONS_KEY = re.compile(r'"suggestions"\s*:\s*$')
+
+
+class SuggestionStreamParser:
+    """
+    Incremental parser for the analysis JSON produced by the LLM.
+
+    Text deltas are fed in as they arrive; every object in the top-level
+    "suggestions" array is returned as soon as its closing brace is seen,
+    without waiting for the rest of the document.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_depth: Optional[int] = None
+        self._array_closed = False
+        self._object_start: Optional[int] = None
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        """Consume a text delta and return any suggestions completed by it."""
+        self._buffer += delta
+        completed = []
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if (
+                    char == "["
+                    and self._array_depth is None
+                    and not self._array_closed
+                    and self._depth == 1
+                    and SUGGESTIONS_KEY.search(self._buffer, 0, self._pos)
+                ):
+                    self._array_depth = self._depth + 1
+                elif char == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._object_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._object_start is not None and self._depth == self._array_depth:
+                    suggestion = self._decode(self._buffer[self._object_start:self._pos + 1])
+                    if suggestion is not None:
+                        completed.append(suggestion)
+                    self._object_start = None
+                elif char == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    self._array_depth = None
+                    self._array_closed = True
+            self._pos += 1
+        return completed
+
+    def result(self) -> Dict[str, Any]:
+        """Parse the complete document once the stream has finished."""
+        return json.loads(self._buffer)
+
+    @staticmethod
+    def _decode(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return None
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
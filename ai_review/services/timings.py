@@ -0,0 +1,151 @@
+"""
+Per-stage timing breakdown of a review.
+
+A review opens a StageTimings with record_timings(); code anywhere below it
+(the cache, the local analyzers, prompt building, the LLM limiter and
+provider calls, response parsing) adds to the current breakdown through
+stage() and add_stage(). The breakdown travels in a context variable, so
+it follows the review into asyncio tasks and to_thread calls without being
+passed around, and recording is a no-op outside a review.
+
+Stages, in seconds:
+    queue            waiting for a background worker or a batch slot
+    cache_lookup     reading the analysis cache
+    coalesce_wait    waiting on an identical analysis run by another request
+    local_analysis   the local analyzers
+    prompt_build     compaction, chunking, prompt rendering and token counting
+    llm_queue        waiting for the LLM limiter
+    llm              inside LLM provider requests
+    llm_first_token  from asking for a streamed completion to its first token
+    parse            parsing LLM responses into suggestions
+    db_write         storing the review, its source and suggestions
+    db_commit        committing them; only known on the response that wrote them
+    total            from the start of the review until its commit
+
+Chunks analyzed in parallel each add their own time, so stages can sum to
+more than total.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional
+
+STAGES = (
+    "queue",
+    "cache_lookup",
+    "coalesce_wait",
+    "local_analysis",
+    "prompt_build",
+    "llm_queue",
+    "llm",
+    "llm_first_token",
+    "parse",
+    "db_write",
+    "db_commit",
+    "total",
+)
+
+SUMMARY_PERCENTILES = (50, 95, 99)
+
+
+class StageTimings:
+    """Seconds spent in each stage of one review."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        # Parallel chunks record from several threads
+        with self._lock:
+            self._stages[name] = self._stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def finish(self) -> None:
+        """Record the total as the time elapsed since the breakdown was opened."""
+        with self._lock:
+            self._stages["total"] = time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, float]:
+        """The recorded stages in pipeline order."""
+        with self._lock:
+            stages = dict(self._stages)
+        ordered = {name: round(stages.pop(name), 6) for name in STAGES if name in stages}
+        ordered.update({name: round(seconds, 6) for name, seconds in stages.items()})
+        return ordered
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("review_timings", default=None)
+
+
+@contextmanager
+def record_timings() -> Iterator[StageTimings]:
+    """Collect the stages recorded within the block into a new breakdown."""
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # A streamed review can be closed from a different context than it started in
+            pass
+
+
+def add_stage(name: str, seconds: float) -> None:
+    """Add seconds to a stage of the current breakdown, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block into a stage of the current breakdown, if any."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    with timings.stage(name):
+        yield
+
+
+def summarize_timings(breakdowns: Iterable[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """
+    Aggregate stored breakdowns into count, mean, percentiles and max per stage.
+
+    A stage's figures cover only the reviews that recorded it.
+    """
+    samples: Dict[str, List[float]] = {}
+    for breakdown in breakdowns:
+        for name, seconds in (breakdown or {}).items():
+            samples.setdefault(name, []).append(seconds)
+
+    order = {name: index for index, name in enumerate(STAGES)}
+    summary = {}
+    for name in sorted(samples, key=lambda name: (order.get(name, len(STAGES)), name)):
+        values = sorted(samples[name])
+        stats = {"count": len(values), "mean": round(sum(values) / len(values), 6)}
+        for q in SUMMARY_PERCENTILES:
+            stats[f"p{q}"] = round(_percentile(values, q), 6)
+        stats["max"] = values[-1]
+        summary[name] = stats
+    return summary
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Linearly interpolated percentile (q in 0-100) of already sorted values."""
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
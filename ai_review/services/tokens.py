@@ -0,0 +1,41 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+import tiktoken
+
+from ai_review.utils.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# Rough characters-per-token ratio used when no tiktoken encoding is available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str) -> Optional[Any]:
+    """Load the tiktoken encoding for a model, or None if it cannot be loaded."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception as e:
+        logger.warning(f"Falling back to estimated token counts: {e}")
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Falling back to estimated token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """
+    Count the tokens text occupies in a prompt for model.
+
+    tiktoken downloads its encodings on first use; when that is not possible
+    the count is estimated from the text length instead.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
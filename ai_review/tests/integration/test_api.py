@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
@@ -13,6 +15,22 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def live_client():
+    """Test client that runs the startup events, so the review workers run too."""
+    with TestClient(app) as client:
+        yield client
+
+
+def sse_events(body):
+    """Split a server-sent event stream into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
 @pytest.fixture
 def mock_review_response():
     """Mock review response."""
@@ -120,4 +138,86 @@ def test_list_reviews(client):
         data = response.json()
         assert len(data) == 2
         assert data[0]["id"] == mock_reviews[0]["id"]
-        assert data[1]["file_path"] == mock_reviews[1]["file_path"] 
\ No newline at end of file
+        assert data[1]["file_path"] == mock_reviews[1]["file_path"] 
+
+def test_review_stream_ends_with_the_stored_review(client):
+    """Test that the stream sends suggestions, a summary and a done event with the final suggestions."""
+    code = "import os\n\ndef example():\n    return os.sep\n"
+    response = client.post("/review/stream", json={"code": code, "file_path": "example.py", "use_cache": False})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+    assert [event for event, _ in events][-2:] == ["summary", "done"]
+    streamed = [data for event, data in events if event == "suggestion"]
+    done = events[-1][1]
+    assert streamed and done["suggestions"] == streamed
+
+    stored = client.get(f"/reviews/{done['review_id']}").json()
+    assert [s["message"] for s in stored["suggestions"]] == [s["message"] for s in done["suggestions"]]
+
+
+def test_batch_review_stores_every_file(client):
+    """Test that a batch returns and stores one review per file."""
+    files = [{"code": "def a():\n    return 1\n", "file_path": "a.py"}, {"code": "let b = 2;\n", "file_path": "b.js"}]
+    response = client.post("/reviews/batch", json={"reviews": files}, params={"include_timings": True})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert all(result["timings"] for result in results)
+    for result in results:
+        assert client.get(f"/reviews/{result['review_id']}").status_code == 200
+
+    too_many = {"reviews": files * 1000}
+    assert client.post("/reviews/batch", json=too_many).status_code == 422
+
+
+def test_incremental_review_of_a_diff(client):
+    """Test that a diff is applied to its base, including changed lines starting with -- and ++."""
+    base_code = "SELECT 1;\n-- old comment\nSELECT 2;\n"
+    base = client.post("/review", json={"code": base_code, "file_path": "query.sql", "use_cache": False}).json()
+    diff = (
+        "--- a/query.sql\n+++ b/query.sql\n"
+        "@@ -1,3 +1,3 @@\n SELECT 1;\n--- old comment\n+-- new comment\n SELECT 2;\n"
+    )
+
+    response = client.post("/review/incremental", json={"base_review_id": base["review_id"], "diff": diff})
+    assert response.status_code == 200
+    assert response.json()["base_review_id"] == base["review_id"]
+
+    stale = diff.replace(" SELECT 1;", " SELECT 3;")
+    response = client.post("/review/incremental", json={"base_review_id": base["review_id"], "diff": stale})
+    assert response.status_code == 409
+    response = client.post("/review/incremental", json={"base_review_id": "missing", "diff": diff})
+    assert response.status_code == 404
+
+
+def test_background_review_completes_while_waited_on(live_client):
+    """Test that background=true answers 202 and ?wait returns the finished review."""
+    response = live_client.post(
+        "/review",
+        params={"background": True},
+        json={"code": "def example():\n    return True\n", "file_path": "example.py", "use_cache": False}
+    )
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+
+    review = live_client.get(f"/reviews/{job['review_id']}", params={"wait": 10})
+    assert review.status_code == 200
+    assert review.json()["status"] == "completed"
+    assert review.json()["summary"]
+
+
+def test_review_list_cursor_is_readable_cross_origin(client):
+    """Test that browsers are allowed to read the X-Next-Cursor header."""
+    for i in range(2):
+        client.post("/review", json={"code": f"x = {i}\n", "file_path": "a.py", "use_cache": False})
+
+    response = client.get("/reviews", params={"limit": 1}, headers={"Origin": "https://example.com"})
+
+    assert response.status_code == 200
+    assert response.headers["x-next-cursor"]
+    assert "X-Next-Cursor" in response.headers["access-control-expose-headers"]
@@ -0,0 +1,150 @@
+from unittest.mock import patch
+
+import pytest
+
+from ai_review.core.config import settings as app_settings
+from ai_review.services import analyzers, llm
+from ai_review.services.analyzers import analyze_locally, run_local_analysis
+from ai_review.services.analyzers.python import PythonAnalyzer
+
+MODULE = '''import os
+import json
+from typing import *
+
+
+def load(path, cache={}):
+    """Load a file."""
+    try:
+        return open(path).read()
+    except:
+        return None
+
+
+class Loader:
+    pass
+'''
+
+
+def messages(findings):
+    return [(s.line_start, s.category.value, s.message) for s in findings.suggestions]
+
+
+def test_python_analyzer_reports_common_issues():
+    """Test that the ast checks find lint, style and documentation issues."""
+    found = messages(PythonAnalyzer().analyze(MODULE, "loader.py"))
+
+    assert (1, "lint", "'os' is imported but never used") in found
+    assert (2, "lint", "'json' is imported but never used") in found
+    assert (3, "lint", "Wildcard import from 'typing' hides where names come from") in found
+    assert any(line == 6 and "Mutable default" in message for line, _, message in found)
+    assert any(line == 6 and "missing type hints for parameters path, cache and return value" in message
+               for line, _, message in found)
+    assert (10, "lint", "Bare except also catches SystemExit and KeyboardInterrupt") in found
+    assert (14, "documentation", "Class 'Loader' has no docstring") in found
+    assert not any("docstring" in message and line == 6 for line, _, message in found)
+
+
+def test_python_analyzer_flags_syntax_errors_and_trivial_modules():
+    """Test that unparsable files are marked failed and constant-only modules trivial."""
+    broken = PythonAnalyzer().analyze("def f(:\n    pass\n", "broken.py")
+    assert broken.failed
+    assert broken.suggestions[0].severity.value == "high"
+
+    constants = PythonAnalyzer().analyze('"""Settings."""\nimport os\n\nNAME = "x"\nPATH = os.sep\n', "c.py")
+    assert constants.trivial
+    assert not PythonAnalyzer().analyze(MODULE, "loader.py").trivial
+
+
+def test_python_analyzer_checks_import_grouping():
+    """Test that a stdlib import after a third party one is reported."""
+    code = "import requests\nimport os\n\nprint(os, requests)\n"
+    found = messages(PythonAnalyzer().analyze(code, "a.py"))
+
+    assert (2, "style", "Imports are not grouped as standard library, third party, then local") in found
+
+
+def test_local_analysis_filters_and_lists_covered_checks():
+    """Test that settings filter local findings and the LLM keeps its focus areas."""
+    settings = {"focus_areas": ["lint", "security"], "min_severity": "medium"}
+    local = analyze_locally(MODULE, "loader.py", "python", settings)
+
+    assert local.suggestions
+    assert all(s.category.value == "lint" and s.severity.value != "low" for s in local.suggestions)
+    assert local.llm_settings(settings) == {
+        "focus_areas": ["lint", "security"],
+        "min_severity": "medium",
+        "local_checks": ["unused imports", "wildcard imports", "bare except clauses", "mutable default arguments"],
+    }
+    assert not local.skip_llm
+
+
+def test_local_analysis_skips_the_llm_when_it_has_nothing_to_add():
+    """Test that tiny and trivial files skip the LLM unless it has to review security or performance."""
+    style_only = {"focus_areas": ["lint", "style", "documentation"]}
+    assert analyze_locally("x = 1\n", "a.py", "python", style_only).reason == "tiny file"
+    constants = '"""Doc."""\nA = 1\nB = 2\nC = 3\n'
+    assert analyze_locally(constants, "a.py", "python", style_only).reason == "no reviewable logic"
+    assert not analyze_locally("x = 1\n", "a.py", "python").skip_llm
+    assert not analyze_locally(constants, "a.py", "python", {"focus_areas": ["performance"]}).skip_llm
+    # Local checks never cover a whole focus area
+    assert not analyze_locally(MODULE, "loader.py", "python", {"focus_areas": ["lint", "style"]}).skip_llm
+    # A file that does not parse always goes to the LLM
+    assert not analyze_locally("def f(:\n", "a.py", "python", style_only).skip_llm
+    assert not analyze_locally("let x = 1;\n", "a.js", "javascript").skip_llm
+
+
+def test_analysis_merges_local_findings_with_the_llm():
+    """Test that the LLM is told about the local checks and results are merged."""
+    seen = {}
+
+    def fake_llm(code, file_path, language, settings, start_time):
+        seen["settings"] = settings
+        return {"suggestions": [], "summary": "ok", "execution_time": 0.0}
+
+    with patch.object(app_settings, "LOCAL_ANALYSIS_WORKERS", 0), \
+            patch.object(llm, "_llm_analyze_chunked", fake_llm):
+        result = llm._analyze_with_local_stage(MODULE, "loader.py", "python", None, 0.0)
+        tiny = llm._analyze_with_local_stage("x = 1\n", "a.py", "python", {"focus_areas": ["style"]}, 0.0)
+
+    assert "focus_areas" not in seen["settings"]
+    assert "unused imports" in seen["settings"]["local_checks"]
+    assert "unused imports" in llm._build_messages(MODULE, "loader.py", "python", seen["settings"])[0]["content"]
+    assert any(s.message == "'os' is imported but never used" for s in result["suggestions"])
+    assert tiny["local_only"] is True
+    assert tiny["summary"].startswith("Reviewed locally (tiny file)")
+
+
+@pytest.mark.asyncio
+async def test_fragments_skip_the_local_stage():
+    """Test that excerpts, which do not parse on their own, go to the LLM alone."""
+    hunk = "    if cached:\n        return os.path.join(root, name)\n"
+
+    def fake_llm(code, file_path, language, settings, start_time):
+        return {"suggestions": [], "summary": "ok", "execution_time": 0.0}
+
+    async def fake_llm_async(*args):
+        return fake_llm(*args)
+
+    with patch.object(app_settings, "LOCAL_ANALYSIS_WORKERS", 0), \
+            patch.object(llm, "_llm_analyze_chunked", fake_llm), \
+            patch.object(llm, "_llm_analyze_chunked_async", fake_llm_async):
+        whole = llm._analyze_with_local_stage(hunk, "a.py", "python", None, 0.0)
+        fragment = llm._analyze_with_local_stage(hunk, "a.py", "python", {"fragment": True}, 0.0)
+        fragment_async = await llm._analyze_with_local_stage_async(hunk, "a.py", "python", {"fragment": True}, 0.0)
+
+    assert [s.message for s in whole["suggestions"]] == ["Syntax error: unexpected indent"]
+    assert fragment["suggestions"] == [] and fragment_async["suggestions"] == []
+
+
+@pytest.mark.asyncio
+async def test_local_analysis_runs_in_the_process_pool():
+    """Test that the pooled path returns the same findings as the inline one."""
+    try:
+        pooled = run_local_analysis(MODULE, "loader.py", "python")
+        inline = analyze_locally(MODULE, "loader.py", "python")
+        pooled_async = await analyzers.run_local_analysis_async(MODULE, "loader.py", "python")
+    finally:
+        analyzers.shutdown_pool()
+
+    assert pooled.suggestions == inline.suggestions
+    assert pooled_async.suggestions == inline.suggestions
@@ -0,0 +1,35 @@
+from benchmarks.harness import compare, percentile, summarize
+
+
+def test_summarize_reports_throughput_and_percentiles():
+    """Test the figures written for each benchmark."""
+    latencies = [i / 1000 for i in range(1, 101)]
+    result = summarize("api.get_review", latencies, elapsed=2.0, errors=1, dataset=10000, concurrency=8)
+
+    assert result["requests"] == 101
+    assert result["throughput_rps"] == 50.0
+    assert result["p50_ms"] == 50.5
+    assert result["p99_ms"] == 99.01
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_pairs_results_across_runs():
+    """Test that results are matched by name and labels."""
+    def run(rps):
+        return {"results": [summarize("api.list_reviews", [0.01] * 10, 10 / rps, dataset=10000, concurrency=1)]}
+
+    rows = compare(run(100.0), run(125.0))
+
+    assert rows[0]["benchmark"] == "api.list_reviews concurrency=1 dataset=10000"
+    assert rows[0]["throughput_rps_change"] == 0.25
+    assert rows[0]["p50_ms_change"] == 0.0
+
+
+def test_summarize_reports_cpu_per_call_when_measured():
+    """Test that CPU time is reported per call and compared across runs."""
+    result = summarize("serialize.get_review.fast", [0.002] * 10, elapsed=0.02, cpu=0.01, dataset=10000)
+    assert result["cpu_ms_per_call"] == 1.0
+
+    rows = compare({"results": [dict(result, cpu_ms_per_call=2.0)]}, {"results": [result]})
+    assert rows[0]["cpu_ms_per_call_change"] == -0.5
+    assert "cpu_ms_per_call" not in summarize("api.get_review", [0.01], elapsed=0.01)
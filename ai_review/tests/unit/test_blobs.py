@@ -0,0 +1,22 @@
+from sqlalchemy import func, select
+
+from ai_review.db.models import SourceBlob
+from ai_review.services.blobs import decompress_source, hash_source, store_sources
+
+
+def test_identical_sources_are_stored_once(db_session):
+    """Test that storage grows with unique content, not submissions."""
+    code = "def f():\n    return 1\n" * 50
+
+    first = store_sources(db_session, [code, code])
+    second = store_sources(db_session, [code, "x = 2\n"])
+    db_session.commit()
+
+    assert first == [hash_source(code), hash_source(code)]
+    assert second[0] == first[0]
+    assert db_session.scalar(select(func.count()).select_from(SourceBlob)) == 2
+
+    blob = db_session.get(SourceBlob, first[0])
+    assert blob.size == len(code.encode("utf-8"))
+    assert blob.compressed_size < blob.size
+    assert decompress_source(blob.data) == code
@@ -0,0 +1,197 @@
+from datetime import datetime
+
+import pytest
+import redis
+from unittest.mock import MagicMock, patch
+from sqlalchemy.orm import sessionmaker
+
+from ai_review.db.models import AnalysisCacheEntry
+from ai_review.models.review import ReviewSuggestion, ReviewCategory, SeverityLevel
+from ai_review.services import llm
+from ai_review.services.cache import AnalysisCache, LRUCache, ReviewCache, make_cache_key
+
+
+@pytest.fixture
+def analysis_result():
+    """Analysis result fixture."""
+    return {
+        "suggestions": [
+            ReviewSuggestion(
+                line_start=1,
+                line_end=2,
+                file_path="example.py",
+                message="Unused import 'os' detected",
+                category=ReviewCategory.LINT,
+                severity=SeverityLevel.LOW,
+            )
+        ],
+        "summary": "Minor lint issues.",
+        "execution_time": 1.0,
+    }
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the LRU tier respects its size bound."""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_expires_entries():
+    """Test that entries past their TTL are not returned."""
+    cache = LRUCache(max_entries=2, ttl=10)
+    with patch("ai_review.services.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("ai_review.services.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+
+
+def test_cache_key_normalizes_settings():
+    """Test that equivalent settings produce the same key."""
+    key = make_cache_key("x = 1", "python", {}, "gpt-4", "1")
+
+    assert key == make_cache_key(
+        "x = 1", "Python",
+        {"focus_areas": ["style", "lint", "refactor", "security", "performance"], "min_severity": "LOW"},
+        "gpt-4", "1"
+    )
+    assert key != make_cache_key("x = 2", "python", {}, "gpt-4", "1")
+    assert key != make_cache_key("x = 1", "python", {}, "gpt-4", "2")
+    assert key != make_cache_key("x = 1", "python", {"min_severity": "high"}, "gpt-4", "1")
+
+
+def test_persistent_tier_survives_memory_loss(db_engine, analysis_result):
+    """Test that results are served from the database after the LRU is gone."""
+    session_factory = sessionmaker(bind=db_engine)
+    AnalysisCache(session_factory=session_factory).set("key", analysis_result)
+
+    cache = AnalysisCache(session_factory=session_factory)
+    cached = cache.get("key")
+
+    assert cached["summary"] == analysis_result["summary"]
+    assert cached["suggestions"][0].category == ReviewCategory.LINT
+    assert cache.stats()["persistent_hits"] == 1
+
+    cache.invalidate("key")
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_rows_are_purged_on_writes(db_engine, analysis_result):
+    """Test that storing entries removes expired rows, at most once per interval."""
+    session_factory = sessionmaker(bind=db_engine)
+    with patch("ai_review.services.cache.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value = datetime(2000, 1, 1)
+        AnalysisCache(session_factory=session_factory, ttl_seconds=60).set("old", analysis_result)
+
+    cache = AnalysisCache(session_factory=session_factory, ttl_seconds=60)
+    cache.set("new", analysis_result)
+    with session_factory() as db:
+        assert [entry.key for entry in db.query(AnalysisCacheEntry)] == ["new"]
+
+    with patch("ai_review.services.cache.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value = datetime(2000, 1, 1)
+        cache.set("old", analysis_result)
+    cache.set("newer", analysis_result)
+    with session_factory() as db:
+        # Within the interval, so the expired row stays until the next purge
+        assert db.query(AnalysisCacheEntry).count() == 3
+
+
+def test_analyze_code_uses_cache(analysis_result):
+    """Test that repeated submissions skip the analyzer unless bypassed."""
+    cache = AnalysisCache()
+    with patch.object(llm, "analysis_cache", cache), \
+            patch.object(llm, "_mock_analyze_code", return_value=analysis_result) as mock_analyze:
+        llm.analyze_code(code="import os", file_path="example.py")
+        result = llm.analyze_code(code="import os", file_path="other.py")
+
+        assert mock_analyze.call_count == 1
+        assert result["cached"] is True
+        assert result["suggestions"][0].file_path == "other.py"
+
+        llm.analyze_code(code="import os", file_path="example.py", use_cache=False)
+        llm.analyze_code(code="import os", file_path="example.py", refresh_cache=True)
+
+        assert mock_analyze.call_count == 3
+        assert cache.stats()["hits"] == 1
+
+
+def test_review_cache_memory_backend():
+    """Test caching and invalidating every variant of a review in process."""
+    cache = ReviewCache(max_entries=2)
+
+    assert cache.get("r1") is None
+    cache.set("r1", b"{}")
+    cache.set("r1", b'{"timings": {}}', variant="timings")
+    assert cache.get("r1") == b"{}"
+    assert cache.get("r1", "timings") == b'{"timings": {}}'
+
+    cache.invalidate("r1", ("", "timings"))
+    assert cache.get("r1") is None
+    assert cache.get("r1", "timings") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["backend"]) == (2, 3, "memory")
+
+
+def test_review_cache_redis_backend_falls_back_to_misses():
+    """Test that a failing Redis is treated as a miss and then skipped for a while."""
+    client = MagicMock()
+    client.get.return_value = b"{}"
+    cache = ReviewCache(client=client, ttl_seconds=60)
+
+    cache.set("r1", b"{}")
+    client.set.assert_called_once_with("ai_review:review:r1", b"{}", ex=60)
+    assert cache.get("r1") == b"{}"
+
+    client.get.side_effect = redis.ConnectionError("down")
+    assert cache.get("r1") is None
+    assert cache.get("r1") is None
+    # The second lookup did not wait on Redis again
+    assert client.get.call_count == 2
+    assert cache.stats()["errors"] == 1
+
+    # Invalidation is still attempted so a rerun is never masked
+    cache.invalidate("r1")
+    pipeline = client.pipeline.return_value
+    pipeline.incr.assert_called_once_with("ai_review:review:r1#version")
+    pipeline.delete.assert_called_once_with("ai_review:review:r1")
+    pipeline.execute.assert_called_once()
+
+
+def test_review_cache_drops_reads_that_raced_an_invalidation():
+    """Test that a response read before a rerun's commit is not cached after it."""
+    cache = ReviewCache()
+    cache.invalidate("r1")
+
+    version = cache.version("r1")
+    # A rerun commits and invalidates while the old response is being read
+    cache.invalidate("r1")
+    cache.set("r1", b"old", version=version)
+    assert cache.get("r1") is None
+
+    cache.set("r1", b"new", version=cache.version("r1"))
+    assert cache.get("r1") == b"new"
+
+
+def test_review_cache_redis_backend_sets_only_the_read_version():
+    """Test that Redis stores a read's response only if the review's version is unchanged."""
+    client = MagicMock()
+    client.get.return_value = b"3"
+    cache = ReviewCache(client=client, ttl_seconds=60)
+
+    version = cache.version("r1")
+    cache.set("r1", b"{}", version=version)
+
+    assert version == "3"
+    client.get.assert_called_once_with("ai_review:review:r1#version")
+    client.register_script.return_value.assert_called_once_with(
+        keys=["ai_review:review:r1", "ai_review:review:r1#version"], args=[b"{}", "3", 60]
+    )
+    client.set.assert_not_called()
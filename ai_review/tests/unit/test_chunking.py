@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from ai_review.models.review import ReviewSuggestion, ReviewCategory, SeverityLevel
+from ai_review.services import llm
+from ai_review.services.chunking import CodeChunk, merge_suggestions, remap_suggestions, split_code
+
+
+def count_lines(text):
+    """Token counter stand-in: one token per line."""
+    return len(text.splitlines())
+
+
+def make_suggestion(line_start, line_end, message="Function is too complex", severity=SeverityLevel.LOW):
+    return ReviewSuggestion(
+        line_start=line_start,
+        line_end=line_end,
+        file_path="example.py",
+        message=message,
+        category=ReviewCategory.REFACTOR,
+        severity=severity,
+    )
+
+
+def test_split_code_prefers_definition_boundaries():
+    """Test that chunks are cut between top-level definitions."""
+    code = "import os\n\n@decorator\ndef a():\n    pass\n\nclass B:\n    x = 1\n    y = 2\n"
+
+    chunks = split_code(code, max_tokens=4, count=count_lines)
+
+    assert [c.start_line for c in chunks] == [1, 3, 7]
+    assert chunks[1].code.startswith("@decorator\ndef a():")
+    assert "".join(c.code for c in chunks) == code
+
+
+def test_split_code_cuts_oversized_definitions_by_line():
+    """Test that a definition larger than the budget is still split."""
+    code = "def big():\n" + "".join(f"    x{i} = {i}\n" for i in range(9))
+
+    chunks = split_code(code, max_tokens=4, count=count_lines)
+
+    assert [(c.start_line, c.end_line) for c in chunks] == [(1, 4), (5, 8), (9, 10)]
+
+
+def test_remap_and_merge_suggestions():
+    """Test that chunk suggestions map back to file lines and duplicates merge."""
+    first = remap_suggestions([make_suggestion(3, 4)], CodeChunk(start_line=1, code="a\n" * 4))
+    second = remap_suggestions(
+        [make_suggestion(1, 2, severity=SeverityLevel.HIGH), make_suggestion(2, 2, message="Other")],
+        CodeChunk(start_line=5, code="b\n" * 4)
+    )
+
+    merged = merge_suggestions(first + second)
+
+    assert [(s.line_start, s.line_end, s.message) for s in merged] == [
+        (3, 6, "Function is too complex"),
+        (6, 6, "Other"),
+    ]
+    assert merged[0].severity == SeverityLevel.HIGH
+
+
+def test_analyze_code_chunks_large_files():
+    """Test that oversized files are analyzed per chunk and merged."""
+    code = "".join(f"def f{i}():\n    return {i}\n" for i in range(4))
+
+    def fake_analyze(chunk_code, file_path, language, settings, start_time):
+        return {"suggestions": [make_suggestion(1, 1)], "summary": "ok", "execution_time": 0.0}
+
+    with patch.object(llm, "use_mock", False), \
+            patch.object(llm.app_settings, "LOCAL_ANALYSIS_ENABLED", False), \
+            patch.object(llm.app_settings, "LLM_MAX_TOKENS_PER_CHUNK", 4), \
+            patch.object(llm, "count_tokens", side_effect=lambda text, model: count_lines(text)), \
+            patch.object(llm, "_llm_analyze_code", side_effect=fake_analyze) as mock_analyze:
+        result = llm.analyze_code(code=code, file_path="example.py", use_cache=False)
+
+    assert mock_analyze.call_count == 2
+    assert [s.line_start for s in result["suggestions"]] == [1, 5]
+    assert result["summary"].startswith("Reviewed in 2 chunks.")
@@ -0,0 +1,202 @@
+import os
+import subprocess
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from ai_review.cli import changes as changes_module
+from ai_review.cli import discovery
+from ai_review.cli import main as cli
+from ai_review.cli.discovery import discover_files
+from ai_review.cli.manifest import ReviewManifest
+from ai_review.models.review import SeverityLevel
+
+
+def test_review_files_preserves_order():
+    """Test that parallel reviews are reported in submission order."""
+    files = [Path(f"file_{i}.py") for i in range(5)]
+
+    def fake_review_file(file_path, api_url, min_severity, client):
+        # Finish later files first
+        time.sleep(0.01 * (len(files) - files.index(file_path)))
+        return {"file": str(file_path)}
+
+    with patch.object(cli, "_review_file", side_effect=fake_review_file) as mock_review:
+        results = cli._review_files(files, "http://test", SeverityLevel.LOW, concurrency=5)
+
+    assert [r["file"] for r in results] == [str(f) for f in files]
+    clients = {call.args[3] for call in mock_review.call_args_list}
+    assert len(clients) == 1
+
+
+def test_review_files_streams_from_a_generator():
+    """Test that reviews start before the file generator is exhausted."""
+    reviewed = []
+
+    def files():
+        for index in range(3):
+            yield Path(f"file_{index}.py")
+            # The previous file has been handed to a worker by now
+            time.sleep(0.05)
+            assert reviewed
+
+    def fake_review_file(file_path, api_url, min_severity, client):
+        reviewed.append(file_path)
+        return {"file": str(file_path)}
+
+    with patch.object(cli, "_review_file", side_effect=fake_review_file):
+        results = cli._review_files(files(), "http://test", SeverityLevel.LOW, concurrency=2)
+
+    assert [r["file"] for r in results] == [f"file_{index}.py" for index in range(3)]
+
+
+def test_excerpts_are_submitted_as_fragments(tmp_path):
+    """Test that --diff-context excerpts are flagged so the API skips whole-file checks."""
+    file_path = tmp_path / "app.py"
+    file_path.write_text("x = 1\n")
+    client = Mock()
+    client.post.return_value = Mock(status_code=200, json=lambda: {"suggestions": []})
+
+    cli._review_file(file_path, "http://test", SeverityLevel.LOW, client, code_loader=lambda path: "\nx = 2\n",
+                     fragment=True)
+    cli._review_file(file_path, "http://test", SeverityLevel.LOW, client)
+
+    excerpt, whole = [call.kwargs["json"] for call in client.post.call_args_list]
+    assert excerpt["code"] == "\nx = 2\n" and excerpt["settings"]["fragment"] is True
+    assert whole["code"] == "x = 1\n" and "fragment" not in whole["settings"]
+
+
+def test_discovery_prunes_ignored_directories(tmp_path):
+    """Test ignore files, --ignore patterns, binaries and the size limit."""
+    def write(relative, content="x = 1\n"):
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content)
+
+    write("main.py")
+    write("README")
+    write("image.dat", b"\x89PNG\r\n\x00\x00")
+    write("big.py", "x" * 200)
+    write(".gitignore", "build/\n*.log\n/top.py\n")
+    write(".aiignore", "generated/**\n!generated/keep.py\n")
+    write("top.py")
+    write("pkg/top.py")
+    write("pkg/debug.log")
+    write("pkg/build/out.py")
+    write("pkg/.gitignore", "*.py\n!keep.py\n")
+    write("pkg/keep.py")
+    write("pkg/skip.py")
+    write("generated/a.py")
+    write("node_modules/lib/index.js")
+
+    scanned = set()
+    real_scandir = discovery.os.scandir
+
+    def tracking_scandir(path):
+        scanned.add(Path(path).name)
+        return real_scandir(path)
+
+    with patch.object(discovery.os, "scandir", side_effect=tracking_scandir):
+        files = discover_files(tmp_path, True, ["node_modules"], max_size=100)
+
+    assert [path.relative_to(tmp_path).as_posix() for path in files] == [
+        "main.py",
+        "pkg/keep.py",
+    ]
+    assert not scanned & {"node_modules", "build"}
+
+    assert discover_files(tmp_path, False, []) == [tmp_path / "big.py", tmp_path / "main.py"]
+    assert discover_files(tmp_path / "README", False, []) == [tmp_path / "README"]
+
+
+def test_manifest_skips_unchanged_files(tmp_path):
+    """Test that a second run only submits files whose content changed."""
+    files = []
+    for name in ("a.py", "b.py", "c.py"):
+        path = tmp_path / name
+        path.write_text(f"{name} = 1\n")
+        files.append(path)
+
+    def run():
+        manifest = ReviewManifest.load(tmp_path / ".ai-review-cache", "http://test low")
+        with patch.object(cli, "_review_file", side_effect=fake_review_file) as mock_review:
+            results = cli._review_files(files, "http://test", SeverityLevel.LOW, manifest=manifest)
+        manifest.save()
+        return results, [call.args[0].name for call in mock_review.call_args_list]
+
+    def fake_review_file(file_path, api_url, min_severity, client):
+        return {"review_id": file_path.read_text(), "status": "completed"}
+
+    first, submitted = run()
+    assert submitted == ["a.py", "b.py", "c.py"]
+
+    # Same content under a new mtime is still unchanged
+    os.utime(files[0], ns=(0, 0))
+    files[1].write_text("b.py = 2\n")
+    second, submitted = run()
+    assert submitted == ["b.py"]
+    assert second[0] == first[0]
+    assert second[1]["review_id"] == "b.py = 2\n"
+
+    _, submitted = run()
+    assert submitted == []
+
+    # Other settings do not reuse these results
+    manifest = ReviewManifest.load(tmp_path / ".ai-review-cache", "http://test high")
+    assert manifest.lookup(files[2]) is None
+
+
+def test_git_changed_files_and_ranges(tmp_path):
+    """Test --since and --staged changed files, line ranges and filtering."""
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=tmp_path, check=True, capture_output=True
+        )
+
+    git("init", "-q")
+    (tmp_path / "app.py").write_text("".join(f"line_{number} = {number}\n" for number in range(1, 21)))
+    (tmp_path / "old.py").write_text("x = 1\ny = 2\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "base")
+    git("branch", "base")
+
+    lines = (tmp_path / "app.py").read_text().splitlines()
+    lines[4] = "line_5 = 'changed'"
+    lines.insert(15, "inserted = True")
+    (tmp_path / "app.py").write_text("\n".join(lines) + "\n")
+    (tmp_path / "old.py").write_text("x = 1\n")
+    (tmp_path / "new file.py").write_text("z = 3\n")
+    git("add", "new file.py")
+
+    changes = {change.repo_path: change for change in changes_module.git_changed_files(tmp_path, since="base")}
+    # Removing lines leaves nothing to review
+    assert sorted(changes) == ["app.py", "new file.py"]
+    assert changes["app.py"].ranges == [(5, 5), (16, 16)]
+
+    excerpt = changes["app.py"].excerpt(context=1).splitlines()
+    assert excerpt[3:6] == ["line_4 = 4", "line_5 = 'changed'", "line_6 = 6"]
+    assert excerpt[0] == "" and excerpt[8] == ""
+    assert len(excerpt) == 21
+
+    staged = changes_module.git_changed_files(tmp_path, staged=True)
+    assert [change.repo_path for change in staged] == ["new file.py"]
+    (tmp_path / "new file.py").write_text("z = 4\n")
+    assert staged[0].read() == "z = 3\n"
+
+    result = {"review_id": "r", "suggestions": [
+        {"line_start": 1, "line_end": 4, "message": "outside"},
+        {"line_start": 3, "line_end": 6, "message": "overlaps"},
+        {"line_start": 16, "line_end": 16, "message": "inside"},
+    ]}
+    kept = changes_module.only_changed_lines(result, changes["app.py"].ranges)
+    assert [sugg["message"] for sugg in kept["suggestions"]] == ["overlaps", "inside"]
+    assert len(result["suggestions"]) == 3
+
+    with pytest.raises(ValueError):
+        changes_module.git_changed_files(tmp_path, since="no-such-ref")
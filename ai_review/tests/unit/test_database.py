@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import text
+
+from ai_review.db.database import create_async_db_engine, create_db_engine
+from ai_review.db.pool import MeteredQueuePool, pool_status
+
+
+def test_sqlite_engine_enables_wal(tmp_path):
+    """Test that file-backed SQLite connections get the WAL pragmas."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() > 0
+    engine.dispose()
+
+
+def test_sqlite_writer_uses_single_connection(tmp_path):
+    """Test that the writer pool has one connection and reports saturation."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}", writer=True)
+    assert isinstance(engine.pool, MeteredQueuePool)
+
+    with engine.connect():
+        status = pool_status(engine.pool)
+        assert status["size"] == 1
+        assert status["max_overflow"] == 0
+        assert status["saturation"] == 1.0
+
+    status = pool_status(engine.pool)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_sqlite_engine_enables_wal(tmp_path):
+    """Test that the async engine applies the same pragmas and metrics."""
+    engine = create_async_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    async with engine.connect() as connection:
+        assert (await connection.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+    assert pool_status(engine.sync_engine.pool)["checkouts"] == 1
+    await engine.dispose()
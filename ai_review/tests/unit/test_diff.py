@@ -0,0 +1,107 @@
+from ai_review.models.review import ReviewSuggestion, ReviewCategory, SeverityLevel
+from ai_review.services.diff import (
+    apply_hunks,
+    carry_forward_suggestions,
+    changed_line_ranges,
+    diff_hunks,
+    parse_unified_diff,
+)
+
+OLD_CODE = "".join(f"line {i}\n" for i in range(1, 21))
+NEW_CODE = OLD_CODE.replace("line 5\n", "line 5\ninserted a\ninserted b\n").replace("line 15\n", "changed 15\n")
+
+UNIFIED_DIFF = """--- a/example.py
++++ b/example.py
+@@ -3,6 +3,8 @@
+ line 3
+ line 4
+ line 5
++inserted a
++inserted b
+ line 6
+ line 7
+ line 8
+@@ -12,7 +14,7 @@
+ line 12
+ line 13
+ line 14
+-line 15
++changed 15
+ line 16
+ line 17
+ line 18
+"""
+
+
+def make_suggestion(line_start, line_end):
+    return ReviewSuggestion(
+        line_start=line_start,
+        line_end=line_end,
+        file_path="example.py",
+        message="Something to fix",
+        category=ReviewCategory.STYLE,
+        severity=SeverityLevel.LOW,
+    )
+
+
+def test_parse_unified_diff_matches_computed_hunks():
+    """Test that parsed and computed hunks describe the same change."""
+    parsed = parse_unified_diff(UNIFIED_DIFF)
+    computed = diff_hunks(OLD_CODE, NEW_CODE, context=3)
+
+    assert [(h.old_start, h.old_count, h.new_start, h.new_count) for h in parsed] == [
+        (3, 6, 3, 8), (12, 7, 14, 7)
+    ]
+    assert [h.lines for h in parsed] == [h.lines for h in computed]
+    assert changed_line_ranges(parsed) == [(6, 7), (17, 17)]
+
+
+def test_hunk_excerpt_includes_context():
+    """Test that excerpts start at the first context line of the new file."""
+    excerpt = parse_unified_diff(UNIFIED_DIFF)[1].excerpt()
+
+    assert excerpt.start_line == 14
+    assert excerpt.code.splitlines()[3] == "changed 15"
+
+
+def test_carry_forward_suggestions():
+    """Test that untouched suggestions shift and touched ones are dropped."""
+    hunks = parse_unified_diff(UNIFIED_DIFF)
+    suggestions = [make_suggestion(1, 2), make_suggestion(5, 6), make_suggestion(10, 11), make_suggestion(15, 15)]
+
+    carried = carry_forward_suggestions(suggestions, hunks)
+
+    assert [(s.line_start, s.line_end) for s in carried] == [(1, 2), (12, 13)]
+
+
+def test_pure_insertion_hunk():
+    """Test hunks whose old side is empty."""
+    hunks = parse_unified_diff("@@ -5,0 +6,2 @@\n+new a\n+new b\n")
+
+    assert changed_line_ranges(hunks) == [(6, 7)]
+    carried = carry_forward_suggestions([make_suggestion(5, 5), make_suggestion(6, 6)], hunks)
+    assert [(s.line_start, s.line_end) for s in carried] == [(5, 5), (8, 8)]
+
+
+def test_apply_hunks_reconstructs_new_version():
+    """Test that applying a diff to its base yields the new file."""
+    assert apply_hunks(OLD_CODE, parse_unified_diff(UNIFIED_DIFF)) == NEW_CODE
+    assert apply_hunks(OLD_CODE, diff_hunks(OLD_CODE, NEW_CODE)) == NEW_CODE
+    assert apply_hunks(OLD_CODE.replace("line 4", "other"), parse_unified_diff(UNIFIED_DIFF)) is None
+
+
+def test_hunk_lines_that_look_like_file_headers():
+    """Test that removed "--" and added "++" lines stay part of the hunk."""
+    old_code = "SELECT 1;\n-- old comment\nSELECT 2;\n"
+    new_code = "SELECT 1;\n++i;\nSELECT 2;\n"
+    diff = (
+        "--- a/query.sql\n+++ b/query.sql\n"
+        "@@ -1,3 +1,3 @@\n SELECT 1;\n--- old comment\n+++i;\n SELECT 2;\n"
+        "\\ No newline at end of file\n"
+    )
+
+    hunks = parse_unified_diff(diff)
+
+    assert hunks[0].lines == [(" ", "SELECT 1;"), ("-", "-- old comment"), ("+", "++i;"), (" ", "SELECT 2;")]
+    assert changed_line_ranges(hunks) == [(2, 2)]
+    assert apply_hunks(old_code, hunks) == new_code
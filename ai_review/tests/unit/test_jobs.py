@@ -0,0 +1,215 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from ai_review.db.models import Base, Review, ReviewJob, Suggestion
+from ai_review.models.review import ReviewCategory, ReviewRequest, ReviewSuggestion, SeverityLevel
+from ai_review.services import jobs
+
+
+@pytest.fixture
+def session_factories(tmp_path):
+    """Sync and async session factories sharing one SQLite file."""
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(url.replace("sqlite:", "sqlite+aiosqlite:", 1))
+    yield sessionmaker(bind=engine), async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def analysis_result():
+    """Analysis result fixture."""
+    return {"suggestions": [], "summary": "Looks good.", "execution_time": 0.1}
+
+
+@pytest.mark.asyncio
+async def test_queued_review_is_completed_by_worker(session_factories, analysis_result):
+    """Test the pending -> completed lifecycle of a queued review."""
+    session_factory, async_session_factory = session_factories
+    async with async_session_factory() as db:
+        job = await jobs.enqueue_review_async(ReviewRequest(code="x = 1", file_path="a.py"), db)
+    assert job.status == "pending"
+
+    pool = jobs.ReviewWorkerPool(session_factory)
+    with session_factory() as db:
+        assert jobs.queue_depth(db) == 1
+
+    with patch.object(jobs, "analyze_code", return_value=analysis_result):
+        assert pool.process_next() is True
+        assert pool.process_next() is False
+
+    async with async_session_factory() as db:
+        review = await jobs.wait_for_review_async(job.review_id, db, timeout=1)
+    assert review.status == "completed"
+    assert review.summary == "Looks good."
+
+
+def test_failed_jobs_retry_then_fail(session_factories):
+    """Test that analysis errors are retried up to the attempt limit."""
+    session_factory, _ = session_factories
+    with session_factory() as db:
+        db.add(Review(id="r1", file_path="a.py", summary="", execution_time=0.0, status="pending"))
+        db.add(ReviewJob(review_id="r1", payload=ReviewRequest(code="x", file_path="a.py").model_dump()))
+        db.commit()
+
+    pool = jobs.ReviewWorkerPool(session_factory)
+    error_result = {"suggestions": [], "summary": "Error analyzing code: 429", "execution_time": 0.0, "error": True}
+    with patch.object(jobs, "analyze_code", return_value=error_result), \
+            patch.object(jobs.app_settings, "REVIEW_JOB_MAX_ATTEMPTS", 2):
+        assert pool.process_next() is True
+        with session_factory() as db:
+            assert db.get(Review, "r1").status == "pending"
+        assert pool.process_next() is True
+        assert pool.process_next() is False
+
+    with session_factory() as db:
+        assert db.get(Review, "r1").status == "failed"
+        assert db.get(ReviewJob, db.query(ReviewJob.id).scalar()).attempts == 2
+
+
+def test_claim_is_exclusive(session_factories):
+    """Test that a claimed job cannot be claimed again until its lease expires."""
+    session_factory, _ = session_factories
+    with session_factory() as db:
+        db.add(Review(id="r1", file_path="a.py", summary="", execution_time=0.0, status="pending"))
+        db.add(ReviewJob(review_id="r1", payload={}))
+        db.commit()
+
+    with session_factory() as first, session_factory() as second:
+        assert jobs.claim_next_job(first, "w1") is not None
+        assert jobs.claim_next_job(second, "w2") is None
+
+
+def _expire_lease(session_factory):
+    with session_factory() as db:
+        db.execute(update(ReviewJob).values(locked_until=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+
+
+def test_result_of_a_reclaimed_job_is_dropped(session_factories, analysis_result):
+    """Test that a run whose lease expired and was re-claimed does not store its result."""
+    session_factory, _ = session_factories
+    with session_factory() as db:
+        db.add(Review(id="r1", file_path="a.py", summary="", execution_time=0.0, status="pending"))
+        db.add(ReviewJob(review_id="r1", payload=ReviewRequest(code="x", file_path="a.py").model_dump()))
+        db.commit()
+
+    suggestion = ReviewSuggestion(
+        line_start=1, line_end=1, file_path="a.py", message="Issue",
+        category=ReviewCategory.LINT, severity=SeverityLevel.LOW
+    )
+    result = dict(analysis_result, suggestions=[suggestion])
+    with session_factory() as stale_db, session_factory() as db, \
+            patch.object(jobs, "analyze_code", return_value=result):
+        stale_job = jobs.claim_next_job(stale_db, "w1")
+        _expire_lease(session_factory)
+        job = jobs.claim_next_job(db, "w2")
+        job_id = job.id
+        assert job.attempts == 2
+
+        jobs.run_job(job, db)
+        jobs.run_job(stale_job, stale_db)
+
+    with session_factory() as db:
+        assert db.get(Review, "r1").status == "completed"
+        assert db.query(Suggestion).count() == 1
+        assert db.get(ReviewJob, job_id).worker_id == "w2"
+
+
+def test_lease_is_extended_while_the_analysis_runs(session_factories, analysis_result):
+    """Test that a job analyzed for longer than its lease is not claimed by another worker."""
+    session_factory, _ = session_factories
+    with session_factory() as db:
+        db.add(Review(id="r1", file_path="a.py", summary="", execution_time=0.0, status="pending"))
+        db.add(ReviewJob(review_id="r1", payload=ReviewRequest(code="x", file_path="a.py").model_dump()))
+        db.commit()
+
+    def analyze(**kwargs):
+        time.sleep(0.5)
+        with session_factory() as db:
+            assert jobs.claim_next_job(db, "w2") is None
+        return analysis_result
+
+    pool = jobs.ReviewWorkerPool(session_factory, write_session_factory=session_factory)
+    with patch.object(jobs.app_settings, "REVIEW_JOB_LEASE_SECONDS", 0.3), \
+            patch.object(jobs, "analyze_code", side_effect=analyze):
+        assert pool.process_next("w1") is True
+
+    with session_factory() as db:
+        job = db.query(ReviewJob).one()
+        assert (job.status, job.worker_id, job.attempts) == ("completed", "w1", 1)
+        assert db.get(Review, "r1").status == "completed"
+
+
+def test_jobs_out_of_attempts_are_failed_not_reclaimed(session_factories):
+    """Test that a job whose worker died on its last attempt fails instead of running again."""
+    session_factory, _ = session_factories
+    with session_factory() as db:
+        db.add(Review(id="r1", file_path="a.py", summary="", execution_time=0.0, status="running"))
+        db.add(ReviewJob(
+            review_id="r1", payload={}, status="running", attempts=3,
+            locked_until=datetime.utcnow() - timedelta(seconds=1)
+        ))
+        db.commit()
+
+    with session_factory() as db, patch.object(jobs.app_settings, "REVIEW_JOB_MAX_ATTEMPTS", 3):
+        assert jobs.claim_next_job(db, "w1") is None
+
+    with session_factory() as db:
+        assert db.get(Review, "r1").status == "failed"
+        assert db.query(ReviewJob).one().status == "failed"
+
+
+def test_job_without_a_review_fails(session_factories):
+    """Test that a job whose review is missing fails cleanly."""
+    session_factory, _ = session_factories
+    with session_factory() as db:
+        db.add(ReviewJob(review_id="missing", payload={}))
+        db.commit()
+
+    pool = jobs.ReviewWorkerPool(session_factory)
+    with patch.object(jobs, "analyze_code") as mock_analyze:
+        assert pool.process_next() is True
+        assert pool.process_next() is False
+
+    mock_analyze.assert_not_called()
+    with session_factory() as db:
+        job = db.query(ReviewJob).one()
+        assert job.status == "failed"
+        assert "not found" in job.error
+
+
+def test_no_connection_is_held_during_the_analysis(tmp_path, analysis_result):
+    """Test that workers release their connections before analyzing and write with the writer."""
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    engine = create_engine(url)
+    writer = create_engine(url, pool_size=1, max_overflow=0, pool_timeout=0.5)
+    Base.metadata.create_all(engine)
+    session_factory, write_session_factory = sessionmaker(bind=engine), sessionmaker(bind=writer)
+    with session_factory() as db:
+        db.add(Review(id="r1", file_path="a.py", summary="", execution_time=0.0, status="pending"))
+        db.add(ReviewJob(review_id="r1", payload=ReviewRequest(code="x", file_path="a.py").model_dump()))
+        db.commit()
+
+    def analyze(**kwargs):
+        assert engine.pool.checkedout() == 0
+        # Would time out if the worker still held the only writer connection
+        with write_session_factory() as db:
+            db.execute(text("SELECT 1"))
+        return analysis_result
+
+    pool = jobs.ReviewWorkerPool(session_factory, write_session_factory=write_session_factory)
+    with patch.object(jobs, "analyze_code", side_effect=analyze):
+        assert pool.process_next() is True
+
+    with session_factory() as db:
+        assert db.get(Review, "r1").status == "completed"
+    engine.dispose()
+    writer.dispose()
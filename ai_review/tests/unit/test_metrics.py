@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+
+from ai_review.api.main import app
+from ai_review.utils.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_and_gauge_render_labelled_samples():
+    registry = Registry()
+    counter = Counter("requests_total", "Requests.", ["outcome"], registry=registry)
+    gauge = Gauge("depth", "Queue depth.", registry=registry)
+
+    counter.inc("ok")
+    counter.inc("ok", amount=2)
+    counter.inc('bad"quote')
+    gauge.set(5)
+    gauge.dec()
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{outcome="ok"} 3' in text
+    assert 'requests_total{outcome="bad\\"quote"} 1' in text
+    assert "depth 4" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = Histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0), registry=registry)
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/a")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/a"} 3.65' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+
+
+def test_callback_metrics_are_read_at_scrape_time():
+    registry = Registry()
+    values = {("a",): 1.0}
+    Gauge("pool", "Pool.", ["name"], function=lambda: values, registry=registry)
+    Gauge("broken", "Broken.", function=lambda: 1 / 0, registry=registry)
+
+    values[("b",)] = 2.0
+    text = registry.render()
+    assert 'pool{name="a"} 1' in text
+    assert 'pool{name="b"} 2' in text
+    assert "# TYPE broken gauge" in text
+
+
+def test_metrics_endpoint_reports_route_templates():
+    client = TestClient(app)
+    client.get("/health")
+    client.get("/reviews/does-not-exist")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in text
+    assert 'route="/reviews/{review_id}",status="404"' in text
+    assert "does-not-exist" not in text
+    assert "analysis_cache_hit_ratio" in text
+    assert "llm_concurrency_limit" in text
+    assert "db_query_duration_seconds_bucket" in text
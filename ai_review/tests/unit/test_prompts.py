@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from ai_review.models.review import ReviewCategory, ReviewSuggestion, SeverityLevel
+from ai_review.services import llm
+from ai_review.services.prompts import compact_code, system_prompt
+
+LICENSE = """#!/usr/bin/env python
+# Copyright (c) 2024 Example Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+
+"""
+
+TABLE = "TABLE = [\n" + "".join(f"    ({i}, 0x{i:02x}, 'row {i}'),\n" for i in range(30)) + "]\n"
+
+
+def count(text):
+    return len(text.split())
+
+
+def suggestion(line_start, line_end):
+    return ReviewSuggestion(
+        line_start=line_start,
+        line_end=line_end,
+        file_path="example.py",
+        message="Issue",
+        category=ReviewCategory.LINT,
+        severity=SeverityLevel.LOW,
+    )
+
+
+def test_compaction_elides_boilerplate_and_keeps_line_map():
+    """Test that compaction shrinks the prompt and maps lines back."""
+    code = LICENSE + "import os   \n\n\n\n\ndef f():\n    return os.sep\n" + TABLE + "x = '" + "a" * 1000 + "'\n"
+    compacted = compact_code(code, count, max_line_length=100, literal_run_min=20)
+    lines = compacted.code.splitlines()
+
+    assert lines[0] == "#!/usr/bin/env python"
+    assert lines[1] == "... [4 lines elided: license header] ..."
+    assert lines[3] == "import os"
+    assert lines[5] == "def f():"
+    assert "... [27 lines elided: literal data] ..." in lines
+    assert lines[-1].endswith("... [906 chars truncated]")
+    assert compacted.tokens_saved > 0
+
+    # "def f():" is line 12 of the original file
+    assert compacted.remap([suggestion(6, 7)])[0].line_start == 12
+    # A suggestion on the elided header covers the whole header
+    remapped = compacted.remap([suggestion(2, 2)])[0]
+    assert (remapped.line_start, remapped.line_end) == (2, 5)
+
+
+def test_compaction_is_a_no_op_on_clean_code():
+    """Test that clean code is sent unchanged."""
+    code = "def f():\n    return 1\n"
+    compacted = compact_code(code, count)
+
+    assert compacted.code == code
+    assert compacted.tokens_saved == 0
+    assert compacted.remap([suggestion(2, 2)])[0].line_start == 2
+
+
+def test_system_prompt_is_rendered_once_per_settings():
+    """Test that prompt templates are cached per language and settings."""
+    system_prompt.cache_clear()
+    first = llm._build_messages("x", "a.py", "python", {"focus_areas": ["security"]})
+    second = llm._build_messages("y", "b.py", "python", {"focus_areas": ["security"]})
+
+    assert first[0]["content"] is second[0]["content"]
+    assert "Focus on these areas: security" in first[0]["content"]
+    assert system_prompt.cache_info().hits == 1
+
+
+def test_analysis_reports_original_lines_and_tokens_saved():
+    """Test that the LLM sees compacted code but results use original lines."""
+    code = LICENSE + "def f():\n    pass\n"
+
+    def fake_llm(prompt_code, file_path, language, settings, start_time):
+        assert "Licensed under" not in prompt_code
+        return {"suggestions": [suggestion(4, 5)], "summary": "ok", "execution_time": 0.0}
+
+    with patch.object(llm, "_llm_analyze_code", fake_llm):
+        result = llm._llm_analyze_chunked(code, "a.py", "python", None, 0.0)
+
+    assert [(s.line_start, s.line_end) for s in result["suggestions"]] == [(7, 8)]
+    assert result["prompt_tokens_saved"] > 0
@@ -0,0 +1,125 @@
+import random
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI, OpenAI
+
+from ai_review.api.fake_llm import FakeLLMConfig, LatencyDistribution, create_app
+from ai_review.services import llm
+from ai_review.services.providers import LLMProvider, OpenAIProvider, create_provider
+from ai_review.services.ratelimit import AdaptiveLimiter
+
+CODE = "def f():\n    print('hi')  # TODO\n    return eval('1')\n"
+
+
+def provider_for(app):
+    """An OpenAIProvider whose clients talk to app in-process."""
+    provider = OpenAIProvider(api_key="test", base_url="http://fake/v1")
+    provider.client = OpenAI(
+        api_key="test", base_url="http://fake/v1", max_retries=0,
+        http_client=TestClient(app, base_url="http://fake")
+    )
+    provider.async_client = AsyncOpenAI(
+        api_key="test", base_url="http://fake/v1", max_retries=0,
+        http_client=httpx.AsyncClient(app=app, base_url="http://fake")
+    )
+    return provider
+
+
+def config(**overrides):
+    values = {
+        "LLM_PROVIDER": "auto",
+        "OPENAI_API_KEY": None,
+        "OPENAI_BASE_URL": None,
+        "LLM_REQUEST_TIMEOUT_SECONDS": 5.0,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_create_provider_follows_config():
+    """Test provider selection from settings."""
+    assert create_provider(config()) is None
+    assert create_provider(config(OPENAI_API_KEY="your_real_api_key_here")) is None
+    assert create_provider(config(LLM_PROVIDER="mock", OPENAI_API_KEY="sk-1")) is None
+
+    provider = create_provider(config(OPENAI_BASE_URL="http://localhost:8900/v1"))
+    assert isinstance(provider, OpenAIProvider)
+    assert str(provider.client.base_url) == "http://localhost:8900/v1/"
+
+
+def test_providers_must_implement_both_completion_methods():
+    """Test that a provider missing the async method cannot be created."""
+    class SyncOnlyProvider(LLMProvider):
+        def create_completion(self, model, messages, stream=False):
+            return None
+
+    with pytest.raises(TypeError):
+        LLMProvider()
+    with pytest.raises(TypeError):
+        SyncOnlyProvider()
+
+
+def test_latency_distributions():
+    """Test parsing and sampling of latency specs."""
+    rng = random.Random(1)
+    assert LatencyDistribution.parse("fixed:0.25").sample(rng) == 0.25
+    assert all(0.1 <= LatencyDistribution.parse("uniform:0.1,0.2").sample(rng) <= 0.2 for _ in range(20))
+    assert LatencyDistribution.parse("normal:-5,0.1").sample(rng) == 0.0
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("gamma:1,2")
+
+
+def test_analysis_against_fake_server():
+    """Test the real client code path end to end against the fake server."""
+    app = create_app(FakeLLMConfig(latency="fixed:0"))
+
+    with patch.object(llm, "llm_provider", provider_for(app)), \
+            patch.object(llm, "llm_limiter", AdaptiveLimiter(initial_concurrency=2)):
+        result = llm._llm_analyze_code(CODE, "a.py", "python", None, 0.0)
+
+    assert "error" not in result
+    assert [(s.line_start, s.category.value) for s in result["suggestions"]] == [
+        (2, "documentation"), (2, "lint"), (3, "security")
+    ]
+    assert app.state.stats.snapshot()["completed"] == 1
+
+
+def test_fake_server_injects_rate_limits_and_errors():
+    """Test that injected 429s feed the limiter and 500s become error results."""
+    limited = create_app(FakeLLMConfig(latency="fixed:0", rate_limit_rate=1.0, retry_after=0))
+    failing = create_app(FakeLLMConfig(latency="fixed:0", error_rate=1.0))
+    limiter = AdaptiveLimiter(initial_concurrency=2)
+
+    with patch.object(llm, "llm_limiter", limiter):
+        with patch.object(llm.app_settings, "LLM_MAX_RETRIES", 1), \
+                patch.object(llm, "llm_provider", provider_for(limited)):
+            rate_limited = llm._llm_analyze_code(CODE, "a.py", "python", None, 0.0)
+        # No Retry-After on a 500, so a retry would back off for up to a second
+        with patch.object(llm.app_settings, "LLM_MAX_RETRIES", 0), \
+                patch.object(llm, "llm_provider", provider_for(failing)):
+            server_error = llm._llm_analyze_code(CODE, "a.py", "python", None, 0.0)
+
+    assert rate_limited["error"] is True
+    assert limited.state.stats.snapshot()["rate_limited"] == 2
+    assert limiter.stats()["overloaded"] >= 2
+    assert server_error["error"] is True
+    assert failing.state.stats.snapshot()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_streaming_against_fake_server():
+    """Test that streamed completions from the fake server are parsed as they arrive."""
+    app = create_app(FakeLLMConfig(latency="fixed:0", tokens_per_second=0))
+
+    with patch.object(llm, "use_mock", False), \
+            patch.object(llm.app_settings, "LOCAL_ANALYSIS_ENABLED", False), \
+            patch.object(llm, "llm_provider", provider_for(app)), \
+            patch.object(llm, "llm_limiter", AdaptiveLimiter(initial_concurrency=2)):
+        events = [event async for event in llm.stream_analyze_code(CODE, "a.py", use_cache=False)]
+
+    assert [name for name, _ in events] == ["suggestion"] * 3 + ["result"]
+    assert events[-1][1]["summary"] == "Fake review of 3 lines with 3 findings."
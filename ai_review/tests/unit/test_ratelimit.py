@@ -0,0 +1,90 @@
+import httpx
+import openai
+import pytest
+from unittest.mock import MagicMock, patch
+
+from ai_review.services import llm
+from ai_review.services.ratelimit import AdaptiveLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def rate_limit_error(retry_after="0"):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def test_token_bucket_refills_over_time():
+    """Test that a bucket refills at its per-minute rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)
+    bucket.take(60)
+
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now = 30
+    assert bucket.wait_time(30) == 0
+    # Requests larger than the bucket wait for a full bucket rather than forever
+    assert bucket.wait_time(1000) == pytest.approx(30.0)
+
+
+def test_limiter_enforces_budgets_and_concurrency():
+    """Test that permits are refused while any budget is exhausted."""
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(requests_per_minute=60, tokens_per_minute=600, initial_concurrency=1, clock=clock)
+
+    first = limiter.acquire(100)
+    assert limiter._try_acquire(limiter._enqueue(), 100, clock.now) > 0  # no free slot
+    limiter._waiting.clear()
+
+    limiter.release(first, latency=1.0, used_tokens=550)
+    ticket = limiter._enqueue()
+    # 550 of 600 tokens used, 100 more must wait for the bucket to refill
+    assert limiter._try_acquire(ticket, 100, clock.now) > 0
+    clock.now = 10
+    assert limiter._try_acquire(ticket, 100, clock.now) == 0
+
+
+def test_limiter_adapts_concurrency_aimd():
+    """Test additive increase on success and one multiplicative cut per window."""
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(max_concurrency=8, initial_concurrency=4, target_latency=5.0, clock=clock)
+
+    for _ in range(4):
+        limiter.release(limiter.acquire(1), latency=1.0)
+    assert 4.9 < limiter.limit < 5.1
+
+    permits = [limiter.acquire(1) for _ in range(3)]
+    clock.now = 1
+    for permit in permits:
+        limiter.release(permit, overloaded=True, retry_after=2.0)
+    assert 2.4 < limiter.limit < 2.6
+    assert limiter._blocked_until == 3.0
+
+    clock.now = 3
+    limiter.release(limiter.acquire(1), latency=10.0)
+    assert limiter.limit < 2.4
+
+
+def test_rate_limited_requests_are_retried():
+    """Test that a 429 is retried instead of producing an empty review."""
+    response = MagicMock()
+    response.choices[0].message.content = '{"suggestions": [], "summary": "ok"}'
+    response.usage.total_tokens = 10
+    provider = MagicMock()
+    provider.create_completion.side_effect = [rate_limit_error(), response]
+    limiter = AdaptiveLimiter(initial_concurrency=2)
+
+    with patch.object(llm, "llm_provider", provider), patch.object(llm, "llm_limiter", limiter):
+        result = llm._llm_analyze_code("x = 1", "a.py", "python", None, 0.0)
+
+    assert result["summary"] == "ok"
+    assert "error" not in result
+    assert provider.create_completion.call_count == 2
+    assert limiter.stats()["overloaded"] == 1
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from sqlalchemy import event, select
+
+from ai_review.db.models import Review, Suggestion
+from ai_review.models.review import (
+    BatchReviewRequest,
+    IncrementalReviewRequest,
+    ReviewRequest,
+    ReviewSuggestion,
+    ReviewCategory,
+    SeverityLevel,
+)
+from ai_review.services import review as review_service
+from ai_review.services.cache import ReviewCache
+
+
+@pytest.fixture
+def analysis_result():
+    """Analysis result fixture."""
+    return {
+        "suggestions": [
+            ReviewSuggestion(
+                line_start=3,
+                line_end=4,
+                file_path="example.py",
+                message="Function is too complex",
+                category=ReviewCategory.REFACTOR,
+                severity=SeverityLevel.MEDIUM,
+            )
+        ],
+        "summary": "The code needs some refactoring.",
+        "execution_time": 0.5,
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_review_round_trip(async_db_session, analysis_result):
+    """Test that async create, get, list and rerun agree with each other."""
+    with patch.object(review_service, "analyze_code_async", return_value=analysis_result) as mock_analyze:
+        created = await review_service.create_review_async(
+            ReviewRequest(code="def f(): pass", file_path="example.py"), async_db_session
+        )
+
+        fetched = await review_service.get_review_async(created.review_id, async_db_session)
+        assert fetched.summary == analysis_result["summary"]
+        assert fetched.suggestions[0].category == ReviewCategory.REFACTOR
+
+        listed = await review_service.list_reviews_async(db=async_db_session)
+        assert [r["id"] for r in listed] == [created.review_id]
+        assert listed[0]["suggestion_count"] == 1
+
+        rerun = await review_service.rerun_review_async(created.review_id, async_db_session)
+        assert rerun.review_id == created.review_id
+        assert mock_analyze.call_args.kwargs["refresh_cache"] is True
+
+        listed = await review_service.list_reviews_async(db=async_db_session)
+        assert listed[0]["suggestion_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_get_review_missing(async_db_session):
+    """Test that unknown review IDs return None."""
+    assert await review_service.get_review_async("missing", async_db_session) is None
+
+
+@pytest.mark.asyncio
+async def test_batch_review_limits_concurrency(async_db_session, analysis_result):
+    """Test that batch reviews respect max_concurrency and share a batch id."""
+    running = 0
+    peak = 0
+
+    async def fake_analyze(**kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return dict(analysis_result)
+
+    request = BatchReviewRequest(
+        reviews=[ReviewRequest(code=f"x = {i}", file_path=f"file_{i}.py") for i in range(6)],
+        max_concurrency=2
+    )
+    with patch.object(review_service, "analyze_code_async", side_effect=fake_analyze):
+        batch = await review_service.create_reviews_batch_async(request, async_db_session)
+
+    assert peak == 2
+    assert len(batch.results) == 6
+
+    rows = (await async_db_session.scalars(select(Review).where(Review.batch_id == batch.batch_id))).all()
+    assert {row.id for row in rows} == {result.review_id for result in batch.results}
+
+
+@pytest.mark.asyncio
+async def test_incremental_review_analyzes_only_changed_hunks(async_db_session, analysis_result):
+    """Test that incremental reviews send hunks only and carry suggestions forward."""
+    base_code = "".join("x\n" if number == 10 else f"line_{number}\n" for number in range(1, 13))
+    with patch.object(review_service, "analyze_code_async", return_value=analysis_result):
+        base = await review_service.create_review_async(
+            ReviewRequest(code=base_code, file_path="example.py"), async_db_session
+        )
+
+    excerpt_result = dict(analysis_result, suggestions=[analysis_result["suggestions"][0].model_copy(
+        update={"line_start": 2, "line_end": 2, "message": "New issue"}
+    )])
+    with patch.object(review_service, "analyze_code_async", return_value=excerpt_result) as mock_analyze:
+        incremental = await review_service.create_incremental_review_async(
+            IncrementalReviewRequest(base_review_id=base.review_id, diff="@@ -10,1 +10,2 @@\n x\n+y\n"),
+            async_db_session
+        )
+
+    assert mock_analyze.call_args.kwargs["code"] == "x\ny\n"
+    # Hunks are not whole modules, so the local analyzers must not parse them
+    assert mock_analyze.call_args.kwargs["settings"]["fragment"] is True
+    assert incremental.base_review_id == base.review_id
+    assert [(s.line_start, s.message) for s in incremental.suggestions] == [
+        (3, "Function is too complex"),
+        (11, "New issue"),
+    ]
+
+
+def test_list_reviews_uses_one_query(db_engine, db_session, analysis_result):
+    """Test that listing reviews does not load suggestions per review."""
+    with patch.object(review_service, "analyze_code", return_value=analysis_result):
+        for i in range(3):
+            review_service.create_review(ReviewRequest(code=f"x = {i}", file_path=f"f{i}.py"), db_session)
+
+    statements = []
+    event.listen(db_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    listed = review_service.list_reviews(db=db_session)
+
+    assert len(statements) == 1
+    assert "suggestions" not in statements[0]
+    assert [r["suggestion_count"] for r in listed] == [1, 1, 1]
+    assert db_session.query(Suggestion).count() == 3
+
+
+def test_list_reviews_keyset_pagination(db_session, analysis_result):
+    """Test that cursor pages cover every review exactly once."""
+    with patch.object(review_service, "analyze_code", return_value=analysis_result):
+        for i in range(5):
+            review_service.create_review(ReviewRequest(code=f"x = {i}", file_path=f"f{i}.py"), db_session)
+
+    seen = []
+    cursor = None
+    while True:
+        page = review_service.list_reviews(limit=2, db=db_session, after=cursor)
+        seen.extend(r["id"] for r in page)
+        cursor = review_service.next_cursor(page, 2)
+        if cursor is None:
+            break
+
+    assert seen == [r["id"] for r in review_service.list_reviews(db=db_session)]
+    assert len(set(seen)) == 5
+    with pytest.raises(ValueError):
+        review_service.list_reviews(db=db_session, after="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_rerun_analyzes_stored_source(async_db_session, analysis_result):
+    """Test that reruns re-analyze the code originally submitted."""
+    code = "def original():\n    return 42\n"
+    with patch.object(review_service, "analyze_code_async", return_value=analysis_result):
+        review = await review_service.create_review_async(
+            ReviewRequest(code=code, file_path="example.py"), async_db_session
+        )
+    with patch.object(review_service, "analyze_code_async", return_value=analysis_result) as mock_analyze:
+        await review_service.rerun_review_async(review.review_id, async_db_session)
+
+    assert mock_analyze.call_args.kwargs["code"] == code
+
+
+@pytest.mark.asyncio
+async def test_incremental_review_rejects_a_diff_of_another_base(async_db_session, analysis_result):
+    """Test that a diff that does not apply to the base is rejected before anything is stored."""
+    with patch.object(review_service, "analyze_code_async", return_value=analysis_result):
+        base = await review_service.create_review_async(
+            ReviewRequest(code="a\nb\n", file_path="example.py"), async_db_session
+        )
+
+    with patch.object(review_service, "analyze_code_async") as mock_analyze:
+        with pytest.raises(review_service.BaseMismatchError):
+            await review_service.create_incremental_review_async(
+                IncrementalReviewRequest(base_review_id=base.review_id, diff="@@ -2,1 +2,2 @@\n z\n+c\n"),
+                async_db_session
+            )
+
+    mock_analyze.assert_not_called()
+    assert len((await async_db_session.scalars(select(Review))).all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_incremental_review_stores_patched_source(async_db_session, analysis_result):
+    """Test that a diff-mode incremental review stores the reconstructed file."""
+    with patch.object(review_service, "analyze_code_async", return_value=analysis_result):
+        base = await review_service.create_review_async(
+            ReviewRequest(code="a\nb\n", file_path="example.py"), async_db_session
+        )
+        incremental = await review_service.create_incremental_review_async(
+            IncrementalReviewRequest(base_review_id=base.review_id, diff="@@ -2,1 +2,2 @@\n b\n+c\n"),
+            async_db_session
+        )
+
+    code = await review_service.get_code_for_review_async(incremental.review_id, async_db_session)
+    assert code == "a\nb\nc\n"
+
+
+@pytest.mark.asyncio
+async def test_review_json_matches_response_model(async_db_session, analysis_result):
+    """Test that the fast JSON path produces exactly what ReviewResponse would."""
+    with patch.object(review_service, "analyze_code_async", return_value=analysis_result):
+        created = await review_service.create_review_async(
+            ReviewRequest(code="def f(): pass", file_path="example.py"), async_db_session
+        )
+
+    model = await review_service.get_review_async(created.review_id, async_db_session)
+    payload = await review_service.get_review_json_async(created.review_id, async_db_session)
+    assert json.loads(payload) == model.model_copy(update={"timings": None}).model_dump(mode="json")
+
+    payload = await review_service.get_review_json_async(created.review_id, async_db_session, include_timings=True)
+    assert json.loads(payload)["timings"] == model.timings
+    assert await review_service.get_review_json_async("missing", async_db_session) is None
+
+
+@pytest.mark.asyncio
+async def test_completed_reviews_are_served_from_the_review_cache(async_db_session, analysis_result):
+    """Test that a cached review skips the database until a rerun invalidates it."""
+    with patch.object(review_service, "review_cache", ReviewCache()), \
+            patch.object(review_service, "analyze_code_async", return_value=analysis_result):
+        created = await review_service.create_review_async(
+            ReviewRequest(code="def f(): pass", file_path="example.py"), async_db_session
+        )
+        first = await review_service.get_review_json_async(created.review_id, async_db_session)
+
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(async_db_session.bind.sync_engine, "before_cursor_execute", listener)
+        try:
+            assert await review_service.get_review_json_async(created.review_id, async_db_session) == first
+            assert statements == []
+
+            rerun_result = dict(analysis_result, summary="Rerun summary.")
+            with patch.object(review_service, "analyze_code_async", return_value=rerun_result):
+                await review_service.rerun_review_async(created.review_id, async_db_session)
+            payload = await review_service.get_review_json_async(created.review_id, async_db_session)
+        finally:
+            event.remove(async_db_session.bind.sync_engine, "before_cursor_execute", listener)
+
+    assert json.loads(payload)["summary"] == "Rerun summary."
+
+
+@pytest.mark.asyncio
+async def test_pending_reviews_are_not_cached(async_db_session, analysis_result):
+    """Test that a review still waiting for a worker is read from the database every time."""
+    cache = ReviewCache()
+    with patch.object(review_service, "review_cache", cache), \
+            patch.object(review_service, "analyze_code_async", return_value=analysis_result):
+        created = await review_service.create_review_async(
+            ReviewRequest(code="def f(): pass", file_path="example.py"), async_db_session
+        )
+        review = await async_db_session.get(Review, created.review_id)
+        review.status = "pending"
+        await async_db_session.commit()
+
+        await review_service.get_review_json_async(created.review_id, async_db_session)
+
+    assert cache.get(created.review_id) is None
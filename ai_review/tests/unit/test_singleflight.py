@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from ai_review.db.models import AnalysisLease
+from ai_review.services import llm
+from ai_review.services.singleflight import DatabaseLease, SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    """Test that identical calls from many threads run the work once."""
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "result"
+
+    def call(_):
+        return flights.do("key", work)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(call, 0)
+        started.wait()
+        followers = list(executor.map(call, range(7)))
+
+    assert len(calls) == 1
+    assert leader.result() == ("result", False)
+    assert followers == [("result", True)] * 7
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_identical_async_analyses_are_coalesced():
+    """Test that concurrent identical reviews make a single LLM call."""
+    calls = []
+
+    async def slow_analysis(code, file_path, language, settings, start_time):
+        calls.append(file_path)
+        await asyncio.sleep(0.05)
+        return llm._mock_analyze_code(code, file_path, language, settings, start_time)
+
+    with patch.object(llm, "use_mock", False), \
+            patch.object(llm.app_settings, "LOCAL_ANALYSIS_ENABLED", False), \
+            patch.object(llm, "_llm_analyze_chunked_async", slow_analysis):
+        results = await asyncio.gather(*(
+            llm.analyze_code_async("import os\n", f"f{i}.py", language="python", use_cache=False)
+            for i in range(5)
+        ))
+
+    assert len(calls) == 1
+    assert [r["suggestions"][0].file_path for r in results] == [f"f{i}.py" for i in range(5)]
+    assert sum(1 for r in results if r.get("coalesced")) == 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_does_not_cancel_the_flight():
+    """Test that a follower giving up leaves the leader and other followers unaffected."""
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "result"
+
+    leader = asyncio.create_task(flights.do_async("key", work))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(flights.do_async("key", work))
+    follower = asyncio.create_task(flights.do_async("key", work))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await leader == ("result", False)
+    assert await follower == ("result", True)
+    assert cancelled.cancelled()
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_from_a_cancelled_leader():
+    """Test that cancelling the leader makes a follower run the work instead of failing it."""
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    leader = asyncio.create_task(flights.do_async("key", work))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(flights.do_async("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    results = await asyncio.gather(*followers)
+    assert len(calls) == 2
+    assert sorted(results) == [("result", False), ("result", True), ("result", True)]
+    assert flights.in_flight() == 0
+
+
+def test_database_lease_is_exclusive_until_released_or_expired(db_engine):
+    """Test that only one process can hold a lease at a time."""
+    session_factory = sessionmaker(bind=db_engine)
+    first = DatabaseLease(session_factory, ttl=60)
+    second = DatabaseLease(session_factory, ttl=60)
+
+    assert first.acquire("key") is True
+    assert second.acquire("key") is False
+    assert second.is_held("key") is True
+
+    first.release("key")
+    assert second.acquire("key") is True
+
+    # A lease whose holder died is taken over once it expires
+    with session_factory() as db:
+        db.get(AnalysisLease, "key").expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+    assert first.acquire("key") is True
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from ai_review.db.models import Base, Review
+from ai_review.models.review import ReviewCategory, ReviewRequest
+from ai_review.services import llm, review
+from ai_review.services.streaming import SuggestionStreamParser, format_sse
+
+DOCUMENT = json.dumps({
+    "suggestions": [
+        {
+            "line_start": 1,
+            "line_end": 2,
+            "file_path": "example.py",
+            "message": 'Braces {inside} a "string" are ignored',
+            "category": "style",
+            "severity": "low",
+            "suggested_fix": None
+        },
+        {
+            "line_start": 4,
+            "line_end": 4,
+            "file_path": "example.py",
+            "message": "Unused import",
+            "category": "lint",
+            "severity": "medium",
+            "suggested_fix": "[remove it]"
+        }
+    ],
+    "summary": "Two issues."
+})
+
+
+def test_parser_emits_suggestions_as_they_complete():
+    """Test that each suggestion is returned as soon as its object closes."""
+    parser = SuggestionStreamParser()
+    emitted = []
+    first_seen_at = None
+    for index, char in enumerate(DOCUMENT):
+        for suggestion in parser.feed(char):
+            emitted.append(suggestion)
+            if first_seen_at is None:
+                first_seen_at = index
+
+    assert [s["line_start"] for s in emitted] == [1, 4]
+    assert first_seen_at < DOCUMENT.index("Unused import")
+    assert parser.result()["summary"] == "Two issues."
+
+
+def test_format_sse():
+    """Test server-sent event framing."""
+    assert format_sse("done", {"review_id": "abc"}) == 'event: done\ndata: {"review_id": "abc"}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_stream_analyze_code_yields_suggestions_then_result():
+    """Test streaming against a fake OpenAI stream."""
+    async def fake_stream():
+        for start in range(0, len(DOCUMENT), 7):
+            delta = SimpleNamespace(content=DOCUMENT[start:start + 7])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    fake_provider = SimpleNamespace(create_completion_async=AsyncMock(return_value=fake_stream()))
+    with patch.object(llm, "use_mock", False), \
+            patch.object(llm.app_settings, "LOCAL_ANALYSIS_ENABLED", False), \
+            patch.object(llm, "llm_provider", fake_provider):
+        events = [
+            event async for event in llm.stream_analyze_code("import os", "example.py", use_cache=False)
+        ]
+
+    assert [name for name, _ in events] == ["suggestion", "suggestion", "result"]
+    assert events[1][1].category == ReviewCategory.LINT
+    assert events[2][1]["summary"] == "Two issues."
+    assert len(events[2][1]["suggestions"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_streamed_review_is_saved_after_the_client_disconnects(tmp_path):
+    """Test that closing the stream after the summary does not cancel the save."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stream.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    request = ReviewRequest(code="import os\n", file_path="a.py", use_cache=False)
+    stream = review.stream_review_async(request, session_factory)
+    async for chunk in stream:
+        if chunk.startswith("event: summary"):
+            break
+    await stream.aclose()
+    await asyncio.gather(*review._pending_saves)
+
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count(Review.id))) == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_identical_streams_share_one_llm_call():
+    """Test that a stream joining an identical one in flight replays the leader's suggestions."""
+    async def fake_stream():
+        for start in range(0, len(DOCUMENT), 7):
+            await asyncio.sleep(0.001)
+            delta = SimpleNamespace(content=DOCUMENT[start:start + 7])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    create = AsyncMock(side_effect=lambda *args, **kwargs: fake_stream())
+
+    async def consume(file_path):
+        return [event async for event in llm.stream_analyze_code("import os", file_path, use_cache=False)]
+
+    with patch.object(llm, "use_mock", False), \
+            patch.object(llm.app_settings, "LOCAL_ANALYSIS_ENABLED", False), \
+            patch.object(llm, "llm_provider", SimpleNamespace(create_completion_async=create)):
+        leader, follower = await asyncio.gather(consume("a.py"), consume("b.py"))
+
+    create.assert_called_once()
+    assert [name for name, _ in follower] == ["suggestion", "suggestion", "result"]
+    assert follower[-1][1]["coalesced"] is True
+    assert [s.message for _, s in follower[:2]] == [s.message for _, s in leader[:2]]
+    assert all(s.file_path == "b.py" for _, s in follower[:2])
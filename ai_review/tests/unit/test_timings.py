@@ -0,0 +1,101 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ai_review.db.models import Review
+from ai_review.models.review import ReviewRequest
+from ai_review.services import llm
+from ai_review.services import review as review_service
+from ai_review.services.timings import add_stage, record_timings, stage, summarize_timings
+
+
+def test_stages_are_only_recorded_inside_a_review():
+    """Test that recording outside record_timings is a no-op."""
+    with stage("parse"):
+        pass
+    add_stage("llm", 1.0)
+
+    with record_timings() as timings:
+        with stage("parse"):
+            pass
+        add_stage("llm", 0.5)
+        add_stage("llm", 0.25)
+
+    recorded = timings.as_dict()
+    assert list(recorded) == ["llm", "parse"]
+    assert recorded["llm"] == 0.75
+
+
+@pytest.mark.asyncio
+async def test_stages_follow_the_review_into_tasks_and_threads():
+    """Test that tasks and to_thread calls record into their caller's breakdown."""
+    async def in_task():
+        add_stage("llm", 1.0)
+
+    with record_timings() as timings:
+        await asyncio.gather(in_task(), in_task())
+        await asyncio.to_thread(add_stage, "cache_lookup", 0.5)
+
+    assert timings.as_dict() == {"cache_lookup": 0.5, "llm": 2.0}
+
+
+def test_summarize_timings():
+    """Test per-stage count, mean, percentiles and max."""
+    breakdowns = [{"llm": float(seconds), "total": float(seconds) + 1} for seconds in range(1, 101)]
+    breakdowns.append({"total": 1.0})
+
+    summary = summarize_timings(breakdowns)
+
+    assert list(summary) == ["llm", "total"]
+    assert summary["llm"]["count"] == 100
+    assert summary["llm"]["mean"] == 50.5
+    assert summary["llm"]["p50"] == 50.5
+    assert summary["llm"]["p99"] == pytest.approx(99.01)
+    assert summary["llm"]["max"] == 100.0
+    assert summary["total"]["count"] == 101
+
+
+def test_llm_analysis_records_its_stages():
+    """Test that an LLM analysis records prompt, limiter, provider and parse stages."""
+    response = MagicMock()
+    response.choices[0].message.content = '{"suggestions": [], "summary": "ok"}'
+    response.usage.total_tokens = 10
+    provider = MagicMock()
+    provider.create_completion.return_value = response
+
+    with patch.object(llm, "llm_provider", provider), record_timings() as timings:
+        llm._llm_analyze_chunked("x = 1\n", "a.py", "python", None, 0.0)
+
+    assert {"prompt_build", "llm_queue", "llm", "parse"} <= set(timings.as_dict())
+
+
+@pytest.mark.asyncio
+async def test_review_timings_are_stored_and_aggregated(async_db_session):
+    """Test that a review stores its breakdown and the summary aggregates it."""
+    async def fake_analyze(**kwargs):
+        add_stage("llm", 0.2)
+        return {"suggestions": [], "summary": "ok", "execution_time": 0.2}
+
+    with patch.object(review_service, "analyze_code_async", side_effect=fake_analyze):
+        created = await review_service.create_review_async(
+            ReviewRequest(code="x = 1", file_path="a.py", language="python"), async_db_session
+        )
+
+    assert {"llm", "db_write", "db_commit", "total"} <= set(created.timings)
+
+    stored = (await async_db_session.get(Review, created.review_id)).timings
+    assert stored["llm"] == 0.2
+    # The commit cannot time itself into the row it commits
+    assert "db_commit" not in stored
+
+    fetched = await review_service.get_review_async(created.review_id, async_db_session)
+    assert fetched.timings == stored
+
+    summary = await review_service.get_timing_summary_async(async_db_session, language="python")
+    assert summary.reviews == 1
+    assert summary.stages["llm"].p99 == 0.2
+
+    summary = await review_service.get_timing_summary_async(async_db_session, language="go")
+    assert summary.reviews == 0
+    assert summary.stages == {}
@@ -0,0 +1,194 @@
+"""
+Minimal in-process metrics rendered in the Prometheus text format.
+
+Recording a value costs a dict lookup and a short critical section, so
+instruments are safe to use on the request path. Values that already live
+elsewhere (cache counters, pool sizes, queue depth) are read through
+callbacks only when /metrics is scraped.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+# A callback returns one value, or one value per tuple of label values
+CallbackResult = Union[float, Dict[LabelValues, float]]
+
+
+class Registry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, "Metric"] = {}
+
+    def register(self, metric: "Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def get(self, name: str) -> Optional["Metric"]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    """Base class for a named metric with optional labels."""
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], CallbackResult]] = None,
+        registry: Optional[Registry] = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def samples(self) -> Dict[LabelValues, float]:
+        if self.function is None:
+            with self._lock:
+                return dict(self._values)
+        try:
+            value = self.function()
+        except Exception:
+            # A failing callback must not break the whole scrape
+            return {}
+        return value if isinstance(value, dict) else {(): value}
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, values)} {_number(value)}"
+            for values, value in sorted(self.samples().items())
+        ]
+
+    def _add(self, amount: float, values: LabelValues) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+    kind = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._add(amount, labelvalues)
+
+
+class Gauge(Metric):
+    """A value that goes up and down."""
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._add(amount, labelvalues)
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._add(-amount, labelvalues)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY
+    ):
+        super().__init__(name, documentation, labelnames, registry=registry)
+        self.buckets = tuple(sorted(bucket for bucket in buckets if not math.isinf(bucket)))
+        # Per label set: bucket counts (last slot is +Inf), then sum
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        """Observe the duration of the with block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = {values: list(counts) for values, counts in self._series.items()}
+        lines = []
+        for values, counts in sorted(series.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _labels(self.labelnames + ("le",), values + (_number(bound),))
+                lines.append(f"{self.name}_bucket{labels} {_number(cumulative)}")
+            labels = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_number(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {_number(cumulative)}")
+        return lines
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1 @@
+"""Benchmark suite; run with python -m benchmarks."""
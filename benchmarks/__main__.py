@@ -0,0 +1,115 @@
+"""
+Reproducible benchmarks for the API, service and database hot paths.
+
+    python -m benchmarks                      # 10k and 1M suggestion datasets
+    python -m benchmarks --quick              # 10k only, fewer requests
+    python -m benchmarks compare old.json new.json
+
+Each dataset runs in its own process against a copy of a seeded SQLite
+database, with LLM calls answered by the fake server in
+ai_review.api.fake_llm after a fixed delay. Results are written as JSON
+tagged with the commit they were measured on.
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.harness import compare, environment, write_results
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def step(*args: str) -> None:
+    subprocess.run([sys.executable, "-m", "benchmarks.suite", *args], cwd=ROOT, check=True)
+
+
+def copy_database(source: Path, target: Path) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{target}{suffix}").unlink(missing_ok=True)
+        if Path(f"{source}{suffix}").exists():
+            shutil.copyfile(f"{source}{suffix}", f"{target}{suffix}")
+
+
+def run_benchmarks(args: argparse.Namespace) -> None:
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    sizes = [10_000] if args.quick else args.sizes
+    requests = 50 if args.quick else args.requests
+    iterations = 50 if args.quick else args.iterations
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as scratch:
+        output = Path(scratch) / "results.json"
+        for size in sizes:
+            # Seeding 1M suggestions is slow, so seeded databases are kept between runs
+            seeded = args.workdir / f"seed-{size}.db"
+            if not seeded.exists():
+                step("seed", "--db", str(seeded), "--size", str(size))
+            working = Path(scratch) / f"bench-{size}.db"
+            copy_database(seeded, working)
+            step(
+                "run", "--db", str(working), "--size", str(size),
+                "--concurrency", ",".join(str(c) for c in args.concurrency),
+                "--requests", str(requests), "--iterations", str(iterations),
+                "--output", str(output)
+            )
+            results.extend(json.loads(output.read_text()))
+
+        step("cli", "--tree", str(args.workdir / "tree"), "--output", str(output))
+        results.extend(json.loads(output.read_text()))
+
+    meta = environment()
+    meta["config"] = {"sizes": sizes, "concurrency": args.concurrency, "requests": requests, "iterations": iterations}
+    write_results(args.output, meta, results)
+    for result in results:
+        labels = " ".join(f"{k}={result[k]}" for k in ("dataset", "concurrency", "files") if k in result)
+        cpu = f"  cpu {result['cpu_ms_per_call']:>8.3f}ms/call" if "cpu_ms_per_call" in result else ""
+        print(
+            f"{result['name']:<32} {labels:<28} {result['throughput_rps']:>10.1f} req/s  "
+            f"p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  p99 {result['p99_ms']:>9.2f}ms{cpu}"
+        )
+    print(f"Results written to {args.output}")
+
+
+def compare_results(args: argparse.Namespace) -> None:
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    for row in compare(baseline, current):
+        changes = "  ".join(
+            f"{metric} {row[metric]:>10.2f} ({row[f'{metric}_change']:+.1%})"
+            if row[f"{metric}_change"] is not None else f"{metric} {row[metric]:>10.2f}"
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "cpu_ms_per_call")
+            if metric in row
+        )
+        print(f"{row['benchmark']:<48} {changes}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run or compare benchmarks.")
+    commands = parser.add_subparsers(dest="command")
+
+    compare_parser = commands.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+
+    parser.add_argument("--quick", action="store_true", help="10k dataset only, fewer requests")
+    parser.add_argument("--sizes", type=lambda v: [int(s) for s in v.split(",")], default=[10_000, 1_000_000])
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per micro-benchmark")
+    parser.add_argument("--workdir", type=Path, default=ROOT / ".benchmarks")
+    parser.add_argument("--output", type=Path, default=ROOT / ".benchmarks" / "results.json")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        compare_results(args)
+    else:
+        run_benchmarks(args)
+
+
+if __name__ == "__main__":
+    main()
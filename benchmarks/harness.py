@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile (q in 0-100) of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(
+    name: str,
+    latencies: List[float],
+    elapsed: float,
+    errors: int = 0,
+    cpu: Optional[float] = None,
+    **labels: Any
+) -> Dict[str, Any]:
+    """
+    Reduce raw latencies (seconds) to the figures written to the results file.
+
+    cpu is the process CPU time the calls used in total, if measured.
+    """
+    ordered = sorted(latencies)
+    count = len(ordered)
+    result = {
+        "name": name,
+        **labels,
+        "requests": count + errors,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+    if cpu is not None:
+        result["cpu_ms_per_call"] = round(cpu / count * 1000, 3) if count else 0.0
+    return result
+
+
+async def run_load(
+    send: Callable[[int], Awaitable[bool]],
+    concurrency: int,
+    total: int
+) -> Dict[str, Any]:
+    """
+    Issue total calls of send(i) from concurrency workers in a closed loop.
+
+    send returns False for a failed request; failures are counted but not
+    included in the latencies.
+    """
+    latencies: List[float] = []
+    errors = 0
+    next_index = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in next_index:
+            started = time.perf_counter()
+            try:
+                ok = await send(index)
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"latencies": latencies, "elapsed": time.perf_counter() - started, "errors": errors}
+
+
+def time_calls(fn: Callable[[int], Any], iterations: int, warmup: int = 3) -> Dict[str, Any]:
+    """Call fn(i) iterations times, after a few untimed warmup calls."""
+    for index in range(warmup):
+        fn(index)
+    latencies = []
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    for index in range(iterations):
+        call_started = time.perf_counter()
+        fn(index)
+        latencies.append(time.perf_counter() - call_started)
+    return {
+        "latencies": latencies,
+        "elapsed": time.perf_counter() - started,
+        "cpu": time.process_time() - cpu_started,
+        "errors": 0,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the commit and machine a run was made on."""
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True, timeout=30
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: Path, meta: Dict[str, Any], results: List[Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    """Identify a result across runs by its name and labels."""
+    labels = [f"{key}={value}" for key, value in sorted(result.items()) if key in ("dataset", "concurrency")]
+    return " ".join([result["name"], *labels])
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Pair up results from two runs with the relative change of their key figures."""
+    previous = {result_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        row = {"benchmark": result_key(result)}
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "cpu_ms_per_call"):
+            if metric not in result or metric not in before:
+                continue
+            old, new = before[metric], result[metric]
+            row[metric] = new
+            row[f"{metric}_change"] = round((new - old) / old, 4) if old else None
+        rows.append(row)
+    return rows
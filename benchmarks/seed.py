@@ -0,0 +1,140 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+from ai_review.db.models import Review, SourceBlob, Suggestion
+from ai_review.models.review import ReviewCategory, SeverityLevel
+from ai_review.services.blobs import build_blob_row
+
+SAMPLE_SOURCE = '''import os
+
+
+def read_config(path):
+    # TODO: validate the schema
+    print("loading", path)
+    with open(path) as handle:
+        return handle.read()
+
+
+def main():
+    return read_config(os.environ.get("CONFIG", "config.toml"))
+'''
+
+MESSAGES = [
+    "Consider adding type annotations",
+    "Avoid printing from library code",
+    "Handle a missing file explicitly",
+    "Resolve or track this TODO",
+    "Function is missing a docstring",
+]
+
+BATCH_ROWS = 10000
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def seed_database(engine: Engine, suggestions: int, per_review: int = 10, seed: int = 0) -> int:
+    """
+    Fill the database with reviews carrying suggestions in total, unless it
+    already holds at least that many. Returns the suggestion count.
+
+    Rows are deterministic for a given seed; every review references the
+    same stored source, so reruns have something to analyze.
+    """
+    with engine.connect() as conn:
+        existing = conn.scalar(select(func.count()).select_from(Suggestion))
+    if existing >= suggestions:
+        return existing
+
+    rng = random.Random(seed)
+    blob = build_blob_row(SAMPLE_SOURCE)
+    categories = list(ReviewCategory)
+    severities = list(SeverityLevel)
+    reviews = suggestions // per_review
+
+    with engine.begin() as conn:
+        if conn.scalar(select(SourceBlob.sha256).where(SourceBlob.sha256 == blob["sha256"])) is None:
+            conn.execute(insert(SourceBlob), [{**blob, "created_at": BASE_TIME}])
+
+        review_rows: List[dict] = []
+        suggestion_rows: List[dict] = []
+        for index in range(reviews):
+            review_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            file_path = f"src/module_{index % 500}/file_{index}.py"
+            review_rows.append({
+                "id": review_id,
+                "file_path": file_path,
+                "language": "python",
+                "summary": "Seeded review",
+                "execution_time": 1.0,
+                "settings": {},
+                "status": "completed",
+                "created_at": BASE_TIME + timedelta(seconds=index),
+                "suggestion_count": per_review,
+                "source_sha256": blob["sha256"],
+            })
+            for offset in range(per_review):
+                line = rng.randint(1, 12)
+                suggestion_rows.append({
+                    "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "review_id": review_id,
+                    "line_start": line,
+                    "line_end": line,
+                    "file_path": file_path,
+                    "message": MESSAGES[offset % len(MESSAGES)],
+                    "category": rng.choice(categories),
+                    "severity": rng.choice(severities),
+                    "suggested_fix": None,
+                })
+            if len(suggestion_rows) >= BATCH_ROWS:
+                conn.execute(insert(Review), review_rows)
+                conn.execute(insert(Suggestion), suggestion_rows)
+                review_rows, suggestion_rows = [], []
+        if review_rows:
+            conn.execute(insert(Review), review_rows)
+            conn.execute(insert(Suggestion), suggestion_rows)
+    return reviews * per_review
+
+
+def sample_review_ids(engine: Engine, count: int, seed: int = 0) -> List[str]:
+    """Pick review ids spread across the table, deterministically."""
+    with engine.connect() as conn:
+        ids = conn.scalars(select(Review.id).order_by(Review.created_at)).all()
+    rng = random.Random(seed)
+    return [rng.choice(ids) for _ in range(count)] if ids else []
+
+
+def seed_large_review(engine: Engine, suggestions: int, seed: int = 1) -> str:
+    """Add one review carrying suggestions suggestions and return its id."""
+    rng = random.Random(seed)
+    review_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    with engine.begin() as conn:
+        conn.execute(insert(Review), [{
+            "id": review_id,
+            "file_path": "src/large.py",
+            "language": "python",
+            "summary": "Seeded review with many suggestions",
+            "execution_time": 1.0,
+            "settings": {},
+            "status": "completed",
+            "created_at": BASE_TIME,
+            "suggestion_count": suggestions,
+        }])
+        conn.execute(insert(Suggestion), [
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "review_id": review_id,
+                "line_start": index + 1,
+                "line_end": index + 1,
+                "file_path": "src/large.py",
+                "message": MESSAGES[index % len(MESSAGES)],
+                "category": rng.choice(list(ReviewCategory)),
+                "severity": rng.choice(list(SeverityLevel)),
+                "suggested_fix": "Apply the suggested change." if index % 2 else None,
+            }
+            for index in range(suggestions)
+        ])
+    return review_id
@@ -0,0 +1,276 @@
+"""
+Benchmark steps, each run in a fresh process by benchmarks/__main__.py.
+
+Settings such as DATABASE_URL are read when ai_review is first imported,
+so every step configures the environment before importing it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.harness import run_load, summarize, time_calls
+
+# The fake LLM answers after a fixed delay so runs are comparable
+FAKE_LLM_LATENCY = "fixed:0.05"
+
+# Suggestions on the review read by the serialization benchmarks
+LARGE_REVIEW_SUGGESTIONS = 500
+
+BENCH_ENV = {
+    "LLM_PROVIDER": "openai",
+    # Every request reaches the (fake) LLM rather than the result cache
+    "ANALYSIS_CACHE_ENABLED": "false",
+    # The fake has no rate limits; the limiter must not be the bottleneck
+    "LLM_REQUESTS_PER_MINUTE": "0",
+    "LLM_TOKENS_PER_MINUTE": "0",
+    "LLM_INITIAL_CONCURRENCY": "64",
+    "LLM_MAX_CONCURRENCY": "64",
+    "LOCAL_ANALYSIS_WORKERS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def configure(db_path: Path, llm_port: int = 0) -> None:
+    os.environ.update(BENCH_ENV)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    if llm_port:
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{llm_port}/v1"
+
+
+def start_fake_llm() -> int:
+    """Serve the fake LLM from a background thread and return its port."""
+    import uvicorn
+    from ai_review.api.fake_llm import FakeLLMConfig, create_app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    app = create_app(FakeLLMConfig(latency=FAKE_LLM_LATENCY, tokens_per_second=0, seed=0))
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return port
+
+
+def seed(args: argparse.Namespace) -> None:
+    configure(args.db)
+    from ai_review.db.database import engine, init_db, write_engine
+    from benchmarks.seed import seed_database
+
+    init_db()
+    started = time.perf_counter()
+    count = seed_database(write_engine, args.size)
+    write_engine.dispose()
+    engine.dispose()
+    print(f"Seeded {count} suggestions in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+def run(args: argparse.Namespace) -> None:
+    # The fake server must be up before ai_review.services.llm builds its provider
+    configure(args.db)
+    port = start_fake_llm()
+    configure(args.db, port)
+
+    results = asyncio.run(bench_api(args))
+    results.extend(bench_service(args))
+    results.extend(bench_serialization(args))
+    args.output.write_text(json.dumps(results))
+
+
+async def bench_api(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Drive the API endpoints in-process at each concurrency level."""
+    import httpx
+    from ai_review.api.main import app
+    from ai_review.db.database import write_engine
+    from benchmarks.seed import SAMPLE_SOURCE, sample_review_ids
+
+    review_ids = sample_review_ids(write_engine, args.requests)
+    results = []
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=120) as client:
+        async def post_review(index: int) -> bool:
+            payload = {
+                "code": f"{SAMPLE_SOURCE}\n# request {index}\n",
+                "file_path": f"bench/file_{index}.py",
+                "use_cache": False,
+            }
+            response = await client.post("/review", json=payload)
+            return response.status_code == 200
+
+        async def list_reviews(index: int) -> bool:
+            response = await client.get("/reviews", params={"limit": 50})
+            return response.status_code == 200
+
+        async def get_review(index: int) -> bool:
+            response = await client.get(f"/reviews/{review_ids[index % len(review_ids)]}")
+            return response.status_code == 200
+
+        async def rerun(index: int) -> bool:
+            response = await client.post(f"/reviews/{review_ids[index % len(review_ids)]}/rerun")
+            return response.status_code == 200
+
+        endpoints = [
+            ("api.post_review", post_review),
+            ("api.list_reviews", list_reviews),
+            ("api.get_review", get_review),
+            ("api.rerun_review", rerun),
+        ]
+        for name, send in endpoints:
+            # Untimed warmup: connections, prepared statements, worker startup
+            await run_load(send, 1, 3)
+            for concurrency in args.concurrency:
+                load = await run_load(send, concurrency, args.requests)
+                results.append(summarize(
+                    name, load["latencies"], load["elapsed"], load["errors"],
+                    dataset=args.size, concurrency=concurrency
+                ))
+    return results
+
+
+def bench_service(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Time the service functions behind the hot endpoints, without HTTP."""
+    from ai_review.db.database import SessionLocal, WriteSessionLocal
+    from ai_review.models.review import ReviewRequest
+    from ai_review.services import llm
+    from ai_review.services.review import create_review, encode_cursor, list_reviews
+    from benchmarks.seed import SAMPLE_SOURCE
+
+    results = []
+    # Mock analysis is effectively free, so this measures persistence
+    llm.use_mock = True
+    with WriteSessionLocal() as db:
+        def persist(index: int) -> None:
+            create_review(ReviewRequest(
+                code=f"{SAMPLE_SOURCE}\n# persist {index}\n",
+                file_path=f"bench/persist_{index}.py",
+                use_cache=False
+            ), db)
+
+        timed = time_calls(persist, args.iterations)
+        results.append(summarize("service.create_review", timed["latencies"], timed["elapsed"], dataset=args.size))
+
+    with SessionLocal() as db:
+        timed = time_calls(lambda index: list_reviews(limit=100, db=db), args.iterations)
+        results.append(summarize("service.list_reviews", timed["latencies"], timed["elapsed"], dataset=args.size))
+
+        # A page from the middle of the table, reached by cursor
+        middle = list_reviews(skip=args.size // 20, limit=1, db=db)
+        cursor = encode_cursor(middle[0]) if middle else None
+        timed = time_calls(lambda index: list_reviews(limit=100, db=db, after=cursor), args.iterations)
+        results.append(summarize(
+            "service.list_reviews_deep_page", timed["latencies"], timed["elapsed"], dataset=args.size
+        ))
+    return results
+
+
+def bench_serialization(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Compare the CPU cost of the review read endpoints' response paths.
+    
+    "validated" reproduces what FastAPI does with a response_model: build
+    models from the rows, validate them against the response type, dump
+    them and encode with the stdlib json. "fast" is what the endpoints use:
+    rows straight to orjson bytes. "cached" is a read served by the review
+    cache.
+    """
+    from fastapi.responses import ORJSONResponse
+    from pydantic import TypeAdapter
+
+    from ai_review.db.database import SessionLocal, write_engine
+    from ai_review.models.review import ReviewResponse
+    from ai_review.services.cache import review_cache
+    from ai_review.services.review import get_review, get_review_json, list_reviews
+    from benchmarks.seed import seed_large_review
+
+    def validated_json(adapter: TypeAdapter, value: Any) -> bytes:
+        content = adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    review_adapter = TypeAdapter(ReviewResponse)
+    list_adapter = TypeAdapter(List[Dict[str, Any]])
+    review_id = seed_large_review(write_engine, LARGE_REVIEW_SUGGESTIONS)
+    cases = [
+        ("serialize.get_review.validated", False, lambda db: validated_json(review_adapter, get_review(review_id, db))),
+        ("serialize.get_review.fast", False, lambda db: get_review_json(review_id, db)),
+        ("serialize.get_review.cached", True, lambda db: get_review_json(review_id, db)),
+        (
+            "serialize.list_reviews.validated", False,
+            lambda db: validated_json(list_adapter, list_reviews(limit=100, db=db))
+        ),
+        ("serialize.list_reviews.fast", False, lambda db: ORJSONResponse(list_reviews(limit=100, db=db)).body),
+    ]
+    results = []
+    with SessionLocal() as db:
+        for name, cached, serialize in cases:
+            review_cache.enabled = cached
+            timed = time_calls(lambda index: serialize(db), args.iterations)
+            results.append(summarize(
+                name, timed["latencies"], timed["elapsed"], cpu=timed["cpu"],
+                dataset=args.size, suggestions=LARGE_REVIEW_SUGGESTIONS
+            ))
+    return results
+
+
+def build_tree(root: Path, dirs: int = 40, files_per_dir: int = 50) -> None:
+    """Create a deterministic source tree, including directories the CLI ignores."""
+    if root.exists():
+        return
+    for index in range(dirs):
+        package = root / f"pkg_{index}" / "sub"
+        package.mkdir(parents=True)
+        for number in range(files_per_dir):
+            (package / f"module_{number}.py").write_text(f"VALUE = {number}\n")
+        (package / "data.bin").write_bytes(b"\0" * 64)
+    for ignored in ("node_modules/lib", ".git/objects"):
+        directory = root / ignored
+        directory.mkdir(parents=True)
+        for number in range(files_per_dir * 10):
+            (directory / f"file_{number}.js").write_text("module.exports = 1;\n")
+
+
+def cli(args: argparse.Namespace) -> None:
+    from ai_review.cli.discovery import discover_files
+
+    build_tree(args.tree)
+    ignore = ["venv", "node_modules", ".git"]
+    timed = time_calls(lambda index: discover_files(args.tree, True, ignore), args.iterations)
+    files = len(discover_files(args.tree, True, ignore))
+    args.output.write_text(json.dumps([
+        summarize("cli.discover_files", timed["latencies"], timed["elapsed"], files=files)
+    ]))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run one benchmark step.")
+    steps = parser.add_subparsers(dest="step", required=True)
+
+    seed_parser = steps.add_parser("seed")
+    seed_parser.add_argument("--db", type=Path, required=True)
+    seed_parser.add_argument("--size", type=int, required=True)
+
+    run_parser = steps.add_parser("run")
+    run_parser.add_argument("--db", type=Path, required=True)
+    run_parser.add_argument("--size", type=int, required=True)
+    run_parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 8, 32])
+    run_parser.add_argument("--requests", type=int, default=200)
+    run_parser.add_argument("--iterations", type=int, default=200)
+    run_parser.add_argument("--output", type=Path, required=True)
+
+    cli_parser = steps.add_parser("cli")
+    cli_parser.add_argument("--tree", type=Path, required=True)
+    cli_parser.add_argument("--iterations", type=int, default=20)
+    cli_parser.add_argument("--output", type=Path, required=True)
+
+    args = parser.parse_args(argv)
+    {"seed": seed, "run": run, "cli": cli}[args.step](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,31 @@
 import os
+import shutil
 import sys
+import tempfile
 import pytest
+import pytest_asyncio
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
+# Tests that go through the app's own engines use a throwaway database, never
+# ./ai_review.db; the setting is read when ai_review.core.config is imported
+TEST_DB_DIR = tempfile.mkdtemp(prefix="ai-review-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'ai_review.db')}"
+
 from ai_review.db.models import Base
-from ai_review.db.database import get_db
+from ai_review.db.database import get_db, init_db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app_database():
+    """Create the schema of the throwaway application database."""
+    init_db()
+    yield
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
 
 
 @pytest.fixture(scope="function")
@@ -39,4 +56,14 @@ def override_get_db(db_session):
             yield db_session
         finally:
             pass
-    return _get_db 
\ No newline at end of file
+    return _get_db 
+
+@pytest_asyncio.fixture
+async def async_db_session():
+    """Create an async test database session."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()